@@ -0,0 +1,83 @@
+# affiliation_index.py
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import Site, Unit
+
+# A site is identified WACN-wide by its zone, since site ids repeat across zones.
+SiteKey = Tuple[int, int]  # (zone_id, site_id)
+# Talkgroups are zone-scoped too: each zone defines its own TG 1001, with its own mode and sites.
+TalkgroupKey = Tuple[int, int]  # (zone_id, talkgroup_id)
+
+
+class AffiliationIndex:
+    """
+    Incrementally maintained talkgroup -> site -> affiliated units table.
+    Every unit has at most one affiliation, so a reverse index lets a unit be
+    moved or removed without scanning the talkgroup tables. A unit affiliates
+    to the talkgroup of the zone serving it, so a talkgroup's sites are all in
+    its own zone.
+    """
+
+    def __init__(self):
+        self._by_talkgroup: Dict[TalkgroupKey, Dict[SiteKey, Set[int]]] = {}
+        self._by_unit: Dict[int, Tuple[TalkgroupKey, SiteKey]] = {}
+        self._sites: Dict[SiteKey, Site] = {}
+        self.store = None  # Optional persistence.RegistrationStore, told about every change
+
+    def affiliate(self, unit: Unit, talkgroup_id: int, zone_id: int, site: Site):
+        """Records an AFF_ACCEPT on zone_id's talkgroup, replacing any previous affiliation of the unit."""
+        self.remove(unit.id)
+        key = (zone_id, site.id)
+        talkgroup_key = (zone_id, talkgroup_id)
+        self._sites[key] = site
+        self._by_talkgroup.setdefault(talkgroup_key, {}).setdefault(key, set()).add(unit.id)
+        self._by_unit[unit.id] = (talkgroup_key, key)
+        if self.store:
+            self.store.affiliated(unit.id, talkgroup_id, zone_id, site.id)
+
+    def remove(self, unit_id: int) -> bool:
+        """Drops a unit's affiliation (re-registration, roam, power-off). Returns True if it had one."""
+        entry = self._by_unit.pop(unit_id, None)
+        if entry is None:
+            return False
+        talkgroup_key, key = entry
+        sites = self._by_talkgroup[talkgroup_key]
+        members = sites[key]
+        members.discard(unit_id)
+        if not members:
+            del sites[key]
+            if not sites:
+                del self._by_talkgroup[talkgroup_key]
+        if self.store:
+            self.store.unaffiliated(unit_id, talkgroup_key[1], *key)
+        return True
+
+    def affiliation_of(self, unit_id: int) -> Optional[Tuple[int, SiteKey]]:
+        """Returns (talkgroup_id, (zone_id, site_id)) for an affiliated unit."""
+        entry = self._by_unit.get(unit_id)
+        return (entry[0][1], entry[1]) if entry else None
+
+    def units(self, zone_id: int, talkgroup_id: int, site_key: Optional[SiteKey] = None) -> Set[int]:
+        """Unit ids affiliated to a zone's talkgroup, optionally on one site only."""
+        sites = self._by_talkgroup.get((zone_id, talkgroup_id), {})
+        if site_key is not None:
+            return set(sites.get(site_key, ()))
+        return {unit_id for members in sites.values() for unit_id in members}
+
+    def units_by_site(self, zone_id: int, talkgroup_id: int) -> Dict[SiteKey, Set[int]]:
+        """Affiliated unit ids of a zone's talkgroup grouped by site (copies, safe to modify)."""
+        return {key: set(members) for key, members in self._by_talkgroup.get((zone_id, talkgroup_id), {}).items()}
+
+    def site_counts(self, zone_id: int, talkgroup_id: int) -> Dict[SiteKey, int]:
+        """Number of affiliated units per site for a zone's talkgroup."""
+        return {key: len(members) for key, members in self._by_talkgroup.get((zone_id, talkgroup_id), {}).items()}
+
+    def count(self, zone_id: int, talkgroup_id: int) -> int:
+        return sum(len(members) for members in self._by_talkgroup.get((zone_id, talkgroup_id), {}).values())
+
+    def involved_site_keys(self, zone_id: int, talkgroup_id: int) -> List[SiteKey]:
+        return list(self._by_talkgroup.get((zone_id, talkgroup_id), {}))
+
+    def involved_sites(self, zone_id: int, talkgroup_id: int) -> List[Site]:
+        """Sites a group call on a zone's talkgroup must include. O(sites with affiliations)."""
+        return [self._sites[key] for key in self._by_talkgroup.get((zone_id, talkgroup_id), {})]
@@ -0,0 +1,142 @@
+# broadcasts.py
+"""
+Periodic control channel broadcasts: RFSS_STS_BCST, NET_STS_BCST, SYS_SRV_BCST,
+ADJ_STS_BCST and TIME_DATE_ANN on every online site.
+
+Each broadcast type has its own period, but a zone only ever has one
+BroadcastTick pending: it fires at the earliest due time and sends every type
+due then on all sites as one batch per type, then reschedules itself. That is
+one heap push per period however many sites and types there are.
+"""
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from events import BroadcastTick
+from models import Site, SiteStatus
+from p25.packets import OutboundSignalingPacket
+from p25.control_status import (
+    NetworkStatusBroadcast,
+    RfssStatusBroadcast,
+    SystemServiceBroadcast,
+    TimeAndDateAnnouncement,
+)
+
+# --- Constants ---
+# Seconds between broadcasts of each type on a site; None or 0 turns a type off.
+DEFAULT_BROADCAST_PERIODS = {
+    "rfss_status": 5.0,
+    "network_status": 5.0,
+    "system_service": 10.0,
+    "adjacent_status": 10.0,
+    "time_date": 60.0,
+}
+SIMULATION_EPOCH = 1704067200  # POSIX time at sim time 0 (2024-01-01 00:00 UTC)
+DUE_TOLERANCE_SECONDS = 1e-9  # Periods add up in floating point
+
+# SYS_SRV_BCST service bits, one per service the simulation implements.
+SERVICE_REGISTRATION = 0x000001
+SERVICE_GROUP_VOICE = 0x000002
+SERVICE_EMERGENCY_ALARM = 0x000004
+SERVICE_PACKET_DATA = 0x000008
+SERVICES_SUPPORTED = SERVICE_REGISTRATION | SERVICE_GROUP_VOICE | SERVICE_EMERGENCY_ALARM | SERVICE_PACKET_DATA
+
+
+# Forward declaration for type hinting to avoid circular import
+class ZoneController:
+    pass
+
+
+class BroadcastScheduler:
+    """Sends one zone's periodic control channel broadcasts from a single recurring event."""
+
+    def __init__(self, controller: 'ZoneController', periods: Optional[Dict[str, float]] = None):
+        self.controller = controller
+        self.periods = dict(DEFAULT_BROADCAST_PERIODS)
+        for name, period in (periods or {}).items():
+            if name not in DEFAULT_BROADCAST_PERIODS:
+                print(f"Warning: Unknown broadcast type '{name}'. Known types: {', '.join(DEFAULT_BROADCAST_PERIODS)}.")
+                continue
+            self.periods[name] = float(period) if period else None
+        self._builders: Dict[str, Callable[[Site], List[OutboundSignalingPacket]]] = {
+            "rfss_status": self._rfss_status,
+            "network_status": self._network_status,
+            "system_service": self._system_service,
+            "adjacent_status": self._adjacent_status,
+            "time_date": self._time_date,
+        }
+        self._next_due: Dict[str, float] = {}
+        self._pending_at: Optional[float] = None  # Time of the one BroadcastTick in the queue
+        self.sent = Counter()  # Broadcast type -> OSPs sent
+        self.ticks = 0
+
+    def start(self):
+        """Schedules the first broadcasts one period from now. Safe to call again."""
+        if self._pending_at is not None:
+            return
+        now = self.controller.current_time
+        self._next_due = {name: now + period for name, period in self.periods.items() if period}
+        self._schedule()
+
+    def _schedule(self):
+        if not self._next_due:
+            return
+        self._pending_at = min(self._next_due.values())
+        self.controller.schedule_event(max(0.0, self._pending_at - self.controller.current_time),
+                                       BroadcastTick(zone_id=self.controller.zone_id))
+
+    def handle_tick(self, event: BroadcastTick):
+        now = self.controller.current_time
+        self._pending_at = None
+        self.ticks += 1
+        due = [name for name, at in self._next_due.items() if at <= now + DUE_TOLERANCE_SECONDS]
+        zone = self.controller.radio_system.get_zone(self.controller.zone_id)
+        sites = [site for site in zone.sites.values() if site.status == SiteStatus.ONLINE and site.control_channel]
+        for name in due:
+            build = self._builders[name]
+            packets = [packet for site in sites for packet in build(site)]
+            if packets:
+                self.controller.event_bus.publish_batch(packets)
+                self.sent[name] += len(packets)
+            period = self.periods[name]
+            at = self._next_due[name] + period
+            while at <= now + DUE_TOLERANCE_SECONDS:
+                at += period  # A late tick skips the periods it missed rather than bursting
+            self._next_due[name] = at
+        self._schedule()
+
+    # --- Broadcast builders (one site each) ---
+    def _rfss_status(self, site: Site) -> List[OutboundSignalingPacket]:
+        return [RfssStatusBroadcast(zone_id=self.controller.zone_id, site_id=site.id,
+                                    channel_id=site.control_channel.id)]
+
+    def _network_status(self, site: Site) -> List[OutboundSignalingPacket]:
+        return [NetworkStatusBroadcast(wacn_id=self.controller.radio_system.config.wacn.id,
+                                       zone_id=self.controller.zone_id, site_id=site.id,
+                                       channel_id=site.control_channel.id)]
+
+    def _system_service(self, site: Site) -> List[OutboundSignalingPacket]:
+        available = SERVICES_SUPPORTED
+        if not self.controller.data_service.data_channels(site):
+            available &= ~SERVICE_PACKET_DATA
+        return [SystemServiceBroadcast(zone_id=self.controller.zone_id, site_id=site.id,
+                                       services_available=available, services_supported=SERVICES_SUPPORTED)]
+
+    def _adjacent_status(self, site: Site) -> List[OutboundSignalingPacket]:
+        return self.controller.radio_system.neighbors.adjacent_status_broadcasts(self.controller.zone_id, site)
+
+    def _time_date(self, site: Site) -> List[OutboundSignalingPacket]:
+        return [TimeAndDateAnnouncement(zone_id=self.controller.zone_id, site_id=site.id,
+                                        timestamp=SIMULATION_EPOCH + int(self.controller.current_time))]
+
+    def report(self) -> str:
+        now = self.controller.current_time
+        zone = self.controller.radio_system.get_zone(self.controller.zone_id)
+        online = sum(1 for site in zone.sites.values() if site.status == SiteStatus.ONLINE)
+        total = sum(self.sent.values())
+        lines = [f"  Broadcast ticks: {self.ticks}  OSPs sent: {total}  Online sites: {online}"]
+        for name, period in self.periods.items():
+            schedule = f"every {period:g}s" if period else "off"
+            lines.append(f"  {name:<16} {schedule:<12} {self.sent[name]} sent")
+        if now > 0 and online:
+            lines.append(f"  Control channel load: {total / now / online:.2f} broadcast TSBKs/s per site")
+        return "\n".join(lines)
@@ -0,0 +1,342 @@
+# channel_allocator.py
+"""
+Voice channel allocation by timeslot. An FDMA (Phase 1) call occupies a whole
+channel; a TDMA (Phase 2) channel carries two calls, one per timeslot.
+
+Free slots of a site are kept in integer bitsets, two bits per voice channel,
+so finding the channels that can take a call is a handful of bit operations
+however many channels the site has. TDMA calls are packed into channels that
+already carry one TDMA call before a new channel is opened, and each mode
+prefers channels the other mode cannot use, which keeps dual-mode channels free
+for whoever needs them.
+
+Which of the suitable channels gets the grant is up to the site's assignment
+strategy (Site.assignment_mode):
+
+  lowest_id  the lowest channel id, packing traffic onto the first channels.
+  rotating   the next channel after the last one granted ("rollover").
+  balanced   the channel with the fewest grants so far, spreading wear.
+"""
+import heapq
+import statistics
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from metrics import ChannelUsage
+
+# --- Constants ---
+SLOTS_PER_CHANNEL = 2
+DEFAULT_ASSIGNMENT_MODE = "lowest_id"
+
+# Every voice channel is in exactly one pool, by capability and free slots.
+# A request's candidate channels are always one whole pool.
+POOL_HALF_TDMA = 0  # TDMA-capable, one slot carrying a TDMA call
+POOL_FREE_TDMA = 1  # TDMA-only, idle
+POOL_FREE_FDMA = 2  # FDMA-only, idle
+POOL_FREE_DUAL = 3  # FDMA and TDMA capable, idle
+POOL_FULL = 4
+
+SlotKey = Tuple[int, int]  # (channel_id, timeslot)
+
+
+def _lowest_bit_index(bits: int) -> int:
+    return (bits & -bits).bit_length() - 1
+
+
+# --- Assignment Strategies ---
+class AssignmentStrategy:
+    """Chooses which channel of a candidate pool gets the next grant."""
+    name = ""
+
+    def reset(self, channel_ids: List[int], pools: List[int]):
+        """Called whenever the site's channel list is (re)built. Channel i is channel_ids[i]."""
+        self.channel_ids = channel_ids
+
+    def pick(self, pool: int, candidates: int) -> int:
+        """Returns the index of one channel in `candidates` (slot 0 bits of the pool's channels)."""
+        raise NotImplementedError
+
+    def granted(self, i: int):
+        pass
+
+    def moved(self, i: int, pool: int):
+        """Channel i changed pool after a grant or release."""
+        pass
+
+
+class LowestIdStrategy(AssignmentStrategy):
+    name = "lowest_id"
+
+    def pick(self, pool: int, candidates: int) -> int:
+        return _lowest_bit_index(candidates) // SLOTS_PER_CHANNEL
+
+
+class RotatingStrategy(AssignmentStrategy):
+    """Round robin: the first candidate at or after the channel following the last grant."""
+    name = "rotating"
+
+    def reset(self, channel_ids: List[int], pools: List[int]):
+        super().reset(channel_ids, pools)
+        self._cursor = 0  # Bit position of the next channel in rotation
+
+    def pick(self, pool: int, candidates: int) -> int:
+        ahead = candidates & ~((1 << self._cursor) - 1)
+        return _lowest_bit_index(ahead or candidates) // SLOTS_PER_CHANNEL
+
+    def granted(self, i: int):
+        self._cursor = SLOTS_PER_CHANNEL * (i + 1)
+
+
+class BalancedStrategy(AssignmentStrategy):
+    """
+    Least cumulative grants first, lowest channel id among equals. One heap per
+    pool with lazy deletion: an entry is stale once its channel changed pool or
+    was granted again, and is dropped when it reaches the top.
+    """
+    name = "balanced"
+
+    def __init__(self):
+        self.uses: Dict[int, int] = {}  # Channel id -> grants; kept across rebuilds
+
+    def reset(self, channel_ids: List[int], pools: List[int]):
+        super().reset(channel_ids, pools)
+        self._pools = list(pools)
+        self._heaps: Dict[int, list] = {}
+        for i, pool in enumerate(pools):
+            self._push(i, pool)
+
+    def _push(self, i: int, pool: int):
+        if pool != POOL_FULL:
+            heapq.heappush(self._heaps.setdefault(pool, []), (self.uses.get(self.channel_ids[i], 0), i))
+
+    def pick(self, pool: int, candidates: int) -> int:
+        heap = self._heaps.get(pool, [])
+        while heap:
+            uses, i = heap[0]
+            if self._pools[i] == pool and uses == self.uses.get(self.channel_ids[i], 0):
+                return i
+            heapq.heappop(heap)
+        return _lowest_bit_index(candidates) // SLOTS_PER_CHANNEL  # Not reached while heaps and bitsets agree
+
+    def granted(self, i: int):
+        channel_id = self.channel_ids[i]
+        self.uses[channel_id] = self.uses.get(channel_id, 0) + 1
+
+    def moved(self, i: int, pool: int):
+        self._pools[i] = pool
+        self._push(i, pool)
+        heap = self._heaps.get(pool)
+        if heap and len(heap) > 4 * len(self.channel_ids):
+            # Too many stale entries: rebuild this pool's heap from the live state.
+            self._heaps[pool] = []
+            for j, current in enumerate(self._pools):
+                if current == pool:
+                    self._push(j, pool)
+
+
+ASSIGNMENT_STRATEGIES = {
+    "lowest_id": LowestIdStrategy,
+    "rotating": RotatingStrategy,
+    "rollover": RotatingStrategy,
+    "balanced": BalancedStrategy,
+}
+
+
+def make_strategy(assignment_mode: Optional[str]) -> AssignmentStrategy:
+    strategy_type = ASSIGNMENT_STRATEGIES.get((assignment_mode or DEFAULT_ASSIGNMENT_MODE).lower())
+    if strategy_type is None:
+        print(f"Warning: Invalid assignment mode '{assignment_mode}'. Defaulting to {DEFAULT_ASSIGNMENT_MODE}.")
+        strategy_type = ASSIGNMENT_STRATEGIES[DEFAULT_ASSIGNMENT_MODE]
+    return strategy_type()
+
+
+class SiteChannelAllocator:
+    """
+    Slot allocator for one site's voice channels. Bit 2*i + s of `free` is
+    timeslot s of the i-th voice channel in channel id order. FDMA-only channels
+    have slot 0 only; an FDMA call on a dual-mode channel takes both slots.
+    """
+
+    def __init__(self, channels: Iterable = (), assignment_mode: Optional[str] = None):
+        self.assignments: Dict[SlotKey, object] = {}  # (channel_id, slot) -> RadioCall
+        self.channel_usage: Dict[int, ChannelUsage] = {}
+        self._held_since: Dict[SlotKey, float] = {}
+        self.tdma_grants = 0
+        self.fdma_grants = 0
+        self.packed = 0  # TDMA calls placed on a channel already carrying a TDMA call
+        self.active_calls = 0
+        self.peak_calls = 0
+        self.assignment_mode = assignment_mode
+        self.strategy = make_strategy(assignment_mode)
+        self.key_listener: Optional[Callable[[int, bool], None]] = None  # (channel_id, keyed) on key up/down
+        self.rebuild(channels, assignment_mode)
+
+    def rebuild(self, channels: Iterable, assignment_mode: Optional[str] = None):
+        """Re-reads the channel list (after a config change), keeping slots held by current calls."""
+        voice = sorted((c for c in channels if c.enabled and not c.control and not c.data_only and (c.fdma or c.tdma)),
+                       key=lambda c: c.id)
+        self._channel_ids = [c.id for c in voice]
+        self._index = {channel_id: i for i, channel_id in enumerate(self._channel_ids)}
+        self._slot_zero = 0  # Slot 0 bit of every voice channel
+        self._fdma = 0  # Slot 0 bits of FDMA-capable channels
+        self._tdma = 0  # Slot 0 bits of TDMA-capable channels
+        self._all_slots = 0
+        for i, channel in enumerate(voice):
+            bit = 1 << (SLOTS_PER_CHANNEL * i)
+            self._slot_zero |= bit
+            self._all_slots |= bit | (bit << 1 if channel.tdma else 0)
+            if channel.fdma:
+                self._fdma |= bit
+            if channel.tdma:
+                self._tdma |= bit
+            self.channel_usage.setdefault(channel.id, ChannelUsage()).slots = SLOTS_PER_CHANNEL if channel.tdma else 1
+        self.free = self._all_slots
+        for channel_id, slot in self.assignments:
+            i = self._index.get(channel_id)
+            if i is not None:
+                self.free &= ~(1 << (SLOTS_PER_CHANNEL * i + slot))
+
+        if assignment_mode != self.assignment_mode:
+            strategy = make_strategy(assignment_mode)
+            if type(strategy) is not type(self.strategy):
+                self.strategy = strategy
+            self.assignment_mode = assignment_mode
+        self.strategy.reset(self._channel_ids, [self._pool(i) for i in range(len(self._channel_ids))])
+
+    # --- Queries ---
+    @property
+    def slot_count(self) -> int:
+        return self._all_slots.bit_count()
+
+    def can_assign(self, tdma: bool, free: Optional[int] = None) -> bool:
+        return self._candidates(tdma, self.free if free is None else free) is not None
+
+    def can_assign_after_release(self, tdma: bool, released: Iterable[Tuple[int, Optional[int]]]) -> bool:
+        """Whether a call of this mode would fit once the given (channel_id, slot) holdings are released."""
+        free = self.free
+        for channel_id, slot in released:
+            free |= self._slot_bits(channel_id, slot)
+        return self.can_assign(tdma, free)
+
+    def supports(self, channel_id: int, slot: Optional[int]) -> bool:
+        """Whether a call could hold (channel_id, slot) under the current channel list."""
+        i = self._index.get(channel_id)
+        if i is None:
+            return False
+        bit = 1 << (SLOTS_PER_CHANNEL * i)
+        return bool(self._fdma & bit if slot is None else self._tdma & bit)
+
+    def _candidates(self, tdma: bool, free: int) -> Optional[Tuple[int, int]]:
+        """Returns (pool, slot 0 bits of its channels) that a call of this mode should use, or None."""
+        slot_zero_free = free & self._slot_zero
+        slot_one_free = (free >> 1) & self._slot_zero
+        if tdma:
+            half_used = (slot_zero_free ^ slot_one_free) & self._tdma
+            if half_used:
+                return POOL_HALF_TDMA, half_used
+            idle = slot_zero_free & slot_one_free & self._tdma
+            preferred, preferred_pool = idle & ~self._fdma, POOL_FREE_TDMA
+        else:
+            # An FDMA-only channel has no slot 1, so slot 0 alone makes it idle.
+            idle = slot_zero_free & (slot_one_free | (self._slot_zero & ~self._tdma)) & self._fdma
+            preferred, preferred_pool = idle & ~self._tdma, POOL_FREE_FDMA
+        if preferred:
+            return preferred_pool, preferred
+        if idle:
+            return POOL_FREE_DUAL, idle
+        return None
+
+    def _pool(self, i: int) -> int:
+        bit = 1 << (SLOTS_PER_CHANNEL * i)
+        slot_zero_free, slot_one_free = self.free & bit, (self.free >> 1) & bit
+        if not self._tdma & bit:
+            return POOL_FREE_FDMA if slot_zero_free else POOL_FULL
+        if slot_zero_free and slot_one_free:
+            return POOL_FREE_DUAL if self._fdma & bit else POOL_FREE_TDMA
+        return POOL_HALF_TDMA if slot_zero_free or slot_one_free else POOL_FULL
+
+    def _slot_bits(self, channel_id: int, slot: Optional[int]) -> int:
+        i = self._index.get(channel_id)
+        if i is None:
+            return 0
+        base = SLOTS_PER_CHANNEL * i
+        if slot is None:
+            return (0b11 << base) & self._all_slots
+        return 1 << (base + slot)
+
+    # --- Allocation ---
+    def assign(self, call, tdma: bool, now: float = 0.0) -> Optional[Tuple[int, Optional[int]]]:
+        """Reserves a timeslot (TDMA) or a whole channel (FDMA). Returns (channel_id, slot) or None."""
+        found = self._candidates(tdma, self.free)
+        if found is None:
+            return None
+        pool, candidates = found
+        i = self.strategy.pick(pool, candidates)
+        channel_id = self._channel_ids[i]
+        slot = None
+        if tdma:
+            slot = 0 if self.free & self._slot_bits(channel_id, 0) else 1
+            if pool == POOL_HALF_TDMA:
+                self.packed += 1
+            self.tdma_grants += 1
+        else:
+            self.fdma_grants += 1
+        bits = self._slot_bits(channel_id, slot)
+        channel_bits = self._slot_bits(channel_id, None)
+        keys_up = (self.free & channel_bits) == channel_bits
+        self.free &= ~bits
+        for held in range(SLOTS_PER_CHANNEL) if slot is None else (slot,):
+            if bits & self._slot_bits(channel_id, held):
+                self.assignments[(channel_id, held)] = call
+                self._held_since[(channel_id, held)] = now
+        self.channel_usage[channel_id].grants += 1
+        self.strategy.granted(i)
+        self.strategy.moved(i, self._pool(i))
+        self.active_calls += 1
+        self.peak_calls = max(self.peak_calls, self.active_calls)
+        if keys_up and self.key_listener:
+            self.key_listener(channel_id, True)
+        return channel_id, slot
+
+    def release(self, channel_id: int, slot: Optional[int] = None, now: float = 0.0):
+        """Frees a call's timeslot, or its whole channel when slot is None."""
+        released = False
+        for held in range(SLOTS_PER_CHANNEL) if slot is None else (slot,):
+            if self.assignments.pop((channel_id, held), None) is not None:
+                released = True
+                self.channel_usage[channel_id].busy_seconds += now - self._held_since.pop((channel_id, held))
+        if released:
+            self.active_calls -= 1
+        self.free |= self._slot_bits(channel_id, slot) & self._all_slots  # A reload may have dropped the slot
+        i = self._index.get(channel_id)
+        if i is not None:
+            self.strategy.moved(i, self._pool(i))
+        if released and self.key_listener and not any((channel_id, held) in self.assignments
+                                                       for held in range(SLOTS_PER_CHANNEL)):
+            self.key_listener(channel_id, False)
+
+    # --- Reporting ---
+    def utilization(self, now: float) -> Dict[int, float]:
+        """Fraction of slot time in use since start, per voice channel id, counting calls still up."""
+        busy = {channel_id: self.channel_usage[channel_id].busy_seconds for channel_id in self._channel_ids}
+        for (channel_id, _), since in self._held_since.items():
+            if channel_id in busy:
+                busy[channel_id] += now - since
+        return {channel_id: busy[channel_id] / (self.channel_usage[channel_id].slots * now) if now > 0 else 0.0
+                for channel_id in self._channel_ids}
+
+    def utilization_spread(self, now: float) -> float:
+        """Coefficient of variation of channel utilization: 0 when every channel carries the same load."""
+        values = list(self.utilization(now).values())
+        mean = statistics.fmean(values) if values else 0.0
+        return statistics.pstdev(values) / mean if mean > 0 else 0.0
+
+    def report(self, now: float = 0.0) -> str:
+        in_use = self.slot_count - self.free.bit_count()
+        utilization = self.utilization(now)
+        per_channel = ", ".join(f"Ch{channel_id} {utilization[channel_id]:.0%}/"
+                                f"{self.channel_usage[channel_id].grants}" for channel_id in self._channel_ids)
+        return (f"{len(self._channel_ids)} voice channels, {self.slot_count} slots ({in_use} in use), "
+                f"{self.active_calls} calls (peak {self.peak_calls}). Grants: {self.tdma_grants} TDMA "
+                f"({self.packed} packed), {self.fdma_grants} FDMA\n"
+                f"    {self.strategy.name} assignment, utilization/grants: {per_channel or 'none'} "
+                f"(spread {self.utilization_spread(now):.2f})")
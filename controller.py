@@ -2,18 +2,41 @@
 # controller.py
 import heapq
 import time
+import itertools
+import random
+import threading
 from collections import deque
+from concurrent.futures import Future
+from typing import Callable
 from event_bus import EventBus
+from metrics import CallMetrics, QueueMetrics, RegistrationMetrics, RunningStats
 from models import *
-from geo_utils import get_distance, estimate_rssi, get_random_point_in_area
+from geo_utils import get_distance, get_random_point_in_area
 
 from events import *
 from p25.packets import *
 from p25.control_status import *
 from p25.voice_service import *
+from p25.data_service import *
+from sndcp import DataService
+from broadcasts import BroadcastScheduler
+from query import QueryError, format_units, parse_query
 
 # --- Constants ---
 REGISTRATION_BAN_TIME_SECONDS = 30.0
+MAX_SITE_REGISTRATIONS = 1000
+GRANT_UPDATE_INTERVAL_SECONDS = 1.0
+CALL_QUEUE_TIMEOUT_SECONDS = 30.0
+REHOME_JITTER_SECONDS = 5.0  # Default window over which a failed site's units re-scan
+INBOX_CAPACITY = 20000  # External events waiting for the next tick before submitters are pushed back
+COALESCED_EVENT_TYPES = (UnitScanForSitesCommand,)  # At most one pending per (type, unit); re-running is wasted work
+OVERLOAD_EXEMPT_PRIORITIES = (EventPriority.SYSTEM, EventPriority.EMERGENCY)  # Never shed
+# Internal timers whose loss nothing repairs (a call that stops getting grant updates, a unit banned
+# for good, a data session stuck waiting for READY).
+OVERLOAD_EXEMPT_TYPES = (CallGrantUpdateRequest, UnitUnbanFromSiteCommand, DataSessionReadyTimeout)  # Never shed, whatever their priority
+OVERLOAD_READMIT_FRACTION = 0.9  # Deferred events return once the queue is below this share of its cap
+PREEMPTING_PRIORITIES = (EventPriority.EMERGENCY, EventPriority.PREEMPT)  # May end lower-priority calls for channels
+EMERGENCY_ALARM_SERVICE_TYPE = 0x27  # EMRG_ALRM_REQ opcode, echoed in ACK_RSP_FNE
 
 
 # Forward declaration for type hinting to avoid circular import
@@ -21,6 +44,10 @@ class RadioSystem:
     pass
 
 
+class ConfigDelta:
+    pass
+
+
 class ZoneController:
     """
     Orchestrates all activity within a single Zone (RFSS), processing
@@ -32,36 +59,276 @@ class ZoneController:
         self.zone_id = zone_id
         self.event_bus = EventBus()
         self.event_queue = []  # Priority queue: (execution_time, priority, counter, event)
-        self.call_busy_queue = deque()  # Simple FIFO queue for now
+        self.emergency_queue = []  # Same entries for EMERGENCY events; checked before event_queue
+        self.call_busy_queue = []  # Priority queue: (priority, queued_time, counter, packet)
+        self.active_calls: Dict[int, RadioCall] = {}
+        self.calls_by_talkgroup: Dict[int, RadioCall] = {}
+        self.call_metrics = CallMetrics()
+        self.registration_metrics = RegistrationMetrics()
+        self.data_service = DataService(self, radio_system.config.wacn.data_bit_rate)
+        self.broadcasts = BroadcastScheduler(self, radio_system.config.wacn.broadcast_periods)
+        self._call_ids = itertools.count(1)
+        self._busy_counter = itertools.count()
+        self._channels_released = False
         self.current_time = 0.0
         self.event_counter = 0
+        self.trace_recorder = None  # Optional event_trace.TraceRecorder, shared across zones
+        self.router = None  # Set by WacnRouter.register when running with multiple zones
+        self.event_sources = []  # Lazy generators (e.g. traffic.TrafficGenerator) fed every tick
+        self.queue_metrics = QueueMetrics()
+        self.queue_capacity = radio_system.config.wacn.zone_queue_capacity  # None: unbounded
+        self.overload_policy = radio_system.config.wacn.overload_policy  # "defer" or "drop"
+        self._cancelled = set()  # Counters of heap entries removed lazily (coalesced or shed)
+        self._pending_coalesced: Dict[tuple, tuple] = {}  # (type, unit_id) -> heap entry
+        self._queued_low: Dict[int, tuple] = {}  # Counter -> heap entry of LOW events, oldest first
+        self._deferred = deque()  # (execution_time, event) shed under the "defer" policy
+        self._pending_alarms: Dict[Tuple[int, int], float] = {}  # (unit_id, talkgroup_id) -> alarm send time
+        budget_ms = radio_system.config.wacn.tick_budget_ms
+        self.tick_budget = budget_ms / 1000.0 if budget_ms else None  # Wall-clock seconds per tick
+        self._lanes: Dict[int, deque] = {}  # Priority -> due entries waiting for budget, in arrival order
+        self._lane_order: List[int] = []  # Lane priorities, highest (lowest value) first
+        self._lane_count = 0
+        self.inbox_capacity = INBOX_CAPACITY
+        self.inbox_accepted = 0
+        self.inbox_rejected = 0
+        self._inbox = deque()  # Filled by other threads (e.g. ingress.IngressServer), drained by tick()
+        self._inbox_ready = threading.Condition()
+        self._tick_calls = deque()  # (action, future) handed over by other threads, run at the next tick
         self._register_handlers()
 
     def _register_handlers(self):
         """Subscribe methods to handle specific events and packets."""
         # --- High-Level Simulation Commands ---
         self.event_bus.subscribe(UnitPowerOnCommand, self.handle_unit_power_on_command)
+        self.event_bus.subscribe(UnitPowerOffCommand, self.handle_unit_power_off_command)
         self.event_bus.subscribe(UnitInitiateCallCommand, self.handle_unit_initiate_call_command)
+        self.event_bus.subscribe(UnitEndCallCommand, self.handle_unit_end_call_command)
+        self.event_bus.subscribe(CallTeardownRequest, self.handle_call_teardown_request)
+        self.event_bus.subscribe(CallGrantUpdateRequest, self.handle_call_grant_update_request)
         self.event_bus.subscribe(ControlChannelEstablishRequest, self.handle_control_channel_establish)
         self.event_bus.subscribe(UnitUpdateLocationCommand, self.handle_unit_update_location_command)
         self.event_bus.subscribe(UnitScanForSitesCommand, self.handle_unit_scan_for_sites_command)
         self.event_bus.subscribe(UnitUnbanFromSiteCommand, self.handle_unit_unban_from_site_command)
+        self.event_bus.subscribe(SiteFailCommand, self.handle_site_fail_command)
+        self.event_bus.subscribe(SiteRestoreCommand, self.handle_site_restore_command)
+        self.event_bus.subscribe(UnitEmergencyAlarmCommand, self.handle_unit_emergency_alarm_command)
+        self.event_bus.subscribe(ConsoleEmergencyNotification, self.handle_console_emergency_notification)
+        self.event_bus.subscribe(UnitSendDataCommand, self.handle_unit_send_data_command)
+        self.event_bus.subscribe(DataBurstComplete, self.data_service.burst_complete)
+        self.event_bus.subscribe(DataSessionReadyTimeout, self.data_service.ready_timeout)
+        self.event_bus.subscribe(BroadcastTick, self.broadcasts.handle_tick)
 
         # --- P25 Inbound Signaling Packets (ISPs) ---
-        self.event_bus.subscribe(UnitRegistrationRequest, self.handle_unit_registration_request)
+        self.event_bus.subscribe_batch(UnitRegistrationRequest, self.handle_unit_registration_requests)
         self.event_bus.subscribe(GroupAffiliationRequest, self.handle_group_affiliation_request)
         self.event_bus.subscribe(GroupVoiceServiceRequest, self.handle_group_voice_request)
+        self.event_bus.subscribe(EmergencyAlarmRequest, self.handle_emergency_alarm_request)
+        self.event_bus.subscribe(SndcpDataChannelRequest, self.handle_sndcp_data_channel_request)
 
         # --- P25 Outbound Signaling Packets (OSPs) ---
         self.event_bus.subscribe(UnitRegistrationResponse, self.handle_unit_registration_response)
         self.event_bus.subscribe(GroupAffiliationResponse, self.handle_group_affiliation_response)
+        self.event_bus.subscribe(GroupVoiceChannelGrant, self.handle_group_voice_channel_grant)
+        self.event_bus.subscribe(AcknowledgeResponseFne, self.handle_acknowledge_response_fne)
+        self.event_bus.subscribe(SndcpDataChannelGrant, self.handle_sndcp_data_channel_grant)
 
     def schedule_event(self, delay_seconds: float, event: Event):
         """Schedules an event or packet to be processed in the future."""
-        execution_time = self.current_time + delay_seconds
-        heapq.heappush(self.event_queue, (execution_time, event.priority, self.event_counter, event))
+        entry = self._admit(self.current_time + delay_seconds, event)
+        if entry:
+            heapq.heappush(self.emergency_queue if entry[1] == EventPriority.EMERGENCY else self.event_queue, entry)
+            self._log_queued(entry[0], event)
+
+    def schedule_batch(self, batch: list):
+        """
+        Schedules a batch of (execution_time, event) pairs at their absolute times.
+        Large batches are merged into the heap in one pass instead of one push each.
+        """
+        entries = []
+        for execution_time, event in batch:
+            entry = self._admit(execution_time, event)
+            if entry is None:
+                continue
+            if entry[1] == EventPriority.EMERGENCY:
+                heapq.heappush(self.emergency_queue, entry)
+                self._log_queued(entry[0], event)
+            else:
+                entries.append(entry)
+        if len(entries) > len(self.event_queue):
+            self.event_queue.extend(entries)
+            heapq.heapify(self.event_queue)
+        else:
+            for entry in entries:
+                heapq.heappush(self.event_queue, entry)
+        if len(entries) == 1:
+            self._log_queued(entries[0][0], entries[0][3])
+        elif entries:
+            print(f"  [BATCH QUEUED] Zone {self.zone_id}: {len(entries)} events")
+
+    def _admit(self, execution_time: float, event: Event) -> Optional[tuple]:
+        """
+        Builds the heap entry for an event, or returns None when the event is not queued:
+        a duplicate of a pending coalescible command, or shed by the overload policy.
+        """
+        key = None
+        if isinstance(event, COALESCED_EVENT_TYPES):
+            key = (type(event), event.unit_id)
+            pending = self._pending_coalesced.get(key)
+            if pending:
+                if pending[0] <= execution_time:
+                    self.queue_metrics.coalesced += 1
+                    return None
+                self._cancel(pending)  # The new one runs sooner; it replaces the pending one
+                self.queue_metrics.coalesced += 1
+
+        if self.queue_capacity is not None and self.queued_count >= self.queue_capacity:
+            if event.priority not in OVERLOAD_EXEMPT_PRIORITIES and not isinstance(event, OVERLOAD_EXEMPT_TYPES):
+                # Shed queued LOW work first, newest first; only then the incoming event.
+                if event.priority != EventPriority.LOW and self._queued_low:
+                    victim = self._queued_low[next(reversed(self._queued_low))]
+                    self._cancel(victim)
+                    self._shed(victim[0], victim[3])
+                else:
+                    self._shed(execution_time, event)
+                    return None
+
+        entry = (execution_time, event.priority, self.event_counter, event)
         self.event_counter += 1
+        if key:
+            self._pending_coalesced[key] = entry
+        if event.priority == EventPriority.LOW and not isinstance(event, OVERLOAD_EXEMPT_TYPES):
+            self._queued_low[entry[2]] = entry
+        self.queue_metrics.peak_length = max(self.queue_metrics.peak_length, self.queued_count + 1)
+        return entry
+
+    def _cancel(self, entry: tuple):
+        """Removes a queued entry lazily; tick() skips it when it surfaces."""
+        self._cancelled.add(entry[2])
+        self._forget(entry)
+
+    def _forget(self, entry: tuple):
+        """Drops the bookkeeping of an entry that left the queue."""
+        event = entry[3]
+        if event.priority == EventPriority.LOW:
+            self._queued_low.pop(entry[2], None)
+        if isinstance(event, COALESCED_EVENT_TYPES):
+            key = (type(event), event.unit_id)
+            if self._pending_coalesced.get(key) is entry:
+                del self._pending_coalesced[key]
+
+    def _shed(self, execution_time: float, event: Event):
+        if self.overload_policy == "defer":
+            self._deferred.append((execution_time, event))
+            self.queue_metrics.deferred[event.priority] += 1
+        else:
+            self.queue_metrics.dropped[event.priority] += 1
+
+    @property
+    def queued_count(self) -> int:
+        return len(self.event_queue) + len(self.emergency_queue) + self._lane_count - len(self._cancelled)
+
+    def next_event_time(self) -> Optional[float]:
+        """Execution time of the earliest queued event, or None when idle."""
+        times = [queue[0][0] for queue in (self.emergency_queue, self.event_queue) if queue]
+        return min(times) if times else None
+
+    def _readmit_deferred(self):
+        """Puts deferred events back once the queue has drained below the readmit mark."""
+        limit = int(self.queue_capacity * OVERLOAD_READMIT_FRACTION)
+        readmitted = []
+        while self._deferred and self.queued_count + len(readmitted) < limit:
+            execution_time, event = self._deferred.popleft()
+            readmitted.append((max(execution_time, self.current_time), event))
+        if readmitted:
+            self.queue_metrics.readmitted += len(readmitted)
+            self.schedule_batch(readmitted)
+
+    def _pop_due(self) -> Optional[tuple]:
+        """Pops the next due entry, skipping cancelled ones. Due emergencies always come first."""
+        if self.emergency_queue and self.emergency_queue[0][0] <= self.current_time:
+            return heapq.heappop(self.emergency_queue)
+        while self.event_queue and self.event_queue[0][0] <= self.current_time:
+            entry = heapq.heappop(self.event_queue)
+            if entry[2] in self._cancelled:
+                self._cancelled.discard(entry[2])
+                continue
+            self._forget(entry)
+            return entry
+        return None
+
+    def _peek_due_type(self) -> Optional[type]:
+        """Type of the next due live event, discarding cancelled entries on top of the heap."""
+        if self.emergency_queue and self.emergency_queue[0][0] <= self.current_time:
+            return None  # Break the batch so the emergency goes next
+        while self.event_queue and self.event_queue[0][2] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(self.event_queue)[2])
+        if self.event_queue and self.event_queue[0][0] <= self.current_time:
+            return type(self.event_queue[0][3])
+        return None
+
+    def send_to_zone(self, zone_id: int, delay_seconds: float, event: Event):
+        """Schedules an event on the controller that owns zone_id."""
+        if self.router:
+            self.router.send(self, zone_id, delay_seconds, event)
+        else:
+            if zone_id != self.zone_id:
+                print(f"Warning: No router configured. Handling Zone {zone_id} event in Zone {self.zone_id}.")
+            self.schedule_event(delay_seconds, event)
+
+    def submit_external(self, events: List[Event], block: bool = False, timeout: float = None) -> bool:
+        """
+        Thread-safe entry point for events produced outside the simulation thread.
+        The batch is queued whole and scheduled at the start of the next tick. If the
+        inbox cannot take it, the batch is rejected, or with block=True the caller
+        waits up to timeout seconds for the tick loop to drain the inbox.
+        """
+        with self._inbox_ready:
+            fits = lambda: len(self._inbox) + len(events) <= self.inbox_capacity
+            if not fits():
+                if not block or len(events) > self.inbox_capacity or not self._inbox_ready.wait_for(fits, timeout):
+                    self.inbox_rejected += len(events)
+                    return False
+            self._inbox.extend(events)
+            self.inbox_accepted += len(events)
+            return True
+
+    def call_on_tick(self, action: Callable[[], Any]) -> Future:
+        """
+        Thread-safe: runs action on the simulation thread at the start of the next tick,
+        for work that must not race the tick loop (tracing, reloads, unit queries).
+        The returned future carries its result or exception.
+        """
+        future = Future()
+        with self._inbox_ready:
+            self._tick_calls.append((action, future))
+        return future
+
+    def _run_tick_calls(self):
+        with self._inbox_ready:
+            calls, self._tick_calls = self._tick_calls, deque()
+        for action, future in calls:
+            try:
+                future.set_result(action())
+            except Exception as e:
+                future.set_exception(e)
 
+    def _drain_inbox(self):
+        """
+        Moves inbox events into the queue, no more than the queue has room for: the rest
+        stay in the inbox, so once it fills submit_external refuses new work at ingress
+        instead of the overload policy shedding it after admission.
+        """
+        with self._inbox_ready:
+            if self.queue_capacity is None:
+                events, self._inbox = self._inbox, deque()
+            else:
+                room = self.queue_capacity - self.queued_count - len(self._deferred)
+                events = [self._inbox.popleft() for _ in range(min(max(room, 0), len(self._inbox)))]
+            if events:
+                self._inbox_ready.notify_all()
+        self.schedule_batch([(self.current_time, event) for event in events])
+
+    def _log_queued(self, execution_time: float, event: Event):
         event_name = type(event).__name__
         log_msg = f"  (T={execution_time:.2f}s) Zone {self.zone_id}: {event_name}"
 
@@ -101,10 +368,52 @@ class ZoneController:
                 unit.selected_talkgroup = default_tg
                 print(f"  -> Unit {unit.id} ({unit.alias}): Auto-selected TG {default_tg.id} ({default_tg.alias}).")
 
+        if unit.state == UnitState.POWERED_OFF:
+            unit.powered_on_at = self.current_time
         unit.power_on()
         print(f"  -> Triggering scan for Unit {unit.id}...")
         self.publish_event(UnitScanForSitesCommand(unit_id=unit.id))
 
+    def handle_unit_power_off_command(self, command: UnitPowerOffCommand):
+        """Handles the high-level command to power off a unit."""
+        unit = self.radio_system.get_unit(command.unit_id)
+        if not unit:
+            print(f"Error: Unit {command.unit_id} not found anywhere in the system.")
+            return
+        self._leave_current_site(unit)
+        unit.power_off()
+
+    def _leave_current_site(self, unit: Unit):
+        """Drops a unit's registration, affiliation and data session on the site it is leaving."""
+        self.radio_system.affiliations.remove(unit.id)
+        if unit.current_site and unit.current_site.deregister(unit):
+            self._record_deregistrations(unit.current_zone_id or self.zone_id, unit.current_site.id, [unit])
+        serving_zone_id = unit.current_zone_id if unit.current_zone_id is not None else self.zone_id
+        serving = self.router.controller_for(serving_zone_id) if self.router else self
+        if serving:
+            serving.data_service.close(unit.id)
+
+    def _record_registrations(self, zone_id: int, site_id: int, units: List[Unit]):
+        """Tells the registration store, if any, that units joined a site's registration table."""
+        if self.radio_system.store and units:
+            self.radio_system.store.registered(zone_id, site_id, [unit.id for unit in units])
+
+    def _record_deregistrations(self, zone_id: int, site_id: int, units: List[Unit]):
+        if self.radio_system.store:
+            for unit in units:
+                self.radio_system.store.deregistered(unit.id, zone_id, site_id)
+
+    def rescan_unit(self, unit: Unit, delay_seconds: float = 0.0):
+        """Sends a unit back to site selection, e.g. because its site went away or changed."""
+        self._leave_current_site(unit)
+        if unit.current_site and unit.current_zone_id is not None:
+            unit.last_site_key = (unit.current_zone_id, unit.current_site.id)
+        unit.current_site = None
+        unit.current_zone_id = None
+        if unit.state != UnitState.POWERED_OFF:
+            unit.state = UnitState.SEARCHING_FOR_SITE
+            self.schedule_event(delay_seconds, UnitScanForSitesCommand(unit_id=unit.id))
+
     def handle_unit_update_location_command(self, command: UnitUpdateLocationCommand):
         """Handles a unit's location change and triggers a re-scan."""
         unit = self.radio_system.get_unit(command.unit_id, self.zone_id)
@@ -114,7 +423,11 @@ class ZoneController:
             self.publish_event(UnitScanForSitesCommand(unit_id=unit.id))
 
     def handle_unit_scan_for_sites_command(self, command: UnitScanForSitesCommand):
-        """Scans all non-banned subsites to find the one with the best RSSI."""
+        """
+        Finds the non-banned subsite with the best RSSI. A unit that knows its site
+        (current, or the one it just left) scans that site and its neighbors first,
+        and only scans every site in range if none of them is usable.
+        """
         unit = self.radio_system.get_unit(command.unit_id)
         if not unit or not unit.location:
             print(f"Warning: Could not scan for Unit {command.unit_id}. Unit not found or has no location.")
@@ -126,46 +439,74 @@ class ZoneController:
         unit.visible_sites.clear()
         best_site, best_subsite, best_rssi, best_zone_id = None, None, -1, None
         scan_results = []
+        scanned = set()
 
-        for zone in self.radio_system.config.wacn.zones.values():
-            for site in zone.sites.values():
-                if site.status != SiteStatus.ONLINE: continue
-
-                ban_tuple = (zone.id, site.id)
-                if ban_tuple in unit.banned_sites:
-                    print(f"  [Debug] Skipping Site {site.id} (Zone {zone.id}) - Currently banned for this unit.")
-                    continue
-
-                for subsite in site.subsites:
-                    dist_km = get_distance(unit.location, subsite.location)
-                    dbm, rssi_level = estimate_rssi(dist_km, subsite)
-                    scan_results.append({"zone_id": zone.id, "site_alias": site.alias, "subsite_alias": subsite.alias,
-                                         "distance_km": dist_km, "dbm": dbm, "rssi_level": rssi_level})
-                    if rssi_level > best_rssi:
-                        best_rssi, best_site, best_subsite, best_zone_id = rssi_level, site, subsite, zone.id
+        anchor = ((unit.current_zone_id, unit.current_site.id) if unit.current_site and unit.current_zone_id
+                  else unit.last_site_key)
+        if anchor:
+            anchor_site = self.radio_system.get_site(anchor[1], anchor[0])
+            targets = ([(anchor[0], anchor_site)] if anchor_site else []) + self.radio_system.neighbors.neighbors(*anchor)
+            best_rssi, best_site, best_subsite, best_zone_id = self._scan_sites(unit, targets, scan_results, scanned)
+            if best_rssi > 0:
+                self.registration_metrics.neighbor_scans += 1
+            else:
+                print(f"  -> No usable site among the neighbors of Site {anchor[1]} (Zone {anchor[0]}). Scanning all sites.")
+        if best_rssi <= 0:
+            self.registration_metrics.full_scans += 1
+            targets = ((zone.id, site) for zone in self.radio_system.zones_in_range(unit.location)
+                       for site in zone.sites.values())
+            best_rssi, best_site, best_subsite, best_zone_id = self._scan_sites(unit, targets, scan_results, scanned)
 
-        print("┌" + "─" * 85 + "┐")
+        print("┌" + "─" * 98 + "┐")
         print(
-            f"| {'Zone':<5} | {'Site Alias':<15} | {'Subsite Alias':<15} | {'Distance (km)':<15} | {'RSSI (dBm)':<12} | {'Level':<5} |")
-        print("├" + "─" * 85 + "┤")
+            f"| {'Zone':<5} | {'Site Alias':<15} | {'Subsite Alias':<15} | {'Distance (km)':<15} | {'RSSI (dBm)':<12} | {'SINR (dB)':<10} | {'Level':<5} |")
+        print("├" + "─" * 98 + "┤")
         for result in sorted(scan_results, key=lambda x: x['rssi_level'], reverse=True):
             print(
-                f"| {result['zone_id']:<5} | {result['site_alias']:<15} | {result['subsite_alias']:<15} | {result['distance_km']:<15.2f} | {result['dbm']:<12.1f} | {result['rssi_level']:<5} |")
-        print("└" + "─" * 85 + "┘")
+                f"| {result['zone_id']:<5} | {result['site_alias']:<15} | {result['subsite_alias']:<15} | {result['distance_km']:<15.2f} | {result['dbm']:<12.1f} | {result['sinr_db']:<10.1f} | {result['rssi_level']:<5} |")
+        print("└" + "─" * 98 + "┘")
 
         if best_site and best_rssi > 0:
             print(
                 f"  -> Best signal from Subsite '{best_subsite.alias}' (Site '{best_site.alias}' in Zone {best_zone_id}) with RSSI Level {best_rssi}")
             if unit.state == UnitState.SEARCHING_FOR_SITE:
                 print(f"  -> Attempting registration on Site '{best_site.alias}'...")
+                self._leave_current_site(unit)
                 unit.current_site = best_site
+                unit.current_zone_id = best_zone_id
                 # The ZoneController for the BEST site must handle the registration.
-                best_zone_controller = self  # In a multi-controller setup, you'd look up the controller for best_zone_id
                 reg_request = UnitRegistrationRequest(unit_id=unit.id, site_id=best_site.id)
-                best_zone_controller.schedule_event(0.1, reg_request)
+                self.send_to_zone(best_zone_id, 0.1, reg_request)
         else:
+            self._leave_current_site(unit)
             unit.state = UnitState.FAILED
             print(f"  -> FAILED. No usable sites found in range.")
+            episode = self.radio_system.rehoming.unit_stranded(unit.id, self.current_time)
+            if episode:
+                print(f"  [REHOME] Recovery of Site {episode.site_id} (Zone {episode.zone_id}) complete.")
+
+    def _scan_sites(self, unit: Unit, targets, scan_results: list, scanned: set) -> tuple:
+        """Measures every subsite of the usable target sites. Returns (rssi level, site, subsite, zone id) of the best."""
+        best_site, best_subsite, best_rssi, best_zone_id = None, None, -1, None
+        for zone_id, site in targets:
+            ban_tuple = (zone_id, site.id)
+            if site.status != SiteStatus.ONLINE or ban_tuple in scanned:
+                continue
+            scanned.add(ban_tuple)
+            if ban_tuple in unit.banned_sites:
+                print(f"  [Debug] Skipping Site {site.id} (Zone {zone_id}) - Currently banned for this unit.")
+                continue
+
+            distances = [get_distance(unit.location, subsite.location) for subsite in site.subsites]
+            signals = self.radio_system.propagation.measure(unit.location, site.subsites, distances)
+            sinrs = self.radio_system.frequencies.sinr(zone_id, site, unit.location, signals)
+            for subsite, dist_km, (dbm, _), (sinr_db, rssi_level) in zip(site.subsites, distances, signals, sinrs):
+                scan_results.append({"zone_id": zone_id, "site_alias": site.alias, "subsite_alias": subsite.alias,
+                                     "distance_km": dist_km, "dbm": dbm, "sinr_db": sinr_db,
+                                     "rssi_level": rssi_level})
+                if rssi_level > best_rssi:
+                    best_rssi, best_site, best_subsite, best_zone_id = rssi_level, site, subsite, zone_id
+        return best_rssi, best_site, best_subsite, best_zone_id
 
     def handle_unit_unban_from_site_command(self, command: UnitUnbanFromSiteCommand):
         """Removes a site from a unit's ban list."""
@@ -180,35 +521,160 @@ class ZoneController:
     def publish_event(self, event: Event):
         self.schedule_event(0, event)
 
+    def add_event_source(self, source):
+        """Attaches a lazy event source. It must provide feed(controller) and an exhausted flag."""
+        self.event_sources.append(source)
+
     def tick(self, delta_time: float):
         self.current_time += delta_time
-        while self.event_queue and self.event_queue[0][0] <= self.current_time:
-            execution_time, priority, counter, event = heapq.heappop(self.event_queue)
-            self.event_bus.publish(event)
+        self.radio_system.feed.now = self.current_time
+        if self.radio_system.store:
+            self.radio_system.store.advance(self.current_time)
+        if self._tick_calls:
+            self._run_tick_calls()
+        if self._inbox:
+            self._drain_inbox()
+        if self.event_sources:
+            for source in self.event_sources:
+                source.feed(self)
+            self.event_sources = [source for source in self.event_sources if not source.exhausted]
+        if self._deferred:
+            self._readmit_deferred()
+        if self.tick_budget is not None or self._lane_count:
+            self._run_lanes()
+        else:
+            self._run_due_events()
         self._service_blocked_calls()
+        if self.router:
+            self.router.flush()
 
-    def handle_unit_registration_request(self, packet: UnitRegistrationRequest):
-        """Handles a U_REG_REQ packet, including failure and banning logic."""
-        unit = self.radio_system.get_unit(packet.unit_id)
-        site = self.radio_system.get_site(packet.site_id, self.zone_id)
-        response_status = None
+    def _run_due_events(self):
+        """Dispatches every due event in time order."""
+        recorder = self.trace_recorder
+        while True:
+            entry = self._pop_due()
+            if entry is None:
+                break
+            execution_time, priority, counter, event = entry
+            if recorder:
+                recorder.record(execution_time, self.zone_id, event)
+            event_type = type(event)
+            if not self.event_bus.has_batch_subscribers(event_type):
+                self.event_bus.publish(event)
+                continue
+            # Gather the run of due events of the same type that would have been dispatched
+            # back to back anyway, and hand them to the batch handler in heap order.
+            batch = [event]
+            while self._peek_due_type() is event_type:
+                execution_time, priority, counter, event = self._pop_due()
+                if recorder:
+                    recorder.record(execution_time, self.zone_id, event)
+                batch.append(event)
+            self.event_bus.publish_batch(batch)
+
+    def _pull_due_into_lanes(self):
+        for queue in (self.emergency_queue, self.event_queue):
+            while queue and queue[0][0] <= self.current_time:
+                entry = heapq.heappop(queue)
+                if entry[2] in self._cancelled:
+                    self._cancelled.discard(entry[2])
+                    continue
+                lane = self._lanes.get(entry[1])
+                if lane is None:
+                    lane = self._lanes[entry[1]] = deque()
+                    self._lane_order = sorted(self._lanes)
+                lane.append(entry)
+                self._lane_count += 1
+
+    def _run_lanes(self):
+        """
+        Dispatches due events by priority lane: the highest non-empty lane always goes
+        next, so SYSTEM and EMERGENCY work due later in the tick still overtakes queued
+        lower-priority work. Once the tick budget is spent, lower lanes wait for the
+        next tick; SYSTEM and EMERGENCY lanes are exempt and always finish.
+        """
+        deadline = time.perf_counter() + self.tick_budget if self.tick_budget is not None else None
+        lane_lag = self.queue_metrics.lane_lag
+        recorder = self.trace_recorder
+        while True:
+            self._pull_due_into_lanes()
+            priority = next((p for p in self._lane_order if self._lanes[p]), None)
+            if priority is None:
+                return
+            if (deadline is not None and priority not in OVERLOAD_EXEMPT_PRIORITIES
+                    and time.perf_counter() >= deadline):
+                self.queue_metrics.budget_exhausted += 1
+                return
+            lane = self._lanes[priority]
+            batch = []
+            while lane:
+                entry = lane[0]
+                if batch and (type(entry[3]) is not type(batch[0])
+                              or not self.event_bus.has_batch_subscribers(type(batch[0]))):
+                    break
+                lane.popleft()
+                self._lane_count -= 1
+                if entry[2] in self._cancelled:
+                    self._cancelled.discard(entry[2])
+                    continue
+                self._forget(entry)
+                stats = lane_lag.get(priority)
+                if stats is None:
+                    stats = lane_lag[priority] = RunningStats()
+                stats.add(self.current_time - entry[0])
+                if recorder:
+                    recorder.record(entry[0], self.zone_id, entry[3])
+                batch.append(entry[3])
+            if not batch:
+                continue
+            if len(batch) == 1 and not self.event_bus.has_batch_subscribers(type(batch[0])):
+                self.event_bus.publish(batch[0])
+            else:
+                self.event_bus.publish_batch(batch)
 
-        if not (unit and site):
+    def handle_unit_registration_requests(self, packets: List[UnitRegistrationRequest]):
+        """
+        Handles a run of U_REG_REQ packets due in the same tick, e.g. a re-registration
+        storm after a site restart. Each packet gets exactly the outcome it would have
+        had on its own, in the same order, but lookups, registration-table updates and
+        response scheduling are done once for the whole batch.
+        """
+        zone = self.radio_system.get_zone(self.zone_id)
+        if not zone:
             return
+        units = {}
+        accepted_by_site = {}
+        responses = []
+        response_time = self.current_time + 0.1
 
-        if len(site.registrations) >= 1000:
-            response_status = RegistrationStatus.FAILED_SYSTEM_FULL
-        else:
-            site.registrations.append(unit)
-            response_status = RegistrationStatus.REG_ACCEPT
+        for packet in packets:
+            unit = units.get(packet.unit_id)
+            if unit is None:
+                unit = units[packet.unit_id] = self.radio_system.get_unit(packet.unit_id)
+            site = zone.sites.get(packet.site_id)
+            if not (unit and site):
+                continue
 
-        response_packet = UnitRegistrationResponse(
-            status=response_status,
-            unit_id=unit.id,
-            site_id=site.id,
-            zone_id=self.zone_id
-        )
-        self.schedule_event(0.1, response_packet)
+            accepted = accepted_by_site.setdefault(site.id, [])
+            if len(site.registrations) + len(accepted) >= MAX_SITE_REGISTRATIONS:
+                response_status = RegistrationStatus.FAILED_SYSTEM_FULL
+            else:
+                # A (re-)registration clears any previous affiliation; the unit re-affiliates afterwards.
+                self.radio_system.affiliations.remove(unit.id)
+                accepted.append(unit)
+                response_status = RegistrationStatus.REG_ACCEPT
+
+            responses.append((response_time, UnitRegistrationResponse(
+                status=response_status,
+                unit_id=unit.id,
+                site_id=site.id,
+                zone_id=self.zone_id
+            )))
+
+        for site_id, accepted in accepted_by_site.items():
+            zone.sites[site_id].registrations.extend(accepted)
+            self._record_registrations(self.zone_id, site_id, accepted)
+        self.schedule_batch(responses)
 
     def handle_unit_registration_response(self, packet: UnitRegistrationResponse):
         """
@@ -219,6 +685,18 @@ class ZoneController:
         if not unit:
             return
 
+        if packet.status == RegistrationStatus.REG_ACCEPT:
+            self.registration_metrics.accepted += 1
+            if unit.powered_on_at is not None:
+                self.registration_metrics.registration_time.add(self.current_time - unit.powered_on_at)
+                unit.powered_on_at = None
+            episode = self.radio_system.rehoming.unit_registered(unit.id, self.current_time)
+            if episode:
+                print(f"  [REHOME] Recovery of Site {episode.site_id} (Zone {episode.zone_id}) complete in "
+                      f"{episode.time_to_recover:.2f}s: {episode.rehomed}/{episode.total} units re-homed.")
+        else:
+            self.registration_metrics.failed += 1
+
         next_isp = unit.handle_registration_response(packet)
 
         if next_isp:
@@ -233,7 +711,7 @@ class ZoneController:
         """
         Handles a GRP_AFF_REQ packet and schedules the appropriate P25 response.
         """
-        unit = self.radio_system.get_unit(packet.unit_id, self.zone_id)
+        unit = self.radio_system.get_unit(packet.unit_id)  # May be roaming from another zone
         talkgroup = self.radio_system.get_talkgroup(packet.talkgroup_id, self.zone_id)
         response_status = AffiliationStatus.ACCEPTED
 
@@ -265,9 +743,15 @@ class ZoneController:
 
     def handle_group_affiliation_response(self, packet: GroupAffiliationResponse):
         """Delivers the affiliation response OSP to the correct unit."""
-        unit = self.radio_system.get_unit(packet.unit_id, self.zone_id)
+        unit = self.radio_system.get_unit(packet.unit_id)
         if unit:
             unit.handle_affiliation_response(packet)
+            if packet.status == AffiliationStatus.ACCEPTED and unit.current_site:
+                self.registration_metrics.affiliation_accepts += 1
+                self.radio_system.affiliations.affiliate(unit, packet.talkgroup_id, self.zone_id, unit.current_site)
+            else:
+                self.registration_metrics.affiliation_failures += 1
+                self.radio_system.affiliations.remove(unit.id)
             if unit.state == UnitState.SEARCHING_FOR_SITE:
                 self.publish_event(UnitScanForSitesCommand(unit_id=unit.id))
 
@@ -276,7 +760,8 @@ class ZoneController:
         unit = self.radio_system.get_unit(command.unit_id, self.zone_id)
         talkgroup = self.radio_system.get_talkgroup(command.talkgroup_id, self.zone_id)
 
-        if not (unit and talkgroup and unit.state == UnitState.IDLE_AFFILIATED):
+        # A unit already in a call may key up again, e.g. to answer during hangtime.
+        if not (unit and talkgroup and unit.state in (UnitState.IDLE_AFFILIATED, UnitState.IN_CALL)):
             print(f"ZoneController: Call request from Unit {command.unit_id} denied (invalid state or objects).")
             return
 
@@ -298,37 +783,379 @@ class ZoneController:
             priority=final_priority
         )
         print(f"  -> Final call priority for TG {talkgroup.alias}: {final_priority.name}")
-        self.publish_event(call_request_packet)
+        # The ISP goes to the zone serving the unit's current site, which may not be its home zone.
+        serving_zone_id = unit.current_zone_id or self.zone_id
+        self.send_to_zone(serving_zone_id, 0, call_request_packet)
+        self.send_to_zone(serving_zone_id, command.duration,
+                          UnitEndCallCommand(unit_id=unit.id, talkgroup_id=command.talkgroup_id))
 
     def handle_group_voice_request(self, packet: GroupVoiceServiceRequest):
         """Handles a GRP_V_REQ packet, initiating a call."""
-        unit = self.radio_system.get_unit(packet.unit_id, self.zone_id)
+        unit = self.radio_system.get_unit(packet.unit_id)
         talkgroup = self.radio_system.get_talkgroup(packet.talkgroup_id, self.zone_id)
-        site = unit.current_site
+        site = unit.current_site if unit else None
 
         if not all([unit, talkgroup, site]):
             print(f"ZoneController: Invalid call request from unit {packet.unit_id}")
             return
 
-        if site.has_available_voice_channel():
-            print(f"ZoneController: Granting call for Unit {unit.id} on TG {talkgroup.alias}.")
-        else:
+        existing_call = self.calls_by_talkgroup.get(talkgroup.id)
+        if existing_call:
+            # New talker on a call that is still up (in hangtime): only the talker's own site may need a channel.
+            if not self._add_talker_site(existing_call, unit, packet.priority):
+                print(f"ZoneController: No channel for Call {existing_call.id} on Unit {unit.id}'s site. Queuing.")
+                heapq.heappush(self.call_busy_queue,
+                               (packet.priority, self.current_time, next(self._busy_counter), packet))
+                return
+            previous_talker = existing_call.initiating_unit
+            if previous_talker is not unit and previous_talker.state == UnitState.IN_CALL:
+                previous_talker.state = UnitState.IDLE_AFFILIATED
+            existing_call.initiating_unit = unit
+            existing_call.transmission_count += 1
+            if packet.priority < existing_call.priority:
+                existing_call.priority = packet.priority  # e.g. an emergency declared on a call in hangtime
+            if packet.priority == EventPriority.EMERGENCY:
+                existing_call.alarm_at = self._pending_alarms.pop((unit.id, talkgroup.id), None)
+            self.call_metrics.continuations += 1
+            print(f"ZoneController: Unit {unit.id} continues Call {existing_call.id} on TG {talkgroup.alias}.")
+            self._send_call_grants(existing_call)
+            return
+
+        self.call_metrics.requests += 1
+        if not self._try_setup_call(packet, unit, talkgroup, requested_at=self.current_time):
             print(f"ZoneController: No channels available. Queuing call for Unit {unit.id} on TG {talkgroup.alias}.")
-            heapq.heappush(self.call_busy_queue, (packet.priority, self.current_time, packet))
+            self.call_metrics.queued += 1
+            heapq.heappush(self.call_busy_queue, (packet.priority, self.current_time, next(self._busy_counter), packet))
+
+    def _add_talker_site(self, call: RadioCall, unit: Unit, priority: EventPriority) -> bool:
+        """Puts the call on a new talker's site if it is not there yet. False if no channel could be had."""
+        key = (unit.current_zone_id or self.zone_id, unit.current_site.id)
+        if key in call.channels:
+            return True
+        site = unit.current_site
+        if site.status != SiteStatus.ONLINE:
+            return False
+        modes = self._site_call_modes(unit, call.talkgroup, key)
+        if not any(site.has_available_voice_channel(tdma) for tdma in modes):
+            if not (priority in PREEMPTING_PRIORITIES and self._preempt_calls([(key, site, modes)], priority)):
+                return False
+        channel, slot = next(filter(None, (site.assign_voice_channel(call, tdma, self.current_time) for tdma in modes)))
+        call.channels[key] = channel.id
+        if slot is not None:
+            call.slots[key] = slot
+        call.involved_sites.append(site)
+        if not call.slots:
+            call.mode = CallMode.FDMA
+        elif len(call.slots) < len(call.channels):
+            call.mode = CallMode.MIXED
+        print(f"ZoneController: Call {call.id} extended to Site {site.id} (Zone {key[0]}) for Unit {unit.id}.")
+        return True
+
+    def _involved_site_keys(self, unit: Unit, talkgroup: Talkgroup) -> List[Tuple[int, int]]:
+        """The talking unit's site plus every site with units affiliated to the talkgroup."""
+        keys = self.radio_system.affiliations.involved_site_keys(self.zone_id, talkgroup.id)
+        own_key = (unit.current_zone_id or self.zone_id, unit.current_site.id)
+        if own_key not in keys:
+            keys.append(own_key)
+        return keys
+
+    def _try_setup_call(self, packet: GroupVoiceServiceRequest, unit: Unit, talkgroup: Talkgroup,
+                        requested_at: float) -> bool:
+        """Reserves a voice channel on every involved site and grants the call, all or nothing."""
+        plan = []  # (site key, site, TDMA preferences to try in order)
+        for zone_id, site_id in self._involved_site_keys(unit, talkgroup):
+            site = self.radio_system.get_site(site_id, zone_id)
+            if site and site.status == SiteStatus.ONLINE:
+                plan.append(((zone_id, site_id), site, self._site_call_modes(unit, talkgroup, (zone_id, site_id))))
+        if not plan:
+            return False
+        busy_sites = [entry for entry in plan
+                      if not any(entry[1].has_available_voice_channel(tdma) for tdma in entry[2])]
+        if busy_sites and not (packet.priority in PREEMPTING_PRIORITIES
+                               and self._preempt_calls(busy_sites, packet.priority)):
+            return False
+
+        call = RadioCall(
+            id=next(self._call_ids),
+            initiating_unit=unit,
+            talkgroup=talkgroup,
+            involved_sites=[site for _, site, _ in plan],
+            priority=packet.priority,
+            zone_id=self.zone_id,
+            requested_at=requested_at,
+            alarm_at=(self._pending_alarms.pop((unit.id, talkgroup.id), None)
+                      if packet.priority == EventPriority.EMERGENCY else None)
+        )
+        for key, site, modes in plan:
+            channel, slot = next(filter(None, (site.assign_voice_channel(call, tdma, self.current_time) for tdma in modes)))
+            call.channels[key] = channel.id
+            if slot is not None:
+                call.slots[key] = slot
+        if not call.slots:
+            call.mode = CallMode.FDMA
+        elif len(call.slots) < len(call.channels):
+            call.mode = CallMode.MIXED  # TDMA on some sites, FDMA on sites with legacy members
+
+        call.start()
+        if self.radio_system.feed.subscriptions:
+            self.radio_system.feed.publish_call(call)
+        self.active_calls[call.id] = call
+        self.calls_by_talkgroup[talkgroup.id] = call
+        self.call_metrics.grants += 1
+        print(f"ZoneController: Granting Call {call.id} for Unit {unit.id} on TG {talkgroup.alias} "
+              f"across {len(plan)} site(s) ({call.mode.value}).")
+        self._send_call_grants(call)
+        self.schedule_event(GRANT_UPDATE_INTERVAL_SECONDS, CallGrantUpdateRequest(call_id=call.id))
+        return True
+
+    def _site_call_modes(self, unit: Unit, talkgroup: Talkgroup, site_key: Tuple[int, int]) -> Tuple[bool, ...]:
+        """
+        Whether a call uses TDMA on one site, as preferences to try in order. A MIXED
+        talkgroup goes TDMA only where every affiliated member (and the talker) can
+        decode it, and falls back to FDMA if the site has no free TDMA slot.
+        """
+        if talkgroup.mode == CallMode.TDMA:
+            return (True,)
+        if talkgroup.mode == CallMode.FDMA:
+            return (False,)
+        if (unit.current_zone_id or self.zone_id, unit.current_site.id) == site_key and not unit.tdma_capable:
+            return (False,)
+        for unit_id in self.radio_system.affiliations.units(self.zone_id, talkgroup.id, site_key):
+            member = self.radio_system.get_unit(unit_id)
+            if member and not member.tdma_capable:
+                return (False,)
+        return (True, False)
+
+    def _preempt_calls(self, busy_sites: List[Tuple[Tuple[int, int], Site, Tuple[bool, ...]]],
+                       priority: EventPriority) -> bool:
+        """
+        Frees room on each busy site by ending its lowest-priority call whose slot(s)
+        would fit the new call, all or nothing. Only calls of strictly lower priority
+        can be preempted.
+        """
+        victims = []
+        for key, site, modes in busy_sites:
+            def fits(calls):
+                released = [(call.channels[key], call.slots.get(key)) for call in calls if key in call.channels]
+                return any(site.channel_allocator.can_assign_after_release(tdma, released) for tdma in modes)
+            if fits(victims):
+                continue  # A victim chosen for another site also frees this one
+            candidates = {id(call): call for call in site.assigned_voice_channels.values()
+                          if call.priority > priority and all(call is not victim for victim in victims)}
+            # Lowest priority first, newest among equals.
+            ordered = sorted(candidates.values(), key=lambda call: (call.priority, call.requested_at), reverse=True)
+            victim = next((call for call in ordered if fits(victims + [call])), None)
+            if victim is None:
+                return False
+            victims.append(victim)
+        for call in victims:
+            owner = self.router.controller_for(call.zone_id) if self.router else None
+            print(f"ZoneController: Preempting Call {call.id} ({call.priority.name}) on TG {call.talkgroup.alias} "
+                  f"for a {priority.name} call.")
+            (owner or self)._end_call(call)
+            self.call_metrics.preemptions += 1
+        return True
+
+    def _send_call_grants(self, call: RadioCall):
+        for (zone_id, site_id), channel_id in call.channels.items():
+            grant = GroupVoiceChannelGrant(
+                unit_id=call.initiating_unit.id,
+                talkgroup_id=call.talkgroup.id,
+                channel_id=channel_id,
+                site_id=site_id,
+                zone_id=zone_id,
+                call_id=call.id
+            )
+            self.schedule_event(0.1, grant)
+
+    def handle_unit_emergency_alarm_command(self, command: UnitEmergencyAlarmCommand):
+        """Handles a unit pressing its emergency button."""
+        unit = self.radio_system.get_unit(command.unit_id)
+        if not (unit and unit.current_site):
+            print(f"ZoneController: Emergency alarm from Unit {command.unit_id} not sent (unit not on a site).")
+            return
+        talkgroup_id = command.talkgroup_id
+        if talkgroup_id is None:
+            talkgroup = unit.affiliated_talkgroup or unit.selected_talkgroup
+            if not talkgroup:
+                print(f"ZoneController: Emergency alarm from Unit {unit.id} not sent (no talkgroup).")
+                return
+            talkgroup_id = talkgroup.id
+        serving_zone_id = unit.current_zone_id or self.zone_id
+        self.send_to_zone(serving_zone_id, 0, EmergencyAlarmRequest(unit_id=unit.id, talkgroup_id=talkgroup_id,
+                                                                    sent_at=self.current_time))
+        self.send_to_zone(serving_zone_id, command.duration,
+                          UnitEndCallCommand(unit_id=unit.id, talkgroup_id=talkgroup_id))
+
+    def handle_emergency_alarm_request(self, packet: EmergencyAlarmRequest):
+        """
+        Handles an EMRG_ALRM_REQ: acknowledges it, alerts the consoles monitoring the
+        talkgroup and sets up the emergency call right away instead of queuing a
+        GRP_V_REQ behind other traffic. Lower-priority calls are preempted if needed.
+        """
+        unit = self.radio_system.get_unit(packet.unit_id)
+        talkgroup = self.radio_system.get_talkgroup(packet.talkgroup_id, self.zone_id)
+        if not (unit and talkgroup and unit.current_site):
+            print(f"ZoneController: Invalid emergency alarm from Unit {packet.unit_id}.")
+            return
+
+        print(f"  [EMERGENCY] Zone {self.zone_id}: Alarm from Unit {unit.id} ({unit.alias}) on TG {talkgroup.alias}.")
+        self.call_metrics.emergency_alarms += 1
+        self.schedule_event(0.1, AcknowledgeResponseFne(unit_id=unit.id, service_type=EMERGENCY_ALARM_SERVICE_TYPE))
+        for console in self.radio_system.get_zone(self.zone_id).consoles.values():
+            if any(tg.id == talkgroup.id for tg in console.affiliated_talkgroups):
+                self.schedule_event(0, ConsoleEmergencyNotification(console_id=console.id, unit_id=unit.id,
+                                                                    talkgroup_id=talkgroup.id))
+
+        # Alarm to grant counts from the unit's send, so ISP queueing and inter-zone routing are included.
+        self._pending_alarms[(unit.id, talkgroup.id)] = (self.current_time if packet.sent_at is None
+                                                         else packet.sent_at)
+        self.handle_group_voice_request(GroupVoiceServiceRequest(unit_id=unit.id, talkgroup_id=talkgroup.id,
+                                                                 priority=EventPriority.EMERGENCY))
+
+    def handle_acknowledge_response_fne(self, packet: AcknowledgeResponseFne):
+        """Delivers an ACK_RSP_FNE to its unit."""
+        print(f"  -> Unit {packet.unit_id}: ACK_RSP_FNE received for service 0x{packet.service_type:02X}.")
+
+    # --- Packet Data (SNDCP) ---
+    def handle_unit_send_data_command(self, command: UnitSendDataCommand):
+        """Queues a data burst at the zone serving the unit, asking for a data channel if needed."""
+        unit = self.radio_system.get_unit(command.unit_id)
+        if not (unit and unit.current_site and unit.state in (UnitState.IDLE_REGISTERED, UnitState.IDLE_AFFILIATED,
+                                                                 UnitState.IN_CALL)):
+            print(f"ZoneController: Data from Unit {command.unit_id} dropped (not registered).")
+            return
+        serving_zone_id = unit.current_zone_id or self.zone_id
+        if serving_zone_id != self.zone_id:
+            self.send_to_zone(serving_zone_id, 0, command)
+            return
+        request = self.data_service.send(unit, command.payload_bytes)
+        if request:
+            self.schedule_event(0, request)
+
+    def handle_sndcp_data_channel_request(self, packet: SndcpDataChannelRequest):
+        """Processes an SN-DATA_CHN_REQ on the unit's current site."""
+        unit = self.radio_system.get_unit(packet.unit_id)
+        grant = self.data_service.grant(unit) if unit else None
+        if grant is None:
+            print(f"ZoneController: Data channel request from Unit {packet.unit_id} denied (no data channel).")
+            return
+        self.schedule_event(0.1, grant)
+
+    def handle_sndcp_data_channel_grant(self, packet: SndcpDataChannelGrant):
+        """Delivers an SN-DATA_CHN_GNT; the unit's queued bursts start on the data channel."""
+        if self.data_service.open_session(packet):
+            print(f"  -> Unit {packet.unit_id}: Data session on Site {packet.site_id} Channel {packet.channel_id}.")
+
+    def handle_console_emergency_notification(self, event: ConsoleEmergencyNotification):
+        console = self.radio_system.get_zone(self.zone_id).consoles.get(event.console_id)
+        if console:
+            console.active_emergencies.append((event.unit_id, event.talkgroup_id))
+            print(f"  [EMERGENCY] Console {console.id} ({console.alias}): Unit {event.unit_id} declared an "
+                  f"emergency on TG {event.talkgroup_id}.")
+
+    def handle_group_voice_channel_grant(self, packet: GroupVoiceChannelGrant):
+        """Delivers a GRP_V_CH_GRANT. The first delivery completes call setup."""
+        call = self.active_calls.get(packet.call_id)
+        if not call:
+            return
+        if call.granted_at is None:
+            call.granted_at = self.current_time
+            self.call_metrics.setup_latency.add(call.setup_latency)
+        if call.alarm_at is not None:
+            self.call_metrics.alarm_to_grant.add(self.current_time - call.alarm_at)
+            call.alarm_at = None
+        talker = self.radio_system.get_unit(packet.unit_id)
+        if talker and talker.state == UnitState.IDLE_AFFILIATED:
+            talker.state = UnitState.IN_CALL
+
+    def handle_call_grant_update_request(self, event: CallGrantUpdateRequest):
+        """Broadcasts GRP_V_CH_GRANT_UPDT on every involved site while the call is up."""
+        call = self.active_calls.get(event.call_id)
+        if not call:
+            return
+        for (zone_id, site_id), channel_id in call.channels.items():
+            self.schedule_event(0, GroupVoiceChannelGrantUpdate(
+                talkgroup_id=call.talkgroup.id,
+                channel_id=channel_id,
+                site_id=site_id,
+                zone_id=zone_id,
+                call_id=call.id
+            ))
+        self.schedule_event(GRANT_UPDATE_INTERVAL_SECONDS, event)
+
+    def handle_unit_end_call_command(self, command: UnitEndCallCommand):
+        """PTT release: the call enters hangtime and is torn down if nobody keys up."""
+        call = self.calls_by_talkgroup.get(command.talkgroup_id)
+        if not call or call.initiating_unit.id != command.unit_id:
+            return
+        unit = call.initiating_unit
+        if unit.state == UnitState.IN_CALL:
+            unit.state = UnitState.IDLE_AFFILIATED
+        hangtime_seconds = call.talkgroup.hangtime / 1000.0
+        print(f"  -> Unit {unit.id} ({unit.alias}): PTT released on Call {call.id}. Hangtime {hangtime_seconds:.1f}s.")
+        self.schedule_event(hangtime_seconds, CallTeardownRequest(call_id=call.id,
+                                                                  transmission_count=call.transmission_count))
+
+    def handle_call_teardown_request(self, event: CallTeardownRequest):
+        call = self.active_calls.get(event.call_id)
+        if not call or call.transmission_count != event.transmission_count:
+            return  # Already ended, or someone keyed up during hangtime
+        self._end_call(call)
+
+    def _end_call(self, call: RadioCall):
+        """Ends a call and releases its channels on every involved site."""
+        for (zone_id, site_id), channel_id in call.channels.items():
+            site = self.radio_system.get_site(site_id, zone_id)
+            if site:
+                site.release_voice_channel(channel_id, call.slots.get((zone_id, site_id)), self.current_time)
+        if call.initiating_unit.state == UnitState.IN_CALL:
+            call.initiating_unit.state = UnitState.IDLE_AFFILIATED
+        call.end()
+        if self.radio_system.feed.subscriptions:
+            self.radio_system.feed.publish_call(call)
+        self.active_calls.pop(call.id, None)
+        if self.calls_by_talkgroup.get(call.talkgroup.id) is call:
+            del self.calls_by_talkgroup[call.talkgroup.id]
+        self.call_metrics.ended += 1
+        self._channels_released = True
 
     def handle_control_channel_establish(self, event: ControlChannelEstablishRequest):
         """Handles the internal request to create the CC call."""
         print(
             f"ZoneController (Zone {self.zone_id}): Establishing permanent CC for Site {event.site_id} on Channel {event.channel_id}.")
+        site = self.radio_system.get_site(event.site_id, self.zone_id)
+        if site:
+            self.schedule_batch([(self.current_time, broadcast) for broadcast in
+                                 self.radio_system.neighbors.adjacent_status_broadcasts(self.zone_id, site)])
+
+    def _announce_to_neighbors(self, site: Site):
+        """Re-sends ADJ_STS_BCST about a site whose status changed on every neighbor's control channel."""
+        for neighbor_zone_id, neighbor in self.radio_system.neighbors.neighbors(self.zone_id, site.id):
+            if neighbor.status != SiteStatus.ONLINE:
+                continue
+            broadcast = AdjacentStatusBroadcast(
+                zone_id=neighbor_zone_id,
+                site_id=neighbor.id,
+                adjacent_zone_id=self.zone_id,
+                adjacent_site_id=site.id,
+                channel_id=site.control_channel.id if site.control_channel else 0,
+                active=site.status == SiteStatus.ONLINE
+            )
+            self.send_to_zone(neighbor_zone_id, 0, broadcast)
 
     def initialize_system(self):
         """Initializes the zone this controller manages."""
         print(f"\n--- Initializing Zone {self.zone_id} ---")
-        zone = self.radio_system.get_zone(self.zone_id)
-        if not zone:
+        if self.zone_id not in self.radio_system.config.wacn.zones:
             print(f"Error: Zone {self.zone_id} not found.")
             return
+        if self.radio_system.lazy:
+            print(f"--- Zone {self.zone_id} Initialization Deferred Until First Use ---\n")
+        # In lazy mode this runs when the zone is first accessed; otherwise right away.
+        self.radio_system.on_zone_materialized(self.zone_id, self._initialize_zone)
 
+    def _initialize_zone(self, zone: RFSS):
         for site in zone.sites.values():
             control_channel_event = site.initialize(zone_id=self.zone_id)
             if control_channel_event:
@@ -340,12 +1167,261 @@ class ZoneController:
                 if site.status == SiteStatus.ONLINE:
                     site.registrations.append(console)
             print(f"  -> Console {console.id} ({console.alias}): Powered ON and registered on all online sites.")
+        self.broadcasts.start()
         print(f"--- Zone {self.zone_id} Initialization Complete ---\n")
 
+    def handle_site_fail_command(self, command: SiteFailCommand):
+        """
+        Takes a site down. Only the units in its registration table are moved: each
+        re-scans after a random delay within the jitter window, so the surviving
+        sites' control channels see a spread-out wave instead of one tick's burst.
+        """
+        site = self.radio_system.get_site(command.site_id, self.zone_id)
+        if not site:
+            print(f"Error: Site {command.site_id} not found in Zone {self.zone_id}.")
+            return
+        if site.status != SiteStatus.ONLINE:
+            print(f"Warning: Site {site.id} (Zone {self.zone_id}) is already {site.status.value}.")
+            return
+
+        site.status = SiteStatus.FAILED
+        self._announce_to_neighbors(site)
+        self._drop_site_from_calls((self.zone_id, site.id))
+        displaced = [registered for registered in site.registrations if not isinstance(registered, Console)]
+        self._record_deregistrations(self.zone_id, site.id, displaced)
+        site.registrations.clear()
+        jitter = REHOME_JITTER_SECONDS if command.jitter is None else command.jitter
+        print(f"ZoneController (Zone {self.zone_id}): Site {site.id} ({site.alias}) FAILED. "
+              f"Re-homing {len(displaced)} units over {jitter:.1f}s.")
+        self.radio_system.rehoming.site_failed(self.zone_id, site.id, self.current_time,
+                                               [unit.id for unit in displaced])
+        for unit in displaced:
+            self.rescan_unit(unit, random.uniform(0.0, jitter))
+
+    def handle_site_restore_command(self, command: SiteRestoreCommand):
+        """Brings a failed site back. Units return to it only when they next re-scan."""
+        site = self.radio_system.get_site(command.site_id, self.zone_id)
+        if not site:
+            print(f"Error: Site {command.site_id} not found in Zone {self.zone_id}.")
+            return
+        if site.status == SiteStatus.ONLINE:
+            print(f"Warning: Site {site.id} (Zone {self.zone_id}) is already online.")
+            return
+        control_channel_event = site.initialize(zone_id=self.zone_id)
+        if control_channel_event:
+            self.publish_event(control_channel_event)
+        if site.status == SiteStatus.ONLINE:
+            site.registrations.extend(self.radio_system.get_zone(self.zone_id).consoles.values())
+            self._announce_to_neighbors(site)
+        self.radio_system.rehoming.site_restored(self.zone_id, site.id, self.current_time)
+
+    def _drop_site_from_calls(self, site_key: Tuple[int, int], lost_site: Optional[Site] = None):
+        """
+        Releases a lost site's channels from every call using it; calls left with no site end.
+        Pass the site itself when a config reload has already taken it out of its zone.
+        """
+        lost_site = lost_site or self.radio_system.get_site(site_key[1], site_key[0])
+        controllers = self.router.controllers.values() if self.router else [self]
+        for controller in controllers:
+            for call in list(controller.active_calls.values()):
+                channel_id = call.channels.pop(site_key, None)
+                if channel_id is None:
+                    continue
+                lost_site.release_voice_channel(channel_id, call.slots.pop(site_key, None), self.current_time)
+                call.involved_sites = [site for site in call.involved_sites if site is not lost_site]
+                if not call.channels:
+                    controller._end_call(call)
+
+    def _regrant_stranded_calls(self, site_key: Tuple[int, int], site: Site):
+        """
+        Moves every call whose channel on a reconfigured site left the voice pool (disabled,
+        made control or data_only, or its mode dropped) to a channel that is still valid.
+        A call that finds none loses the site, and ends if it has no other.
+        """
+        controllers = self.router.controllers.values() if self.router else [self]
+        for controller in controllers:
+            for call in list(controller.active_calls.values()):
+                channel_id = call.channels.get(site_key)
+                if channel_id is None or site.channel_allocator.supports(channel_id, call.slots.get(site_key)):
+                    continue
+                slot = call.slots.pop(site_key, None)
+                del call.channels[site_key]
+                site.release_voice_channel(channel_id, slot, self.current_time)
+                modes = (True, False) if slot is not None and call.talkgroup.mode == CallMode.MIXED else (slot is not None,)
+                assigned = next(filter(None, (site.assign_voice_channel(call, tdma, self.current_time)
+                                              for tdma in modes)), None)
+                if assigned:
+                    channel, slot = assigned
+                    call.channels[site_key] = channel.id
+                    if slot is not None:
+                        call.slots[site_key] = slot
+                    controller.schedule_event(0, GroupVoiceChannelGrantUpdate(
+                        talkgroup_id=call.talkgroup.id, channel_id=channel.id, site_id=site_key[1],
+                        zone_id=site_key[0], call_id=call.id))
+                    print(f"ZoneController: Call {call.id} moved from Ch{channel_id} to Ch{channel.id} "
+                          f"on Site {site_key[1]} (Zone {site_key[0]}) after a reload.")
+                else:
+                    call.involved_sites = [involved for involved in call.involved_sites if involved is not site]
+                    print(f"ZoneController: Call {call.id} lost Site {site_key[1]} (Zone {site_key[0]}): "
+                          f"Ch{channel_id} left the voice pool and no channel is free.")
+                    if not call.channels:
+                        controller._end_call(call)
+                        continue
+                if not call.slots:
+                    call.mode = CallMode.FDMA
+                elif len(call.slots) < len(call.channels):
+                    call.mode = CallMode.MIXED
+                else:
+                    call.mode = CallMode.TDMA
+
+    def apply_config_delta(self, delta: 'ConfigDelta'):
+        """
+        Acts on a live config reload for this zone: re-initializes only the changed
+        sites and moves only the units whose site went away or changed underneath them.
+        """
+        zone = self.radio_system.get_zone(self.zone_id)
+        for change in delta.sites:
+            if change.zone_id != self.zone_id:
+                continue
+            site = change.site
+            previous_control_channel = site.control_channel.id if site.control_channel else None
+            if not change.removed:
+                control_channel_event = site.initialize(zone_id=self.zone_id)
+                if control_channel_event:
+                    self.publish_event(control_channel_event)
+            moved = (change.removed or change.coverage_changed or site.status != SiteStatus.ONLINE
+                     or site.control_channel.id != previous_control_channel)
+            if change.removed or site.status != SiteStatus.ONLINE:
+                self._drop_site_from_calls((self.zone_id, site.id), site)
+            else:
+                self._regrant_stranded_calls((self.zone_id, site.id), site)
+            for registered in list(site.registrations):
+                if isinstance(registered, Console):
+                    if moved:
+                        site.deregister(registered)
+                elif moved:
+                    self.rescan_unit(registered)
+            if site.status == SiteStatus.ONLINE:
+                for console in zone.consoles.values():
+                    if not any(registered is console for registered in site.registrations):
+                        site.registrations.append(console)
+
+        for home_zone_id, unit in delta.removed_units:
+            if home_zone_id == self.zone_id:
+                self._leave_current_site(unit)
+                unit.power_off()
+
+        for unit, talkgroup_id in delta.reaffiliate_units:
+            if unit.current_zone_id == self.zone_id and unit.current_site:
+                unit.state = UnitState.AFFILIATING
+                self.schedule_event(0.1, GroupAffiliationRequest(unit_id=unit.id, talkgroup_id=talkgroup_id))
+
     def _service_blocked_calls(self):
-        """Checks if any blocked calls can now be processed."""
-        pass
+        """Grants queued calls in priority order once channels have been released."""
+        while self.call_busy_queue:
+            priority, queued_time, counter, packet = self.call_busy_queue[0]
+            if self.current_time - queued_time > CALL_QUEUE_TIMEOUT_SECONDS:
+                heapq.heappop(self.call_busy_queue)
+                self.call_metrics.blocked += 1
+                print(f"ZoneController: Queued call for Unit {packet.unit_id} timed out. Call blocked.")
+                continue
+            if not self._channels_released:
+                break
+            unit = self.radio_system.get_unit(packet.unit_id)
+            talkgroup = self.radio_system.get_talkgroup(packet.talkgroup_id, self.zone_id)
+            if not (unit and talkgroup and unit.current_site):
+                heapq.heappop(self.call_busy_queue)
+                continue
+            if talkgroup.id in self.calls_by_talkgroup:
+                # The call is up (another member brought it up, or this talker waits for its own site).
+                if not self._add_talker_site(self.calls_by_talkgroup[talkgroup.id], unit, packet.priority):
+                    break
+                heapq.heappop(self.call_busy_queue)
+                self.call_metrics.queue_wait.add(self.current_time - queued_time)
+                self.handle_group_voice_request(packet)
+                continue
+            if not self._try_setup_call(packet, unit, talkgroup, requested_at=queued_time):
+                break
+            heapq.heappop(self.call_busy_queue)
+            self.call_metrics.queue_wait.add(self.current_time - queued_time)
+        self._channels_released = False
+
+    def get_call_report(self) -> str:
+        """Returns a summary of active calls and call setup metrics."""
+        lines = [f"Active calls: {len(self.active_calls)}  Queued requests: {len(self.call_busy_queue)}"]
+        for call in self.active_calls.values():
+            sites = ", ".join(f"Z{key[0]}/S{key[1]}:Ch{channel_id}" + (f"/TS{call.slots[key]}" if key in call.slots else "")
+                              for key, channel_id in call.channels.items())
+            lines.append(f"  Call {call.id} TG {call.talkgroup.alias} ({call.priority.name}, {call.mode.value}) talker Unit "
+                         f"{call.initiating_unit.id} on {sites}")
+        lines.append(self.call_metrics.report(self.current_time))
+        lines.append(self.registration_metrics.report())
+        return "\n".join(lines)
+
+    def get_channel_report(self) -> str:
+        """Returns voice slot usage and per-channel utilization per site of this zone."""
+        zone = self.radio_system.get_zone(self.zone_id)
+        return "\n".join(f"  Site {site.id} ({site.alias}): {site.channel_allocator.report(self.current_time)}"
+                         for site in zone.sites.values())
+
+    def get_unit_report(self, unit_id: int) -> str:
+        """Returns the state, site, affiliation and bans of one unit."""
+        unit = self.radio_system.get_unit(unit_id)
+        if not unit:
+            return f"  Unit {unit_id} not found."
+        site = f"Zone {unit.current_zone_id} Site {unit.current_site.id} ({unit.current_site.alias})" \
+            if unit.current_site else "none"
+        talkgroup = f"{unit.affiliated_talkgroup.id} ({unit.affiliated_talkgroup.alias})" \
+            if unit.affiliated_talkgroup else "none"
+        bans = ", ".join(f"Z{zone_id}/S{site_id}" for zone_id, site_id in sorted(unit.banned_sites)) or "none"
+        call = next((call for call in self.active_calls.values() if call.initiating_unit is unit), None)
+        lines = [f"  Unit {unit.id} ({unit.alias}): {unit.state.value}, {'TDMA' if unit.tdma_capable else 'FDMA'} capable",
+                 f"  Site: {site}",
+                 f"  Affiliated talkgroup: {talkgroup}",
+                 f"  Banned sites: {bans}"]
+        if call:
+            lines.append(f"  Talking on Call {call.id} (TG {call.talkgroup.alias})")
+        if unit.id in self.data_service.sessions:
+            lines.append(f"  Data session on Channel {self.data_service.sessions[unit.id].channel.channel_id}")
+        return "\n".join(lines)
+
+    def get_units_report(self, tokens: List[str]) -> str:
+        """Answers an `info units` query (see query.py) from the live unit indexes."""
+        try:
+            filters = parse_query(tokens, self.zone_id)
+        except QueryError as e:
+            return f"  {e}"
+        index = self.radio_system.unit_index
+        return format_units(index, index.select(filters))
+
+    def get_broadcast_report(self) -> str:
+        """Returns periodic control channel broadcast counts for this zone."""
+        return self.broadcasts.report()
+
+    def get_interference_report(self) -> str:
+        """Returns this zone's reused frequencies and co-channel interference counts."""
+        return self.radio_system.frequencies.report(self.zone_id)
+
+    def get_data_report(self) -> str:
+        """Returns data session, queueing delay and data channel utilization figures for this zone."""
+        return self.data_service.report()
 
     def get_queue_status(self) -> str:
         """Returns a string summarizing the state of the event and busy queues."""
-        return "Queue status display logic here."
\ No newline at end of file
+        pending = {}
+        for execution_time, priority, counter, event in self.event_queue + self.emergency_queue:
+            if counter not in self._cancelled:
+                pending[EventPriority(priority).name] = pending.get(EventPriority(priority).name, 0) + 1
+        capacity = self.queue_capacity if self.queue_capacity is not None else "unbounded"
+        next_due = min((entry[0] for entry in self.event_queue + self.emergency_queue
+                        if entry[2] not in self._cancelled), default=None)
+        lines = [
+            f"  Event queue: {self.queued_count} pending (capacity {capacity}, policy {self.overload_policy})",
+            f"  By priority: {', '.join(f'{name}={count}' for name, count in sorted(pending.items())) or 'none'}",
+            f"  Next event due: {'-' if next_due is None else f'T={next_due:.2f}s'} (now T={self.current_time:.2f}s)",
+            f"  Deferred: {len(self._deferred)}  Busy queue: {len(self.call_busy_queue)}  Inbox: {len(self._inbox)}",
+            f"  Tick budget: {'unlimited' if self.tick_budget is None else f'{self.tick_budget * 1000:.1f}ms'}  "
+            f"Waiting in lanes: {self._lane_count}",
+            self.queue_metrics.report(),
+        ]
+        return "\n".join(lines)
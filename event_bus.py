@@ -1,6 +1,7 @@
 class EventBus:
     def __init__(self):
         self.subscribers = {}  # Dictionary to hold event subscriptions
+        self.batch_subscribers = {}  # Callbacks that take a list of same-type events
 
     def subscribe(self, event_type, callback):
         if not isinstance(event_type, type):
@@ -9,8 +10,33 @@ class EventBus:
             self.subscribers[event_type] = []
         self.subscribers[event_type].append(callback)
 
+    def subscribe_batch(self, event_type, callback):
+        """Subscribes a callback that receives runs of consecutive same-type events as one list."""
+        if not isinstance(event_type, type):
+            raise TypeError("event_type must be a class")
+        if event_type not in self.batch_subscribers:
+            self.batch_subscribers[event_type] = []
+        self.batch_subscribers[event_type].append(callback)
+
+    def has_batch_subscribers(self, event_type) -> bool:
+        return event_type in self.batch_subscribers
+
     def publish(self, event):
         event_type = type(event)
         if event_type in self.subscribers:
             for callback in self.subscribers[event_type]:
-                callback(event)
\ No newline at end of file
+                callback(event)
+        if event_type in self.batch_subscribers:
+            for callback in self.batch_subscribers[event_type]:
+                callback([event])
+
+    def publish_batch(self, events):
+        """Publishes a list of events that all share one type."""
+        event_type = type(events[0])
+        if event_type in self.batch_subscribers:
+            for callback in self.batch_subscribers[event_type]:
+                callback(events)
+        if event_type in self.subscribers:
+            for event in events:
+                for callback in self.subscribers[event_type]:
+                    callback(event)
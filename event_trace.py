@@ -0,0 +1,364 @@
+# event_trace.py
+"""
+Binary event trace recording and offline analysis.
+
+A trace is an append-only log of every event a ZoneController dispatches.
+Each record is a fixed header (sim time, zone, event type id, payload length)
+followed by the event's dataclass fields, tagged by type. Field values may be
+None, bools, ints, floats, strings, enums, Coordinates, or lists and tuples of
+those; recording an event with any other field type raises TypeError rather
+than storing something replay cannot rebuild. Event classes are
+given a small integer id the first time they are seen, and a type-definition
+record carrying the class path is written into the log at that point, so a
+trace file is self-describing and needs no external schema.
+"""
+import dataclasses
+import importlib
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+from models import Coordinates
+
+# --- File Format ---
+TRACE_MAGIC = b"TTRC"
+TRACE_VERSION = 2
+FILE_HEADER = struct.Struct("<4sH")
+RECORD_HEADER = struct.Struct("<dHHI")  # sim time, zone id, type id, payload length
+TYPE_DEFINITION_ID = 0  # Reserved type id for "type id -> class path" records
+TYPE_DEFINITION = struct.Struct("<H")
+
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")  # Byte length of strings and enum paths, element count of lists
+_COORDINATES = struct.Struct("<dd")
+
+TAG_NONE = ord("N")
+TAG_BOOL = ord("b")
+TAG_INT = ord("i")
+TAG_FLOAT = ord("f")
+TAG_STR = ord("s")
+TAG_ENUM = ord("e")
+TAG_COORDINATES = ord("c")
+TAG_LIST = ord("l")
+TAG_TUPLE = ord("t")
+
+WRITE_BUFFER_BYTES = 64 * 1024
+
+_enum_types: Dict[str, type] = {}  # Class path -> enum class, for decoding
+
+
+def _encode_text(out: bytearray, text: str) -> None:
+    data = text.encode()
+    out += _LENGTH.pack(len(data))  # struct.error above 4 GiB
+    out += data
+
+
+def _encode_value(out: bytearray, value) -> None:
+    """Appends one tagged field value to the payload buffer. Raises TypeError for unsupported types."""
+    if value is None:
+        out.append(TAG_NONE)
+    elif isinstance(value, bool):
+        out.append(TAG_BOOL)
+        out.append(1 if value else 0)
+    elif isinstance(value, Enum):  # Checked before int, EventPriority is an IntEnum
+        # Stored with its class path, so enums inside lists decode without the field's annotation.
+        out.append(TAG_ENUM)
+        _encode_text(out, f"{_class_path(type(value))}#{value.name}")
+    elif isinstance(value, int):
+        out.append(TAG_INT)
+        out += _INT.pack(value)
+    elif isinstance(value, float):
+        out.append(TAG_FLOAT)
+        out += _FLOAT.pack(value)
+    elif isinstance(value, str):
+        out.append(TAG_STR)
+        _encode_text(out, value)
+    elif isinstance(value, Coordinates):
+        out.append(TAG_COORDINATES)
+        out += _COORDINATES.pack(value.latitude, value.longitude)
+    elif isinstance(value, (list, tuple)):
+        out.append(TAG_TUPLE if isinstance(value, tuple) else TAG_LIST)
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            _encode_value(out, item)
+    else:
+        raise TypeError(f"Cannot trace a field value of type {type(value).__name__}.")
+
+
+def _decode_text(buffer, offset: int) -> tuple:
+    length = _LENGTH.unpack_from(buffer, offset)[0]
+    offset += _LENGTH.size
+    return bytes(buffer[offset:offset + length]).decode(), offset + length
+
+
+def _decode_enum(text: str) -> Enum:
+    path, _, name = text.rpartition("#")
+    enum_type = _enum_types.get(path)
+    if enum_type is None:
+        enum_type = _enum_types[path] = _resolve_class(path)
+    return enum_type[name]
+
+
+def _decode_value(buffer, offset: int) -> tuple:
+    """Decodes one tagged field value. Returns (value, offset after it)."""
+    tag = buffer[offset]
+    offset += 1
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_BOOL:
+        return bool(buffer[offset]), offset + 1
+    if tag == TAG_INT:
+        return _INT.unpack_from(buffer, offset)[0], offset + _INT.size
+    if tag == TAG_FLOAT:
+        return _FLOAT.unpack_from(buffer, offset)[0], offset + _FLOAT.size
+    if tag == TAG_COORDINATES:
+        latitude, longitude = _COORDINATES.unpack_from(buffer, offset)
+        return Coordinates(latitude=latitude, longitude=longitude), offset + _COORDINATES.size
+    if tag == TAG_STR:
+        return _decode_text(buffer, offset)
+    if tag == TAG_ENUM:
+        text, offset = _decode_text(buffer, offset)
+        return _decode_enum(text), offset
+    if tag in (TAG_LIST, TAG_TUPLE):
+        count = _LENGTH.unpack_from(buffer, offset)[0]
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode_value(buffer, offset)
+            items.append(item)
+        return (tuple(items) if tag == TAG_TUPLE else items), offset
+    raise ValueError(f"Corrupt trace payload: unknown field tag {tag!r} at offset {offset - 1}.")
+
+
+def _decode_values(buffer, offset: int, end: int) -> list:
+    """Decodes all tagged field values between offset and end."""
+    values = []
+    while offset < end:
+        value, offset = _decode_value(buffer, offset)
+        values.append(value)
+    return values
+
+
+def _class_path(event_type: type) -> str:
+    return f"{event_type.__module__}:{event_type.__qualname__}"
+
+
+def _resolve_class(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+class TraceRecorder:
+    """Appends dispatched events to a compact binary trace file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._buffer = bytearray(FILE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION))
+        self._type_ids: Dict[type, int] = {}
+        self._payload = bytearray()
+        self.records_written = 0
+
+    def _type_id(self, event_type: type) -> int:
+        type_id = self._type_ids.get(event_type)
+        if type_id is None:
+            type_id = len(self._type_ids) + 1
+            self._type_ids[event_type] = type_id
+            path = _class_path(event_type).encode()
+            payload = TYPE_DEFINITION.pack(type_id) + path
+            self._buffer += RECORD_HEADER.pack(0.0, 0, TYPE_DEFINITION_ID, len(payload))
+            self._buffer += payload
+        return type_id
+
+    def record(self, sim_time: float, zone_id: int, event) -> None:
+        """Appends one event record. Called by ZoneController for every dispatched event."""
+        type_id = self._type_id(type(event))
+        payload = self._payload
+        payload.clear()
+        for f in dataclasses.fields(event):
+            try:
+                _encode_value(payload, getattr(event, f.name))
+            except TypeError as e:
+                raise TypeError(f"{type(event).__name__}.{f.name}: {e}") from None
+        self._buffer += RECORD_HEADER.pack(sim_time, zone_id, type_id, len(payload))
+        self._buffer += payload
+        self.records_written += 1
+        if len(self._buffer) >= WRITE_BUFFER_BYTES:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class TraceRecord(NamedTuple):
+    """A lightweight view of one record. The payload stays in the mapped file until decoded."""
+    time: float
+    zone_id: int
+    type_name: str
+    offset: int  # Offset of the payload in the trace file
+    length: int
+
+
+class TraceReader:
+    """
+    Memory-maps a trace file for offline filtering and aggregation.
+    Record headers are indexed in one pass; payloads are only decoded on demand.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a trace file.")
+        if version != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {version} in {path}.")
+        self.type_paths: Dict[int, str] = {}
+        self._classes: Dict[int, type] = {}
+        self._offsets = array("Q")
+        self._index()
+
+    def _index(self) -> None:
+        buffer = self._map
+        offset = FILE_HEADER.size
+        end = len(buffer)
+        while offset + RECORD_HEADER.size <= end:
+            _, _, type_id, length = RECORD_HEADER.unpack_from(buffer, offset)
+            payload_start = offset + RECORD_HEADER.size
+            if payload_start + length > end:
+                break  # Truncated tail from a crashed run
+            if type_id == TYPE_DEFINITION_ID:
+                defined_id = TYPE_DEFINITION.unpack_from(buffer, payload_start)[0]
+                path_start = payload_start + TYPE_DEFINITION.size
+                self.type_paths[defined_id] = bytes(buffer[path_start:payload_start + length]).decode()
+            else:
+                self._offsets.append(offset)
+            offset = payload_start + length
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def type_name(self, type_id: int) -> str:
+        return self.type_paths[type_id].partition(":")[2]
+
+    def records(self, zone_id: Optional[int] = None, types: Optional[Iterable[str]] = None,
+                start: Optional[float] = None, end: Optional[float] = None) -> Iterator[TraceRecord]:
+        """Yields records matching all given filters, in recorded order."""
+        wanted_ids: Optional[Set[int]] = None
+        if types is not None:
+            names = set(types)
+            wanted_ids = {t_id for t_id in self.type_paths if self.type_name(t_id) in names}
+        buffer = self._map
+        for offset in self._offsets:
+            sim_time, zone, type_id, length = RECORD_HEADER.unpack_from(buffer, offset)
+            if zone_id is not None and zone != zone_id:
+                continue
+            if wanted_ids is not None and type_id not in wanted_ids:
+                continue
+            if start is not None and sim_time < start:
+                continue
+            if end is not None and sim_time > end:
+                continue
+            yield TraceRecord(sim_time, zone, self.type_name(type_id), offset + RECORD_HEADER.size, length)
+
+    def event_class(self, type_name: str) -> type:
+        for type_id, path in self.type_paths.items():
+            if path.partition(":")[2] == type_name:
+                if type_id not in self._classes:
+                    self._classes[type_id] = _resolve_class(path)
+                return self._classes[type_id]
+        raise KeyError(type_name)
+
+    def decode(self, record: TraceRecord):
+        """Rebuilds the original event object for a record."""
+        event_class = self.event_class(record.type_name)
+        values = _decode_values(self._map, record.offset, record.offset + record.length)
+        return event_class(**{f.name: value for f, value in zip(dataclasses.fields(event_class), values)})
+
+    def count_by_type(self, **filters) -> Counter:
+        """Aggregates record counts per event type."""
+        return Counter(record.type_name for record in self.records(**filters))
+
+    def count_by_zone(self, **filters) -> Counter:
+        """Aggregates record counts per zone."""
+        return Counter(record.zone_id for record in self.records(**filters))
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+# Commands that only ever enter the simulation from a scenario file or the CLI.
+# Everything else in a trace is derived from these, so replaying them regenerates it.
+REPLAY_ROOT_TYPES = (
+    "UnitPowerOnCommand",
+    "UnitPowerOffCommand",
+    "UnitUpdateLocationCommand",
+    "UnitInitiateCallCommand",
+    "UnitEmergencyAlarmCommand",
+    "UnitSendDataCommand",
+    "SiteFailCommand",
+    "SiteRestoreCommand",
+)
+
+
+def replay(reader: TraceReader, controllers: dict, types: Optional[Iterable[str]] = REPLAY_ROOT_TYPES,
+           drain_seconds: float = 600.0) -> int:
+    """
+    Feeds a recorded trace back into the controllers as fast as possible.
+    By default only the root commands are replayed, since the controllers regenerate
+    the events that followed them. After the last record, queued work is run for
+    at most drain_seconds of sim time. Returns the number of events injected.
+    """
+    injected = 0
+    for record in reader.records(types=types):
+        controller = controllers.get(record.zone_id)
+        if not controller:
+            continue
+        event = reader.decode(record)
+        for zone_controller in controllers.values():
+            if record.time > zone_controller.current_time:
+                zone_controller.tick(record.time - zone_controller.current_time)
+        controller.publish_event(event)
+        controller.tick(0)
+        injected += 1
+
+    # Let everything the injected events triggered run to completion.
+    deadline = max((c.current_time for c in controllers.values()), default=0.0) + drain_seconds
+    while any(c.next_event_time() is not None for c in controllers.values()):
+        next_time = min(t for t in (c.next_event_time() for c in controllers.values()) if t is not None)
+        if next_time > deadline:
+            break
+        for zone_controller in controllers.values():
+            zone_controller.tick(max(0.0, next_time - zone_controller.current_time))
+    return injected
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python event_trace.py <trace_file>")
+        sys.exit(1)
+    trace = TraceReader(sys.argv[1])
+    print(f"{len(trace)} records in {sys.argv[1]}")
+    for zone, count in sorted(trace.count_by_zone().items()):
+        print(f"  Zone {zone}: {count} events")
+    for type_name, count in trace.count_by_type().most_common():
+        print(f"  {type_name:<40} {count}")
+    trace.close()
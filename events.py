@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from enum import IntEnum
-from typing import Any
+from typing import Any, Optional
 from p25.packets import EventPriority
 
 # The EventPriority enum is still useful for the simulation's internal queue,
@@ -43,17 +43,82 @@ class UnitPowerOnCommand(Event):
     priority: EventPriority = EventPriority.SYSTEM
 
 
+@dataclass
+class UnitPowerOffCommand(Event):
+    """
+    High-level command to power off a Unit. The unit leaves its site's
+    registration table and drops its talkgroup affiliation.
+    """
+    unit_id: int
+    priority: EventPriority = EventPriority.NORMAL
+
+
 @dataclass
 class UnitInitiateCallCommand(Event):
     """
     High-level command for a unit to initiate a group call. This will cause
     the unit's internal logic to generate a GroupVoiceServiceRequest packet.
+    The unit releases PTT after `duration` seconds.
+    """
+    unit_id: int
+    talkgroup_id: int
+    priority: EventPriority = EventPriority.HIGH
+    duration: float = 5.0
+
+
+@dataclass
+class UnitEmergencyAlarmCommand(Event):
+    """
+    High-level command for a unit to press its emergency button. The unit sends an
+    EmergencyAlarmRequest on talkgroup_id (default: its affiliated talkgroup) and
+    talks on the resulting emergency call for `duration` seconds.
+    """
+    unit_id: int
+    talkgroup_id: Optional[int] = None
+    priority: EventPriority = EventPriority.EMERGENCY
+    duration: float = 5.0
+
+
+@dataclass
+class UnitSendDataCommand(Event):
+    """
+    High-level command for a unit to send a packet data burst (e.g. an AVL
+    location report). The unit asks for a data channel if it has no session.
+    """
+    unit_id: int
+    payload_bytes: int
+    priority: EventPriority = EventPriority.LOW
+
+
+@dataclass
+class UnitEndCallCommand(Event):
+    """
+    High-level command for a unit to release PTT. The call stays on its channels
+    for the talkgroup's hangtime, then is torn down.
     """
     unit_id: int
     talkgroup_id: int
     priority: EventPriority = EventPriority.HIGH
 
 
+@dataclass
+class SiteFailCommand(Event):
+    """
+    High-level command to take a site down at runtime. Units registered on it
+    re-scan, staggered over `jitter` seconds (None uses the controller default).
+    """
+    site_id: int
+    jitter: Optional[float] = None
+    priority: EventPriority = EventPriority.SYSTEM
+
+
+@dataclass
+class SiteRestoreCommand(Event):
+    """High-level command to bring a failed site back by re-initializing it."""
+    site_id: int
+    priority: EventPriority = EventPriority.SYSTEM
+
+
 # --- Internal System Events ---
 # These events are used by components within the simulation to communicate
 # with each other at a high level.
@@ -69,6 +134,52 @@ class ControlChannelEstablishRequest(Event):
     channel_id: int
     priority: EventPriority = EventPriority.SYSTEM
 
+@dataclass
+class ConsoleEmergencyNotification(Event):
+    """Internal event that alerts a dispatch console to a unit's emergency alarm."""
+    console_id: int
+    unit_id: int
+    talkgroup_id: int
+    priority: EventPriority = EventPriority.EMERGENCY
+
+@dataclass
+class CallTeardownRequest(Event):
+    """
+    Internal event scheduled when the last talker releases PTT. The call is only
+    torn down if no new transmission started since (transmission_count unchanged).
+    """
+    call_id: int
+    transmission_count: int
+    priority: EventPriority = EventPriority.SYSTEM
+
+@dataclass
+class CallGrantUpdateRequest(Event):
+    """Internal event that re-broadcasts grant updates for an active call."""
+    call_id: int
+    priority: EventPriority = EventPriority.LOW
+
+@dataclass
+class BroadcastTick(Event):
+    """
+    Internal event that sends every control channel broadcast due at this time on
+    all of the zone's sites. Only one is ever pending per zone.
+    """
+    zone_id: int
+    priority: EventPriority = EventPriority.SYSTEM
+
+@dataclass
+class DataBurstComplete(Event):
+    """Internal event scheduled when a data channel finishes sending its current burst."""
+    site_id: int
+    channel_id: int
+    priority: EventPriority = EventPriority.NORMAL
+
+@dataclass
+class DataSessionReadyTimeout(Event):
+    """Internal event that ends a data session once its ready timer runs out idle."""
+    unit_id: int
+    priority: EventPriority = EventPriority.LOW
+
 @dataclass
 class UnitUnbanFromSiteCommand(Event):
     """
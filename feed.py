@@ -0,0 +1,223 @@
+# feed.py
+"""
+Streaming state-change feed for dashboards and other external consumers.
+
+Consumers subscribe to typed records (unit state transitions, site status
+changes, call start/end) and read them from their own bounded ring buffer,
+from another thread or from an asyncio task. What happens when a buffer is
+full is chosen per subscription:
+
+  DROP_OLDEST  the newest record overwrites the oldest and the loss is
+               counted. The simulation thread never waits on the consumer.
+  BLOCK        nothing is lost while the consumer keeps up on average:
+               records that find the buffer full wait, in order, in a
+               staging queue that refills the buffer as the consumer reads.
+               The simulation thread never waits. Only if the staging
+               queue is full too is a record lost, and the loss is counted.
+
+With no subscribers the feed installs no model observers and publish() is
+never reached, so an unobserved simulation runs exactly as before.
+"""
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple
+
+from models import CallStatus, RadioCall, Site, SiteStatus, Unit, UnitState
+
+# --- Constants ---
+DEFAULT_BUFFER_SIZE = 1024
+DEFAULT_STAGING_SIZE = 65536  # BLOCK mode: records held behind a full buffer before any are lost
+
+
+class Backpressure(Enum):
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+
+# --- Records ---
+@dataclass(frozen=True)
+class StateChange:
+    """Base class for all feed records."""
+    sim_time: float
+
+
+@dataclass(frozen=True)
+class UnitStateChange(StateChange):
+    unit_id: int
+    old_state: UnitState
+    new_state: UnitState
+    zone_id: Optional[int]  # Zone of the unit's current site, if any
+    site_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class SiteStatusChange(StateChange):
+    zone_id: Optional[int]
+    site_id: int
+    old_status: SiteStatus
+    new_status: SiteStatus
+
+
+@dataclass(frozen=True)
+class CallStateChange(StateChange):
+    zone_id: int
+    call_id: int
+    talkgroup_id: int
+    unit_id: int
+    status: CallStatus
+    sites: Tuple[Tuple[int, int], ...]  # (zone_id, site_id) of every site carrying the call
+
+
+class Subscription:
+    """One consumer's bounded ring buffer of records."""
+
+    def __init__(self, feed: 'StateFeed', record_types: Tuple[type, ...], capacity: int,
+                 backpressure: Backpressure, staging_capacity: int = DEFAULT_STAGING_SIZE):
+        self.feed = feed
+        self.record_types = record_types
+        self.capacity = capacity
+        self.backpressure = backpressure
+        self.staging_capacity = staging_capacity
+        self.dropped = 0
+        self.closed = False
+        self.blocked = 0  # BLOCK mode: records that found the buffer full and were staged
+        self._buffer = deque(maxlen=capacity)
+        self._staging = deque()  # BLOCK mode: records waiting, in order, for room in the buffer
+        self._ready = threading.Condition()
+
+    def wants(self, record: StateChange) -> bool:
+        return isinstance(record, self.record_types)
+
+    def _offer(self, record: StateChange):
+        """Called on the simulation thread; never waits for the consumer."""
+        with self._ready:
+            if self.closed:
+                return
+            if self.backpressure == Backpressure.BLOCK and (self._staging or len(self._buffer) == self.capacity):
+                if len(self._staging) == self.staging_capacity:
+                    self.dropped += 1
+                    return
+                self.blocked += 1
+                self._staging.append(record)
+                return
+            if len(self._buffer) == self.capacity:
+                self.dropped += 1
+            self._buffer.append(record)
+            self._ready.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[StateChange]:
+        """Waits for the next record. Returns None on timeout or once closed and empty."""
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._buffer or self.closed, timeout):
+                return None
+            if not self._buffer:
+                return None
+            record = self._buffer.popleft()
+            if self._staging:
+                self._buffer.append(self._staging.popleft())
+            return record
+
+    def drain(self) -> List[StateChange]:
+        """Returns every buffered and staged record without waiting."""
+        with self._ready:
+            records = list(self._buffer)
+            records.extend(self._staging)
+            self._buffer.clear()
+            self._staging.clear()
+            return records
+
+    async def get_async(self, timeout: Optional[float] = None) -> Optional[StateChange]:
+        """asyncio version of get(); waits in a worker thread so the event loop stays free."""
+        return await asyncio.to_thread(self.get, timeout)
+
+    def __iter__(self):
+        """Yields records until the subscription is closed."""
+        while True:
+            record = self.get()
+            if record is None:
+                return
+            yield record
+
+    def close(self):
+        self.feed.unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class StateFeed:
+    """Publishes state-change records to every matching subscription."""
+
+    def __init__(self, radio_system):
+        self.radio_system = radio_system
+        self.now = 0.0  # Sim time stamped on records; advanced by the zone controllers' ticks
+        # Replaced, never mutated, so publish() on the simulation thread can iterate it while
+        # consumers subscribe and close from their own threads.
+        self.subscriptions: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()  # Serializes subscribe/unsubscribe
+        self._observing = False
+
+    def subscribe(self, record_types: Sequence[type] = (StateChange,), capacity: int = DEFAULT_BUFFER_SIZE,
+                  backpressure: Backpressure = Backpressure.DROP_OLDEST,
+                  staging_capacity: int = DEFAULT_STAGING_SIZE) -> Subscription:
+        subscription = Subscription(self, tuple(record_types), capacity, backpressure, staging_capacity)
+        with self._lock:
+            self.subscriptions = self.subscriptions + (subscription,)
+            if not self._observing:
+                Unit.add_observer(self._on_unit_change)
+                Site.add_observer(self._on_site_change)
+                self._observing = True
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+            if not self.subscriptions and self._observing:
+                Unit.remove_observer(self._on_unit_change)
+                Site.remove_observer(self._on_site_change)
+                self._observing = False
+
+    def publish(self, record: StateChange):
+        for subscription in self.subscriptions:
+            if subscription.wants(record):
+                subscription._offer(record)
+
+    def publish_call(self, call: RadioCall):
+        """Publishes a call start or end; controllers call this only when someone is subscribed."""
+        self.publish(CallStateChange(
+            sim_time=self.now,
+            zone_id=call.zone_id,
+            call_id=call.id,
+            talkgroup_id=call.talkgroup.id,
+            unit_id=call.initiating_unit.id,
+            status=call.status,
+            sites=tuple(call.channels)
+        ))
+
+    def _on_unit_change(self, unit: Unit, name: str, old_value, new_value):
+        if name != 'state':
+            return
+        site = unit.current_site
+        self.publish(UnitStateChange(
+            sim_time=self.now,
+            unit_id=unit.id,
+            old_state=old_value,
+            new_state=new_value,
+            zone_id=unit.current_zone_id if site else None,
+            site_id=site.id if site else None
+        ))
+
+    def _on_site_change(self, site: Site, name: str, old_value, new_value):
+        # Status changes are rare, so finding the owning zone by scanning is fine.
+        zone_id = next((zone.id for zone in self.radio_system.config.wacn.zones.materialized().values()
+                        if zone.sites.get(site.id) is site), None)
+        self.publish(SiteStatusChange(
+            sim_time=self.now,
+            zone_id=zone_id,
+            site_id=site.id,
+            old_status=old_value,
+            new_status=new_value
+        ))
@@ -2,6 +2,11 @@ import math
 import random
 from models import Coordinates, OperationalArea, Subsite
 
+# --- Signal levels ---
+MAX_RSSI_DBM = -50  # Strongest signal the linear model reports (at the tower)
+MIN_RSSI_DBM = -121  # Weakest usable signal
+RSSI_LEVEL_THRESHOLDS = ((-70, 4), (-90, 3), (-110, 2))  # (minimum dBm, level), strongest first
+
 def get_distance(coord1: Coordinates, coord2: Coordinates) -> float:
     """
     Calculates the distance between two points using the Haversine formula.
@@ -26,33 +31,25 @@ def estimate_rssi(distance_km: float, subsite: Subsite) -> tuple[float, int]:
     Returns a tuple of (dBm, RSSI Level 0-4).
     """
     max_distance_km = subsite.operating_radius
-    max_rssi_dbm = -50  # Strongest possible signal at the tower
-    min_rssi_dbm = -121 # Weakest usable signal
 
     if distance_km >= max_distance_km:
-        return min_rssi_dbm, 0
+        return MIN_RSSI_DBM, 0
 
     # Calculate base signal strength, decreases linearly for simplicity
-    signal_strength_dbm = max_rssi_dbm - (75 * (distance_km / max_distance_km))
+    signal_strength_dbm = MAX_RSSI_DBM - (75 * (distance_km / max_distance_km))
 
     # Add some random variation to simulate real-world conditions
     signal_strength_dbm += random.uniform(-3, 3)
-    signal_strength_dbm = max(min_rssi_dbm, min(max_rssi_dbm, signal_strength_dbm))
-
-    # --- UPDATED: More granular RSSI level conversion ---
-    if signal_strength_dbm >= -70:
-        rssi_level = 4
-    elif signal_strength_dbm >= -90:
-        rssi_level = 3
-    elif signal_strength_dbm >= -110:
-        rssi_level = 2
-    elif signal_strength_dbm > min_rssi_dbm: # Use min_rssi_dbm as the threshold
-        rssi_level = 1
-    else:
-        rssi_level = 0 # Signals at or below the minimum get level 0
-
-
-    return signal_strength_dbm, rssi_level
+    signal_strength_dbm = max(MIN_RSSI_DBM, min(MAX_RSSI_DBM, signal_strength_dbm))
+
+    return signal_strength_dbm, rssi_level(signal_strength_dbm)
+
+def rssi_level(dbm: float) -> int:
+    """Converts a signal strength to an RSSI level 0-4."""
+    for threshold, level in RSSI_LEVEL_THRESHOLDS:
+        if dbm >= threshold:
+            return level
+    return 1 if dbm > MIN_RSSI_DBM else 0  # Signals at or below the minimum get level 0
 
 def get_random_point_in_area(area: OperationalArea) -> Coordinates:
     """Generates a random coordinate within a defined operational area."""
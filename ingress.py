@@ -0,0 +1,311 @@
+# ingress.py
+"""
+Network ingress for inbound signaling packets (ISPs) from external subscriber
+unit emulators.
+
+Every message is a 4-byte header followed by back-to-back 12-byte TSBKs
+(see p25/tsbk.py):
+    zone_id (uint16) | frame count (uint16) | frames...
+Over UDP each datagram carries exactly one message; over TCP messages follow
+each other on the stream. A message is decoded in one pass and handed to the
+zone's controller as one batch through ZoneController.submit_external.
+
+Backpressure: when a zone's inbox is full, UDP messages are dropped and
+counted, while a TCP connection stops reading until the zone catches up, so
+the sender is throttled by its socket buffers filling.
+
+Usage:
+    python ingress.py                 # serve config.yaml on 127.0.0.1
+    python ingress.py --loopback 10   # 10 second self-test with the bundled load client
+"""
+import argparse
+import contextlib
+import itertools
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from p25 import tsbk
+from p25.control_status import GroupAffiliationRequest, UnitRegistrationRequest
+from p25.packets import P25Packet
+
+# --- Constants ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 50025  # Used for both UDP and TCP
+MESSAGE_HEADER = struct.Struct(">HH")  # zone_id, frame count
+MAX_FRAMES_PER_MESSAGE = (65507 - MESSAGE_HEADER.size) // tsbk.TSBK_SIZE  # Largest that fits one UDP datagram
+BLOCKED_RETRY_SECONDS = 0.5  # How often a blocked TCP reader re-checks that the server is still running
+LOOPBACK_TICK_SECONDS = 0.05
+
+
+# Forward declaration for type hinting to avoid circular import
+class ZoneController:
+    pass
+
+
+class _TcpServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True  # Connection threads must not keep the process alive
+
+
+class IngressServer:
+    """Accepts encoded ISPs over UDP and TCP and feeds them to the zone controllers."""
+
+    def __init__(self, controllers: Dict[int, 'ZoneController'], host: str = DEFAULT_HOST,
+                 udp_port: Optional[int] = DEFAULT_PORT, tcp_port: Optional[int] = DEFAULT_PORT):
+        self.controllers = controllers
+        self.running = False
+        self.messages = 0
+        self.frames_accepted = 0
+        self.frames_dropped = 0  # UDP messages refused because the zone's inbox was full
+        self.malformed = 0  # Bad headers, bad CRCs, unknown opcodes or unknown zones
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+        ingress = self
+        self._udp_server = self._tcp_server = None
+        if udp_port is not None:
+            class DatagramHandler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    ingress._handle_datagram(self.request[0])
+            self._udp_server = socketserver.UDPServer((host, udp_port), DatagramHandler)
+        if tcp_port is not None:
+            class StreamHandler(socketserver.StreamRequestHandler):
+                def handle(self):
+                    ingress._handle_stream(self.rfile)
+            self._tcp_server = _TcpServer((host, tcp_port), StreamHandler)
+
+    @property
+    def udp_address(self):
+        return self._udp_server.server_address if self._udp_server else None
+
+    @property
+    def tcp_address(self):
+        return self._tcp_server.server_address if self._tcp_server else None
+
+    def start(self):
+        self.running = True
+        for server in (self._udp_server, self._tcp_server):
+            if server:
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"Ingress listening on UDP {self.udp_address} and TCP {self.tcp_address}.")
+
+    def stop(self):
+        self.running = False
+        for server in (self._udp_server, self._tcp_server):
+            if server:
+                server.shutdown()
+                server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _decode(self, zone_id: int, payload) -> Optional[List[P25Packet]]:
+        if zone_id not in self.controllers:
+            self._count(malformed=1)
+            return None
+        try:
+            return tsbk.decode_batch(payload, inbound=True)
+        except tsbk.TsbkError:
+            self._count(malformed=1)
+            return None
+
+    def _count(self, messages: int = 0, accepted: int = 0, dropped: int = 0, malformed: int = 0):
+        with self._stats_lock:
+            self.messages += messages
+            self.frames_accepted += accepted
+            self.frames_dropped += dropped
+            self.malformed += malformed
+
+    def _handle_datagram(self, datagram: bytes):
+        if len(datagram) < MESSAGE_HEADER.size:
+            self._count(malformed=1)
+            return
+        zone_id, frame_count = MESSAGE_HEADER.unpack_from(datagram)
+        payload = memoryview(datagram)[MESSAGE_HEADER.size:]
+        if len(payload) != frame_count * tsbk.TSBK_SIZE:
+            self._count(malformed=1)
+            return
+        packets = self._decode(zone_id, payload)
+        if packets is None:
+            return
+        if self.controllers[zone_id].submit_external(packets):
+            self._count(messages=1, accepted=len(packets))
+        else:
+            self._count(messages=1, dropped=len(packets))
+
+    def _handle_stream(self, stream):
+        while self.running:
+            header = stream.read(MESSAGE_HEADER.size)
+            if len(header) < MESSAGE_HEADER.size:
+                return  # Client closed the connection
+            zone_id, frame_count = MESSAGE_HEADER.unpack(header)
+            if frame_count > MAX_FRAMES_PER_MESSAGE:
+                self._count(malformed=1)
+                return  # Framing is lost; drop the connection
+            payload = stream.read(frame_count * tsbk.TSBK_SIZE)
+            if len(payload) < frame_count * tsbk.TSBK_SIZE:
+                return
+            packets = self._decode(zone_id, payload)
+            if packets is None:
+                continue
+            # Stop reading until the zone has room; the client then blocks on its full socket buffer.
+            controller = self.controllers[zone_id]
+            while self.running:
+                if controller.submit_external(packets, block=True, timeout=BLOCKED_RETRY_SECONDS):
+                    self._count(messages=1, accepted=len(packets))
+                    break
+
+    def report(self) -> str:
+        return (f"  Messages: {self.messages}  Frames accepted: {self.frames_accepted}  "
+                f"Dropped: {self.frames_dropped}  Malformed: {self.malformed}")
+
+
+# --- Load-generating client ---
+
+def encode_message(zone_id: int, packets: List[P25Packet]) -> bytes:
+    """Builds one ingress message: header plus the packets as TSBKs."""
+    buffer = bytearray(MESSAGE_HEADER.size + len(packets) * tsbk.TSBK_SIZE)
+    MESSAGE_HEADER.pack_into(buffer, 0, zone_id, len(packets))
+    tsbk.encode_batch(packets, buffer, MESSAGE_HEADER.size)
+    return bytes(buffer)
+
+
+def zone_load_packets(radio_system, zone_id: int) -> Iterator[P25Packet]:
+    """Endless mix of registration and affiliation requests from the zone's own units."""
+    zone = radio_system.get_zone(zone_id)
+    site_ids = sorted(zone.sites)
+    talkgroup_ids = sorted(zone.talkgroups)
+    for unit_id in itertools.cycle(sorted(zone.units)):
+        yield UnitRegistrationRequest(unit_id=unit_id, site_id=site_ids[unit_id % len(site_ids)])
+        yield GroupAffiliationRequest(unit_id=unit_id, talkgroup_id=talkgroup_ids[unit_id % len(talkgroup_ids)])
+
+
+class LoadClient:
+    """Sends ISP messages to an IngressServer as fast as allowed, for load testing."""
+
+    def __init__(self, address, protocol: str = "udp", frames_per_message: int = 64):
+        self.protocol = protocol
+        self.frames_per_message = frames_per_message
+        self.frames_sent = 0
+        if protocol == "udp":
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect(address)
+        elif protocol == "tcp":
+            self.sock = socket.create_connection(address)
+        else:
+            raise ValueError(f"Unknown protocol '{protocol}'.")
+
+    def send(self, zone_id: int, packets: List[P25Packet]):
+        message = encode_message(zone_id, packets)
+        if self.protocol == "udp":
+            self.sock.send(message)
+        else:
+            self.sock.sendall(message)
+        self.frames_sent += len(packets)
+
+    def run(self, zone_id: int, packets: Iterator[P25Packet], duration: float, rate: float = None):
+        """Sends packets for duration seconds, optionally paced to rate frames per second."""
+        start = time.perf_counter()
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= duration:
+                return
+            if rate and self.frames_sent > rate * elapsed:
+                time.sleep(self.frames_per_message / rate)
+                continue
+            self.send(zone_id, list(itertools.islice(packets, self.frames_per_message)))
+
+    def close(self):
+        self.sock.close()
+
+
+def run_loopback(config_path: str, protocol: str, duration: float, frames_per_message: int,
+                 rate: float = None):
+    """Runs the simulator, an ingress server and a load client in one process and reports the rates."""
+    from controller import ZoneController
+    from radio_system import RadioSystem
+    from zone_router import WacnRouter
+
+    system = RadioSystem(config_path=config_path)
+    router = WacnRouter(inter_zone_latency=system.config.wacn.inter_zone_latency)
+    controllers = {}
+    for zone_id in system.config.wacn.zones.keys():
+        controller = ZoneController(system, zone_id)
+        router.register(controller)
+        controller.initialize_system()
+        controllers[zone_id] = controller
+    zone_id = min(controllers)
+
+    server = IngressServer(controllers, udp_port=0 if protocol == "udp" else None,
+                           tcp_port=0 if protocol == "tcp" else None)
+    server.start()
+    client = LoadClient(server.udp_address or server.tcp_address, protocol, frames_per_message)
+    dispatched_before = controllers[zone_id].event_counter
+
+    stop = threading.Event()
+
+    def tick_loop():
+        while not stop.is_set():
+            for tick_controller in controllers.values():
+                tick_controller.tick(LOOPBACK_TICK_SECONDS)
+
+    # Handlers log every packet; keep the console readable while under load.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        sim_thread = threading.Thread(target=tick_loop, daemon=True)
+        sim_thread.start()
+        start = time.perf_counter()
+        client.run(zone_id, zone_load_packets(system, zone_id), duration, rate)
+        elapsed = time.perf_counter() - start
+        time.sleep(LOOPBACK_TICK_SECONDS * 4)  # Let the last messages reach the inbox
+        stop.set()
+        sim_thread.join()
+        server.stop()
+    client.close()
+
+    scheduled = controllers[zone_id].event_counter - dispatched_before
+    print(f"\n--- Ingress Loopback ({protocol.upper()}, {frames_per_message} frames/message, {elapsed:.1f}s) ---")
+    print(f"  Sent: {client.frames_sent} frames ({client.frames_sent / elapsed:,.0f}/s)")
+    print(f"  Accepted into Zone {zone_id}: {server.frames_accepted} frames ({server.frames_accepted / elapsed:,.0f}/s)")
+    print(f"  Dropped (backpressure): {server.frames_dropped}  Malformed: {server.malformed}")
+    print(f"  Events scheduled in Zone {zone_id} (ISPs plus their responses): {scheduled} "
+          f"({scheduled / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accept ISPs from external radio emulators.")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--loopback", type=float, metavar="SECONDS",
+                        help="Run a self-contained load test for this many seconds instead of serving.")
+    parser.add_argument("--protocol", choices=["udp", "tcp"], default="udp", help="Loopback test transport.")
+    parser.add_argument("--frames", type=int, default=64, help="Loopback test frames per message.")
+    parser.add_argument("--rate", type=float, default=None, help="Loopback test frames per second (default: max).")
+    args = parser.parse_args()
+
+    if args.loopback:
+        run_loopback(args.config, args.protocol, args.loopback, args.frames, args.rate)
+    else:
+        from main import run_simulation_cli
+        from controller import ZoneController
+        from radio_system import RadioSystem
+        from zone_router import WacnRouter
+
+        radio_system = RadioSystem(config_path=args.config)
+        zone_router = WacnRouter(inter_zone_latency=radio_system.config.wacn.inter_zone_latency)
+        zone_controllers = {}
+        for zid in radio_system.config.wacn.zones.keys():
+            zone_controller = ZoneController(radio_system, zid)
+            zone_router.register(zone_controller)
+            zone_controller.initialize_system()
+            zone_controllers[zid] = zone_controller
+        ingress_server = IngressServer(zone_controllers, args.host, args.port, args.port)
+        ingress_server.start()
+        run_simulation_cli(radio_system, zone_controllers)
@@ -0,0 +1,156 @@
+# interference.py
+"""
+Frequency reuse and co-channel interference.
+
+FrequencyIndex maps every transmit frequency in the WACN to the channels (and
+so the sites and subsites) configured on it. A site's control channel
+transmits while the site is online; a voice channel transmits from the moment
+its first slot is granted until its last slot is released, which each site's
+channel allocator reports as it happens. Finding the active transmitters on a
+frequency therefore walks only that frequency's co-channel sites.
+
+During a scan, the power a unit receives from other sites transmitting on the
+measured control channel's frequency is added to the noise floor. The
+measurement then reports SINR instead of raw signal level, and its RSSI level
+is that of the signal reduced by the noise rise: with no co-channel
+transmitter in range the level is exactly the RSSI level.
+"""
+import math
+from functools import partial
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+from geo_utils import get_distance, rssi_level
+from models import RFSS, Channel, Coordinates, Site, SiteStatus
+
+SiteKey = Tuple[int, int]  # (zone_id, site_id)
+ChannelKey = Tuple[int, int, int]  # (zone_id, site_id, channel_id)
+
+# --- Constants ---
+NOISE_FLOOR_DBM = -129.0  # Thermal noise in a 12.5 kHz channel plus a 4 dB receiver noise figure
+NOISE_FLOOR_MW = 10 ** (NOISE_FLOOR_DBM / 10)
+
+
+def frequency_key(freq_mhz: float) -> int:
+    """Frequencies are compared in whole Hz, so 769.16875 written two ways is one frequency."""
+    return round(freq_mhz * 1e6)
+
+
+class FrequencyIndex:
+    """WACN-wide transmit frequency index with the key state of every channel on it."""
+
+    def __init__(self, radio_system):
+        self.radio_system = radio_system
+        self._users: Dict[int, Dict[ChannelKey, Tuple[int, Site, Channel]]] = {}  # Frequency -> channels on it
+        self._site_channels: Dict[SiteKey, List[Tuple[int, ChannelKey]]] = {}  # For re-indexing a site
+        self._keyed: Set[ChannelKey] = set()  # Voice channels with at least one slot granted
+        self.interfered = 0  # Measurements with a co-channel transmitter in range
+        self.degraded = 0  # Measurements whose level interference lowered
+        radio_system.on_site_changed(self._reindex)
+        if radio_system.config:
+            for zone_id in list(radio_system.config.wacn.zones.keys()):
+                # Sites of lazy zones are indexed when their zone is built; until then none of them transmits.
+                radio_system.on_zone_materialized(zone_id, self._add_zone)
+
+    def _add_zone(self, zone: RFSS):
+        for site in zone.sites.values():
+            self._index_site(zone.id, site)
+
+    def _index_site(self, zone_id: int, site: Site):
+        self._remove_site((zone_id, site.id))
+        entries = []
+        for channel in site.channels.values():
+            if not channel.enabled:
+                continue
+            freq = frequency_key(channel.freq_tx)
+            channel_key = (zone_id, site.id, channel.id)
+            self._users.setdefault(freq, {})[channel_key] = (zone_id, site, channel)
+            entries.append((freq, channel_key))
+        self._site_channels[(zone_id, site.id)] = entries
+        site.channel_allocator.key_listener = partial(self._key_changed, zone_id, site.id)
+        for channel_id, _ in site.assigned_voice_channels:
+            self._keyed.add((zone_id, site.id, channel_id))
+
+    def _remove_site(self, key: SiteKey):
+        for freq, channel_key in self._site_channels.pop(key, ()):
+            users = self._users.get(freq)
+            if users is not None:
+                users.pop(channel_key, None)
+                if not users:
+                    del self._users[freq]
+
+    def _reindex(self, zone_id: int, site_id: int):
+        site = self.radio_system.get_site(site_id, zone_id)
+        if site is None:
+            self._remove_site((zone_id, site_id))
+        else:
+            self._index_site(zone_id, site)
+
+    def _key_changed(self, zone_id: int, site_id: int, channel_id: int, keyed: bool):
+        if keyed:
+            self._keyed.add((zone_id, site_id, channel_id))
+        else:
+            self._keyed.discard((zone_id, site_id, channel_id))
+
+    # --- Queries ---
+    def co_channel(self, freq_mhz: float) -> List[Tuple[int, Site, Channel]]:
+        """(zone_id, site, channel) of every enabled channel transmitting on the frequency."""
+        return list(self._users.get(frequency_key(freq_mhz), {}).values())
+
+    def transmitters(self, freq_mhz: float) -> Iterator[Tuple[int, Site, Channel]]:
+        """The co-channel channels that are on the air right now."""
+        for channel_key, (zone_id, site, channel) in self._users.get(frequency_key(freq_mhz), {}).items():
+            if site.status != SiteStatus.ONLINE:
+                continue
+            if channel is site.control_channel or channel_key in self._keyed:
+                yield zone_id, site, channel
+
+    def interference_mw(self, zone_id: int, site: Site, location: Coordinates) -> float:
+        """Power received at location from other sites' transmitters on the site's control channel frequency."""
+        if site.control_channel is None:
+            return 0.0
+        propagation = self.radio_system.propagation
+        total = 0.0
+        for other_zone_id, other, _ in self.transmitters(site.control_channel.freq_tx):
+            if other_zone_id == zone_id and other.id == site.id:
+                continue  # Simulcast subsites of the same site are not interference
+            distances = [get_distance(location, subsite.location) for subsite in other.subsites]
+            for dbm, level in propagation.measure(location, other.subsites, distances):
+                if level:
+                    total += 10 ** (dbm / 10)
+        return total
+
+    def sinr(self, zone_id: int, site: Site, location: Coordinates,
+             signals: Sequence[Tuple[float, int]]) -> List[Tuple[float, int]]:
+        """(SINR dB, level) of each subsite signal (dBm, RSSI level) of the site measured at location."""
+        interference = self.interference_mw(zone_id, site, location)
+        floor_dbm = 10 * math.log10(NOISE_FLOOR_MW + interference)
+        if interference:
+            self.interfered += len(signals)
+        results = []
+        for dbm, level in signals:
+            sinr_db = dbm - floor_dbm
+            if interference:
+                degraded = rssi_level(NOISE_FLOOR_DBM + sinr_db)
+                if degraded < level:
+                    self.degraded += 1
+                    level = degraded
+            results.append((sinr_db, level))
+        return results
+
+    def report(self, zone_id: int) -> str:
+        lines = [f"  Interfered measurements: {self.interfered} ({self.degraded} lowered a site's level)"]
+        reused = []
+        for (site_zone_id, site_id), entries in sorted(self._site_channels.items()):
+            if site_zone_id != zone_id:
+                continue
+            for freq, (_, _, channel_id) in entries:
+                others = [f"Z{other_zone}/S{other_site} Ch{other_channel}"
+                          + (" (keyed)" if (other_zone, other_site, other_channel) in self._keyed else "")
+                          for other_zone, other_site, other_channel in self._users.get(freq, {})
+                          if (other_zone, other_site) != (zone_id, site_id)]
+                if others:
+                    reused.append(f"  Site {site_id} Ch{channel_id} {freq / 1e6:.5f} MHz: also on {', '.join(others)}")
+        lines.extend(reused or ["  No frequencies of this zone are reused."])
+        keyed = sum(1 for key in self._keyed if key[0] == zone_id)
+        lines.append(f"  Voice channels keyed now: {keyed}")
+        return "\n".join(lines)
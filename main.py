@@ -2,13 +2,18 @@ import sys
 import time
 import yaml
 import threading
+import traceback
 from radio_system import RadioSystem
 from controller import ZoneController
+from event_trace import TraceRecorder
+from zone_router import WacnRouter
+from traffic import load_traffic_model
 import events
 from events import *
 
 # A global flag to signal the simulation thread to stop
 simulation_running = True
+SIM_THREAD_TIMEOUT_SECONDS = 10.0  # How long a CLI command waits for the simulation thread to run it
 
 
 def simulation_loop(controllers: dict[int, ZoneController]):
@@ -21,8 +26,12 @@ def simulation_loop(controllers: dict[int, ZoneController]):
         last_tick_time = current_time
 
         # Tick all zone controllers to advance their internal clocks and process events
-        for controller in controllers.values():
-            controller.tick(delta_time)
+        try:
+            for controller in controllers.values():
+                controller.tick(delta_time)
+        except Exception:
+            print("Error in the simulation thread:")
+            traceback.print_exc()
 
         # Sleep to prevent 100% CPU usage and to control simulation speed
         # This effectively sets the simulation's "tick rate".
@@ -30,11 +39,22 @@ def simulation_loop(controllers: dict[int, ZoneController]):
     print("Simulation thread stopped.")
 
 
+def on_sim_thread(controllers: dict[int, ZoneController], action):
+    """Runs action on the simulation thread between ticks and returns its result."""
+    controller = next(iter(controllers.values()))
+    return controller.call_on_tick(action).result(timeout=SIM_THREAD_TIMEOUT_SECONDS)
+
+
 def load_scenario(controllers: dict[int, ZoneController], scenario_file: str):
     """Loads a scenario file and schedules all events on the correct controllers."""
     with open(scenario_file, 'r') as f:
         scenario = yaml.safe_load(f)
 
+    # A traffic-model scenario describes load parametrically instead of listing events.
+    if isinstance(scenario, dict) and 'traffic' in scenario:
+        load_traffic_model(controllers, scenario['traffic'])
+        return
+
     for item in scenario:
         zone_id = item.get('zone_id')
         controller = controllers.get(zone_id)
@@ -65,6 +85,39 @@ def load_scenario(controllers: dict[int, ZoneController], scenario_file: str):
             print(f"Warning: Unknown event type '{event_class_name}' in scenario file.")
 
 
+def reload_config(system: RadioSystem, controllers: dict[int, ZoneController], config_path: str) -> str:
+    """Applies a config file to the running system. Must run between ticks."""
+    delta = system.reload_config(config_path)
+    if delta is None:
+        return "Reload failed; the running configuration is unchanged."
+    for controller in controllers.values():
+        controller.apply_config_delta(delta)
+    router = next((c.router for c in controllers.values() if c.router), None)
+    if router:
+        router.inter_zone_latency = system.config.wacn.inter_zone_latency
+    return "\n".join(delta.changes) if delta.changes else "No configuration changes."
+
+
+def start_trace(controllers: dict[int, ZoneController], path: str) -> str:
+    recorder = next((c.trace_recorder for c in controllers.values() if c.trace_recorder), None)
+    if recorder:
+        return f"Already tracing to {recorder.path}."
+    recorder = TraceRecorder(path)
+    for controller in controllers.values():
+        controller.trace_recorder = recorder
+    return f"Tracing all zones to {recorder.path}."
+
+
+def stop_trace(controllers: dict[int, ZoneController]) -> str:
+    recorder = next((c.trace_recorder for c in controllers.values() if c.trace_recorder), None)
+    if not recorder:
+        return "Not tracing."
+    for controller in controllers.values():
+        controller.trace_recorder = None
+    recorder.close()
+    return f"Trace stopped. {recorder.records_written} events written to {recorder.path}."
+
+
 def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneController]):
     """Starts the simulation in a background thread and provides the CLI."""
     global simulation_running
@@ -77,11 +130,25 @@ def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneControlle
     print("\n--- Trunked Radio System Simulator ---")
     print("System is running live. Enter commands below or load a scenario.")
     print("Commands:")
-    print("  zone <zone_id> radio <id> on          - Powers on a unit in a specific zone.")
+    print("  zone <zone_id> radio <id> on|off      - Powers a unit in a specific zone on or off.")
+    print("  zone <zone_id> radio <id> emergency [tg] - Unit presses its emergency button.")
+    print("  zone <zone_id> radio <id> data <bytes> - Unit sends a packet data burst.")
     print("  zone <zone_id> info unit <id>         - Shows status of a unit in a zone.")
+    print("  zone <zone_id> info units [state <s>] [site <id>|<zone/id>] [talkgroup <tg>] [banned <id>]")
+    print("                                        - Lists units matching every filter, e.g. info units state affiliating.")
     print(
         "  zone <zone_id> info queue             - Shows the status of the event queues for a zone.")  # <-- New command
+    print("  zone <zone_id> info calls             - Shows active calls and call setup metrics for a zone.")
+    print("  zone <zone_id> info channels          - Shows voice slot usage and channel utilization per site.")
+    print("  zone <zone_id> info data              - Shows data sessions, queueing delay and data channel load.")
+    print("  zone <zone_id> info broadcasts        - Shows periodic control channel broadcasts sent per type.")
+    print("  zone <zone_id> info interference      - Shows reused frequencies and co-channel interference.")
+    print("  zone <zone_id> site <id> fail [jitter] - Fails a site; its units re-home over the jitter window.")
+    print("  zone <zone_id> site <id> restore      - Brings a failed site back online.")
+    print("  zone <zone_id> info rehoming          - Shows re-homing throughput and time to recover.")
     print("  load <filename.yaml>                  - Loads and schedules a scenario file.")
+    print("  reload [config.yaml]                  - Applies config changes to the running system.")
+    print("  trace start <filename> | trace stop   - Records all dispatched events to a binary trace.")
     print("  exit                                  - Shuts down the simulator.")
     print("------------------------------------")
 
@@ -99,6 +166,9 @@ def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneControlle
                 print("Shutting down simulation...")
                 simulation_running = False
                 time.sleep(0.5)  # Give the simulation thread a moment to stop
+                if system.store:
+                    system.store.close()
+                system.propagation.close()
                 sys.exit(0)
 
             elif action == "load":
@@ -106,6 +176,16 @@ def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneControlle
                 print(f"Loading scenario from {scenario_file}...")
                 load_scenario(controllers, scenario_file)
 
+            elif action == "reload":
+                config_path = parts[1] if len(parts) > 1 else system.config_path
+                print(on_sim_thread(controllers, lambda: reload_config(system, controllers, config_path)))
+
+            elif action == "trace":
+                if parts[1] == "start":
+                    print(on_sim_thread(controllers, lambda: start_trace(controllers, parts[2])))
+                elif parts[1] == "stop":
+                    print(on_sim_thread(controllers, lambda: stop_trace(controllers)))
+
             elif action == "zone":
                 zone_id = int(parts[1])
                 controller = controllers.get(zone_id)
@@ -117,17 +197,51 @@ def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneControlle
                 if cmd == "radio":
                     unit_id = int(parts[3])
                     if parts[4] == "on":
-                        controller.publish_event(UnitPowerOnRequest(unit_id=unit_id))
+                        controller.publish_event(UnitPowerOnCommand(unit_id=unit_id))
+                    elif parts[4] == "off":
+                        controller.publish_event(UnitPowerOffCommand(unit_id=unit_id))
+                    elif parts[4] == "emergency":
+                        talkgroup_id = int(parts[5]) if len(parts) > 5 else None
+                        controller.publish_event(UnitEmergencyAlarmCommand(unit_id=unit_id, talkgroup_id=talkgroup_id))
+                    elif parts[4] == "data":
+                        controller.publish_event(UnitSendDataCommand(unit_id=unit_id, payload_bytes=int(parts[5])))
+                elif cmd == "site":
+                    site_id = int(parts[3])
+                    if parts[4] == "fail":
+                        jitter = float(parts[5]) if len(parts) > 5 else None
+                        controller.publish_event(SiteFailCommand(site_id=site_id, jitter=jitter))
+                    elif parts[4] == "restore":
+                        controller.publish_event(SiteRestoreCommand(site_id=site_id))
                 elif cmd == "info":
                     info_type = parts[3]
                     if info_type == "unit":
-                        # ... (info unit logic) ...
-                        pass
+                        print(controller.get_unit_report(int(parts[4])))
+                    elif info_type == "units":
+                        print(f"Units matching '{' '.join(parts[4:]) or 'all'}':")
+                        print(on_sim_thread(controllers, lambda: controller.get_units_report(parts[4:])))
                     # --- ADD THIS BLOCK ---
                     elif info_type == "queue":
                         print(f"Queue Status for Zone {zone_id}:")
                         status_report = controller.get_queue_status()
                         print(status_report)
+                    elif info_type == "calls":
+                        print(f"Call Status for Zone {zone_id}:")
+                        print(controller.get_call_report())
+                    elif info_type == "channels":
+                        print(f"Voice Channels for Zone {zone_id}:")
+                        print(controller.get_channel_report())
+                    elif info_type == "data":
+                        print(f"Packet Data for Zone {zone_id}:")
+                        print(controller.get_data_report())
+                    elif info_type == "broadcasts":
+                        print(f"Control Channel Broadcasts for Zone {zone_id}:")
+                        print(controller.get_broadcast_report())
+                    elif info_type == "interference":
+                        print(f"Co-channel Interference for Zone {zone_id}:")
+                        print(controller.get_interference_report())
+                    elif info_type == "rehoming":
+                        print("Site Failure Re-homing (all zones):")
+                        print(system.rehoming.report())
                     # --------------------
             else:
                 print(f"Unknown command: '{action}'.")
@@ -138,6 +252,9 @@ def run_simulation_cli(system: RadioSystem, controllers: dict[int, ZoneControlle
             print("\nShutting down simulation...")
             simulation_running = False
             time.sleep(0.5)
+            if system.store:
+                system.store.close()
+            system.propagation.close()
             sys.exit(0)
         except Exception as e:
             print(f"An unexpected error occurred in the CLI loop: {e}")
@@ -150,9 +267,11 @@ if __name__ == "__main__":
 
     if radio_system.config:
         zone_controllers = {}
+        router = WacnRouter(inter_zone_latency=radio_system.config.wacn.inter_zone_latency)
         for zone_id in radio_system.config.wacn.zones.keys():
             print(f"Creating controller for Zone {zone_id}...")
             controller = ZoneController(radio_system, zone_id)
+            router.register(controller)
             controller.initialize_system()
             zone_controllers[zone_id] = controller
 
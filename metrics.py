@@ -0,0 +1,280 @@
+# metrics.py
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from p25.packets import EventPriority
+
+
+class LatencyStats:
+    """Collects latency samples (in sim seconds) and summarizes them."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    @property
+    def max(self) -> float:
+        return max(self.samples) if self.samples else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile, p in [0, 100]."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "n=0"
+        return (f"n={self.count} mean={self.mean * 1000:.1f}ms p95={self.percentile(95) * 1000:.1f}ms "
+                f"max={self.max * 1000:.1f}ms")
+
+
+class RunningStats:
+    """Count, mean and max without keeping samples, for per-event hot paths."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> str:
+        if not self.count:
+            return "n=0"
+        return f"n={self.count} mean={self.mean * 1000:.1f}ms max={self.max * 1000:.1f}ms"
+
+
+class CallMetrics:
+    """Call setup counters for one ZoneController."""
+
+    def __init__(self):
+        self.requests = 0
+        self.grants = 0
+        self.continuations = 0  # New talker on a call still in hangtime
+        self.queued = 0
+        self.blocked = 0  # Queued requests that timed out without a channel
+        self.ended = 0
+        self.setup_latency = LatencyStats()  # GRP_V_REQ received -> first grant delivered
+        self.queue_wait = LatencyStats()
+        self.emergency_alarms = 0
+        self.preemptions = 0  # Calls ended to free channels for higher-priority calls
+        self.alarm_to_grant = LatencyStats()  # EMRG_ALRM_REQ received -> emergency call grant delivered
+
+    @property
+    def blocking_rate(self) -> float:
+        """Fraction of new call requests that timed out in the busy queue without a channel."""
+        return self.blocked / self.requests if self.requests else 0.0
+
+    @property
+    def queue_rate(self) -> float:
+        """Fraction of new call requests that could not be granted immediately."""
+        return self.queued / self.requests if self.requests else 0.0
+
+    def report(self, elapsed_seconds: float) -> str:
+        rate = self.grants / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        return "\n".join([
+            f"  Emergency alarm -> grant: {self.alarm_to_grant.summary()}  "
+            f"(alarms: {self.emergency_alarms}, preemptions: {self.preemptions})",
+            f"  Requests: {self.requests}  Grants: {self.grants}  Continuations: {self.continuations}  "
+            f"Ended: {self.ended}",
+            f"  Queued: {self.queued} ({self.queue_rate:.1%})  Blocked: {self.blocked}  "
+            f"Blocking rate: {self.blocking_rate:.1%}",
+            f"  Grant throughput: {rate:.3f} calls/s",
+            f"  Setup latency: {self.setup_latency.summary()}",
+            f"  Queue wait: {self.queue_wait.summary()}",
+        ])
+
+
+class ChannelUsage:
+    """Grants and air time of one voice channel."""
+
+    def __init__(self, slots: int = 1):
+        self.slots = slots  # 2 for TDMA-capable channels
+        self.grants = 0
+        self.busy_seconds = 0.0  # Slot-seconds of finished holds; an FDMA call on a TDMA channel holds both
+
+
+class DataMetrics:
+    """SNDCP data service counters for one ZoneController."""
+
+    def __init__(self):
+        self.requests = 0
+        self.grants = 0
+        self.denied = 0  # No usable data channel on the unit's site
+        self.sessions_closed = 0
+        self.bursts = 0
+        self.payload_bytes = 0
+        self.dropped_bursts = 0  # Still queued when their session or request ended
+        self.queue_delay = LatencyStats()  # Burst queued -> sent on air; the first includes the channel grant
+        self.session_throughput: List[float] = []  # Payload bits/s of each closed session that sent data
+
+    def report(self) -> str:
+        throughput = self.session_throughput
+        if throughput:
+            per_session = (f"n={len(throughput)} mean={sum(throughput) / len(throughput):.0f}bps "
+                           f"min={min(throughput):.0f}bps max={max(throughput):.0f}bps")
+        else:
+            per_session = "n=0"
+        return "\n".join([
+            f"  Data requests: {self.requests}  Grants: {self.grants}  Denied: {self.denied}  "
+            f"Sessions closed: {self.sessions_closed}",
+            f"  Bursts: {self.bursts} ({self.payload_bytes} payload bytes), dropped: {self.dropped_bursts}",
+            f"  Queueing delay: {self.queue_delay.summary()}",
+            f"  Session throughput: {per_session}",
+        ])
+
+
+class RegistrationMetrics:
+    """Registration and affiliation outcomes for one ZoneController."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.failed = 0
+        self.affiliation_accepts = 0
+        self.affiliation_failures = 0  # Any AFF_DENY, AFF_FAIL or AFF_REFUSED
+        self.registration_time = LatencyStats()  # Power-on -> first REG_ACCEPT
+        self.neighbor_scans = 0  # Rescans settled among the current site's neighbors
+        self.full_scans = 0
+
+    def report(self) -> str:
+        return "\n".join([
+            f"  Registrations: {self.accepted} accepted, {self.failed} failed",
+            f"  Site scans: {self.neighbor_scans} neighbor-first, {self.full_scans} full",
+            f"  Affiliations: {self.affiliation_accepts} accepted, {self.affiliation_failures} failed",
+            f"  Registration time: {self.registration_time.summary()}",
+        ])
+
+
+class QueueMetrics:
+    """Event coalescing and overload counters for one ZoneController's event queue."""
+
+    def __init__(self):
+        self.coalesced = 0  # Duplicate pending commands that were merged
+        self.dropped = Counter()  # EventPriority -> events discarded under the "drop" policy
+        self.deferred = Counter()  # EventPriority -> events set aside under the "defer" policy
+        self.readmitted = 0
+        self.peak_length = 0
+        self.lane_lag: Dict[int, RunningStats] = {}  # Priority -> due time to dispatch, in sim seconds
+        self.budget_exhausted = 0  # Ticks that left lower-lane work for the next tick
+
+    def report(self) -> str:
+        def by_priority(counter: Counter) -> str:
+            return ", ".join(f"{priority.name}={count}" for priority, count in sorted(counter.items())) or "none"
+        return "\n".join([
+            f"  Coalesced: {self.coalesced}  Peak queue length: {self.peak_length}",
+            f"  Dropped: {by_priority(self.dropped)}",
+            f"  Deferred: {by_priority(self.deferred)} (readmitted {self.readmitted})",
+        ] + ([f"  Tick budget exhausted: {self.budget_exhausted} ticks"] if self.lane_lag else []) + [
+            f"  Lane lag {EventPriority(priority).name:<9}: {stats.summary()}"
+            for priority, stats in sorted(self.lane_lag.items())
+        ])
+
+
+class RehomeEpisode:
+    """Re-homing of the units that were registered on one failed site."""
+
+    def __init__(self, zone_id: int, site_id: int, failed_at: float, unit_ids: Iterable[int]):
+        self.zone_id = zone_id
+        self.site_id = site_id
+        self.failed_at = failed_at
+        self.pending = set(unit_ids)
+        self.total = len(self.pending)
+        self.rehomed = 0
+        self.stranded = 0  # Units that found no other usable site
+        self.rehome_time = LatencyStats()  # Site failure -> REG_ACCEPT on another site, per unit
+        self.recovered_at: Optional[float] = None  # Once every unit re-registered or gave up
+        self.restored_at: Optional[float] = None
+
+    @property
+    def time_to_recover(self) -> Optional[float]:
+        return None if self.recovered_at is None else self.recovered_at - self.failed_at
+
+    @property
+    def throughput(self) -> float:
+        """Units re-homed per second of sim time, up to recovery (or the last re-registration)."""
+        elapsed = self.rehome_time.max
+        return self.rehomed / elapsed if elapsed > 0 else 0.0
+
+    def _resolve(self, unit_id: int, now: float):
+        self.pending.discard(unit_id)
+        if not self.pending and self.recovered_at is None:
+            self.recovered_at = now
+
+    def summary(self) -> str:
+        recover = f"{self.time_to_recover:.2f}s" if self.recovered_at is not None else "in progress"
+        restored = f", restored after {self.restored_at - self.failed_at:.1f}s" if self.restored_at is not None else ""
+        return (f"  Site {self.site_id} (Zone {self.zone_id}) failed at T={self.failed_at:.2f}s{restored}: "
+                f"{self.rehomed}/{self.total} re-homed, {self.stranded} stranded, {len(self.pending)} pending. "
+                f"Time to recover: {recover}. Throughput: {self.throughput:.1f} units/s. "
+                f"Per unit: {self.rehome_time.summary()}")
+
+
+class RehomeMetrics:
+    """
+    System-wide tracker of units displaced by site failures. Shared by all zone
+    controllers, since a unit may re-home onto a site in another zone.
+    """
+
+    def __init__(self):
+        self.episodes: List[RehomeEpisode] = []
+        self._episode_by_unit: Dict[int, RehomeEpisode] = {}
+
+    def site_failed(self, zone_id: int, site_id: int, now: float, unit_ids: Iterable[int]) -> RehomeEpisode:
+        episode = RehomeEpisode(zone_id, site_id, now, unit_ids)
+        self.episodes.append(episode)
+        for unit_id in episode.pending:
+            self._episode_by_unit[unit_id] = episode
+        if not episode.pending:
+            episode.recovered_at = now
+        return episode
+
+    def site_restored(self, zone_id: int, site_id: int, now: float):
+        for episode in reversed(self.episodes):
+            if (episode.zone_id, episode.site_id) == (zone_id, site_id) and episode.restored_at is None:
+                episode.restored_at = now
+                return
+
+    def unit_registered(self, unit_id: int, now: float) -> Optional[RehomeEpisode]:
+        """Records a REG_ACCEPT. Returns the episode if this unit completed its recovery."""
+        episode = self._episode_by_unit.pop(unit_id, None)
+        if episode is None:
+            return None
+        episode.rehomed += 1
+        episode.rehome_time.add(now - episode.failed_at)
+        episode._resolve(unit_id, now)
+        return episode if not episode.pending else None
+
+    def unit_stranded(self, unit_id: int, now: float) -> Optional[RehomeEpisode]:
+        episode = self._episode_by_unit.pop(unit_id, None)
+        if episode is None:
+            return None
+        episode.stranded += 1
+        episode._resolve(unit_id, now)
+        return episode if not episode.pending else None
+
+    def report(self) -> str:
+        if not self.episodes:
+            return "  No site failures."
+        return "\n".join(episode.summary() for episode in self.episodes)
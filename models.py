@@ -1,11 +1,12 @@
 # tmga7/trunkterminal/trunkTerminal-17c921e61672f1a12e0888c6d82068578d9f6e2b/models.py
 from dataclasses import dataclass, field
-from typing import Dict, List, Union, Optional, Tuple, Set
+from typing import Any, Dict, List, Union, Optional, Tuple, Set
 from enum import Enum
 
 # --- Import EventPriority from our p25 packets ---
 from p25.packets import EventPriority
 from events import ControlChannelEstablishRequest
+from channel_allocator import SiteChannelAllocator
 from p25.control_status import (
     UnitRegistrationRequest,
     UnitRegistrationResponse,
@@ -55,6 +56,44 @@ class CallMode(Enum):
     MIXED = "MIXED"
 
 
+# --- Change Observation ---
+class Observable:
+    """
+    Mixin that reports assignments to a class's _watched_fields to observers
+    registered on the class. The notifying __setattr__ is only installed while
+    at least one observer exists, so unobserved objects pay nothing.
+    """
+    _watched_fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def add_observer(cls, callback):
+        """callback(obj, field_name, old_value, new_value) runs after each change of a watched field."""
+        if '_observers' not in cls.__dict__:
+            cls._observers = []
+        cls._observers.append(callback)
+        cls.__setattr__ = Observable._notifying_setattr
+
+    @classmethod
+    def remove_observer(cls, callback):
+        observers = cls.__dict__.get('_observers', [])
+        if callback in observers:
+            observers.remove(callback)
+        if not observers and '__setattr__' in cls.__dict__:
+            del cls.__setattr__
+
+    def _notifying_setattr(self, name, value):
+        if name not in self._watched_fields or name not in self.__dict__:
+            object.__setattr__(self, name, value)
+            return
+        old_value = self.__dict__[name]
+        object.__setattr__(self, name, value)
+        # Identity, not equality: comparing Sites or Units field by field is expensive and recursive.
+        if old_value is not value:
+            for cls in type(self).__mro__:
+                for callback in cls.__dict__.get('_observers', ()):
+                    callback(self, name, old_value, value)
+
+
 # --- Geographic Models ---
 @dataclass
 class Coordinates:
@@ -77,6 +116,7 @@ class Subsite:
     alias: str
     location: Coordinates
     operating_radius: float
+    antenna_height: float = 30.0  # Metres above ground; used by the path loss propagation models
 
 
 @dataclass
@@ -88,27 +128,44 @@ class Channel:
     fdma: bool
     tdma: bool
     control: bool = False
-    data: bool = False
+    data: bool = False  # Carries SNDCP packet data, shared with voice unless data_only
+    data_only: bool = False  # Dedicated data channel, kept out of the voice pool
     bsi: bool = False
+    bit_rate: Optional[int] = None  # Data channel bits/s (None uses the WACN data_bit_rate)
 
 
 @dataclass
-class Site:
+class Site(Observable):
+    _watched_fields = ('status',)
+
     id: int
     alias: str
     assignment_mode: str
+    enabled: bool = True  # A disabled site stays OFFLINE when initialized
     channels: Dict[int, Channel] = field(default_factory=dict)
     subsites: List[Subsite] = field(default_factory=list)
     status: SiteStatus = SiteStatus.OFFLINE
     control_channel: Channel = None
     registrations: List[Union['Unit', 'Console']] = field(default_factory=list)
-    assigned_voice_channels: Dict[int, 'RadioCall'] = field(default_factory=dict)
+    channel_allocator: SiteChannelAllocator = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if not self.subsites:
             raise ValueError(f"Site {self.id} ({self.alias}) must be initialized with at least one subsite.")
+        self.channel_allocator = SiteChannelAllocator(self.channels.values(), self.assignment_mode)
+
+    @property
+    def assigned_voice_channels(self) -> Dict[Tuple[int, int], 'RadioCall']:
+        """(channel_id, timeslot) -> call holding it. An FDMA call on a TDMA-capable channel holds both slots."""
+        return self.channel_allocator.assignments
 
     def initialize(self, zone_id: int) -> Optional[ControlChannelEstablishRequest]:
+        self.control_channel = None
+        self.channel_allocator.rebuild(self.channels.values(), self.assignment_mode)
+        if not self.enabled:
+            self.status = SiteStatus.OFFLINE
+            print(f"  -> Site {self.id} ({self.alias}): OFFLINE (Disabled in configuration).")
+            return None
         enabled_channels = [c for c in self.channels.values() if c.enabled]
         if not enabled_channels:
             self.status = SiteStatus.FAILED
@@ -119,7 +176,7 @@ class Site:
             self.status = SiteStatus.FAILED
             print(f"  -> Site {self.id} ({self.alias}): FAILED (No suitable control channel).")
             return None
-        voice_channels = [c for c in enabled_channels if not c.control and (c.fdma or c.tdma)]
+        voice_channels = [c for c in enabled_channels if not c.control and not c.data_only and (c.fdma or c.tdma)]
         if not voice_channels:
             self.status = SiteStatus.FAILED
             print(f"  -> Site {self.id} ({self.alias}): FAILED (No suitable voice channel).")
@@ -133,9 +190,28 @@ class Site:
             channel_id=self.control_channel.id
         )
 
-    def has_available_voice_channel(self) -> bool:
-        total_voice_channels = len([c for c in self.channels.values() if not c.control and c.enabled])
-        return len(self.assigned_voice_channels) < total_voice_channels
+    def deregister(self, unit: 'Unit') -> bool:
+        """Removes a unit from the registration table. Returns True if it was registered here."""
+        for index, registered in enumerate(self.registrations):
+            if registered is unit:
+                del self.registrations[index]
+                return True
+        return False
+
+    def has_available_voice_channel(self, tdma: bool = False) -> bool:
+        return self.channel_allocator.can_assign(tdma)
+
+    def assign_voice_channel(self, call: 'RadioCall', tdma: bool = False,
+                             now: float = 0.0) -> Optional[Tuple[Channel, Optional[int]]]:
+        """Reserves a TDMA timeslot or a whole FDMA channel for a call. Returns (channel, slot)."""
+        assigned = self.channel_allocator.assign(call, tdma, now)
+        if assigned is None:
+            return None
+        channel_id, slot = assigned
+        return self.channels[channel_id], slot
+
+    def release_voice_channel(self, channel_id: int, slot: Optional[int] = None, now: float = 0.0):
+        self.channel_allocator.release(channel_id, slot, now)
 
 
 # --- Logical Resource Models (Units, TGs) ---
@@ -167,34 +243,49 @@ class Talkgroup:
                 self.mode = CallMode.MIXED
 
 @dataclass
-class Unit:
+class Unit(Observable):
     """Represents a radio subscriber unit with its own state machine."""
+    _watched_fields = ('state', 'current_site', 'current_zone_id', 'affiliated_talkgroup', 'banned_sites')
+
     id: int
     alias: str
     tdma_capable: bool
     state: UnitState = UnitState.POWERED_OFF
     location: Optional[Coordinates] = None
     current_site: Optional[Site] = None
+    current_zone_id: Optional[int] = None  # Zone that owns current_site, which may differ from the home zone
     visible_sites: List[Tuple[Site, int]] = field(default_factory=list)
     selected_talkgroup: Optional[Talkgroup] = None
     affiliated_talkgroup: Optional[Talkgroup] = None
     groups: List['Group'] = field(default_factory=list)
-    banned_sites: Set[Tuple[int, int]] = field(default_factory=set)  # CHANGED: Now stores (zone_id, site_id)
+    banned_sites: Set[Tuple[int, int]] = field(default_factory=set)  # (zone_id, site_id); reassigned, not mutated, so observers see bans
     banned_talkgroups: Set[int] = field(default_factory=set)
     affiliation_attempts: Dict[int, int] = field(default_factory=dict)
+    powered_on_at: Optional[float] = None  # Sim time of the last power-on, until the first REG_ACCEPT
+    last_site_key: Optional[Tuple[int, int]] = None  # (zone_id, site_id) left by a rescan; anchors the next scan
 
     def power_on(self) -> None:
         """Initiates the power-on sequence."""
         if self.state == UnitState.POWERED_OFF:
             self.state = UnitState.SEARCHING_FOR_SITE
             # Reset transient states upon power on
-            self.banned_sites.clear()
+            self.banned_sites = set()
             self.banned_talkgroups.clear()
             self.affiliation_attempts.clear()
             self.current_site = None
+            self.current_zone_id = None
             self.affiliated_talkgroup = None
             print(f"  -> Unit {self.id} ({self.alias}): Powered ON. State: {self.state.value}.")
 
+    def power_off(self) -> None:
+        """Powers the unit down, forgetting its site and affiliation."""
+        if self.state != UnitState.POWERED_OFF:
+            self.state = UnitState.POWERED_OFF
+            self.current_site = None
+            self.current_zone_id = None
+            self.affiliated_talkgroup = None
+            print(f"  -> Unit {self.id} ({self.alias}): Powered OFF.")
+
     def handle_registration_response(self, response: UnitRegistrationResponse) -> Optional[GroupAffiliationRequest]:
         """
         Handles the system's response to a registration request based on P25 logic.
@@ -212,7 +303,7 @@ class Unit:
         else:  # Any other status is a failure of some kind
             self.state = UnitState.SEARCHING_FOR_SITE
             ban_tuple = (response.zone_id, response.site_id)
-            self.banned_sites.add(ban_tuple)
+            self.banned_sites = self.banned_sites | {ban_tuple}
 
             if response.status == RegistrationStatus.REG_DENY:
                 print(
@@ -259,7 +350,7 @@ class Unit:
             self.state = UnitState.SEARCHING_FOR_SITE  # Per standard, hunt for a new site
             if self.current_site:
                 ban_tuple = (response.zone_id, self.current_site.id)
-                self.banned_sites.add(ban_tuple)
+                self.banned_sites = self.banned_sites | {ban_tuple}
             print(
                 f"  -> Unit {self.id} ({self.alias}): AFF_DENY. Not authorized for TG {tg_id} on this site. Banning site and hunting for new site...")
 
@@ -281,6 +372,7 @@ class Console(Unit):
     can_patch_talkgroups: bool = True
     can_inhibit_units: bool = True
     tdma_capable: bool = True
+    active_emergencies: List[Tuple[int, int]] = field(default_factory=list)  # (unit_id, talkgroup_id) alarms shown
 
     def __post_init__(self):
         self.tdma_capable = True
@@ -305,6 +397,18 @@ class RadioCall:
     involved_sites: List[Site]
     status: CallStatus = CallStatus.IDLE
     mode: CallMode = CallMode.TDMA
+    priority: EventPriority = EventPriority.NORMAL
+    zone_id: int = 0  # Zone whose controller owns the call
+    channels: Dict[Tuple[int, int], int] = field(default_factory=dict)  # (zone_id, site_id) -> channel id
+    slots: Dict[Tuple[int, int], int] = field(default_factory=dict)  # (zone_id, site_id) -> TDMA timeslot; absent for FDMA
+    requested_at: float = 0.0
+    granted_at: Optional[float] = None
+    transmission_count: int = 1  # Bumped on every new PTT; stale teardowns compare against it
+    alarm_at: Optional[float] = None  # Time of the emergency alarm that brought the call up, until granted
+
+    @property
+    def setup_latency(self) -> Optional[float]:
+        return None if self.granted_at is None else self.granted_at - self.requested_at
 
     def start(self):
         self.status = CallStatus.ACTIVE
@@ -333,6 +437,14 @@ class WACN:
     id: int
     zones: Dict[int, RFSS]
     area: Optional[OperationalArea] = None
+    inter_zone_latency: float = 0.05  # Seconds for an event to cross between zone controllers
+    zone_queue_capacity: Optional[int] = None  # Max pending events per zone controller; None is unbounded
+    overload_policy: str = "defer"  # What happens to shed events at capacity: "defer" or "drop"
+    tick_budget_ms: Optional[float] = None  # Wall-clock event processing budget per tick; None is unlimited
+    data_bit_rate: int = 9600  # Bits/s of a data channel without its own bit_rate
+    broadcast_periods: Dict[str, Optional[float]] = field(default_factory=dict)  # Overrides per broadcast type
+    store_path: Optional[str] = None  # SQLite file for registrations and affiliations; None keeps them in memory only
+    propagation: Dict[str, Any] = field(default_factory=dict)  # Propagation model settings; empty is the linear model
 
 
 @dataclass
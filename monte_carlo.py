@@ -0,0 +1,173 @@
+# monte_carlo.py
+"""
+Headless Monte Carlo runner. Runs N independently seeded replications of a
+scenario across a process pool and reports KPI means with 95% confidence intervals.
+
+Usage:
+    python monte_carlo.py --scenario traffic_scenario.yaml -n 16 --duration 600
+    python monte_carlo.py --scenario traffic_scenario.yaml --assignment-mode balanced
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import yaml
+
+from controller import ZoneController
+from radio_system import RadioSystem
+from traffic import load_traffic_model
+from zone_router import WacnRouter
+
+# --- Constants ---
+DEFAULT_TICK_SECONDS = 0.1
+
+# Two-sided 95% Student's t critical values by degrees of freedom. Above 30 the normal value is close enough.
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+    20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042,
+}
+
+KPI_NAMES = [
+    "emergency_alarm_to_grant_s",
+    "registration_time_s",
+    "registrations",
+    "affiliation_failures",
+    "call_requests",
+    "call_blocking_rate",
+    "call_queue_rate",
+    "queue_wait_s",
+    "setup_latency_s",
+    "channel_use_spread",
+    "data_queue_delay_s",
+    "data_channel_utilization",
+]
+
+
+def run_replication(config_path: str, scenario_path: str, seed: int, duration: float,
+                    tick_seconds: float = DEFAULT_TICK_SECONDS, assignment_mode: str = None) -> Dict[str, float]:
+    """
+    Runs one seeded replication to completion and returns its KPIs. assignment_mode,
+    if given, overrides every site's channel assignment strategy.
+    """
+    # Placement and fading use the module-level random generator.
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = RadioSystem(config_path=config_path)
+        if not system.config:
+            raise RuntimeError(f"Could not load configuration from {config_path}.")
+        router = WacnRouter(inter_zone_latency=system.config.wacn.inter_zone_latency)
+        controllers = {}
+        for zone_id in system.config.wacn.zones.keys():
+            if assignment_mode:
+                for site in system.config.wacn.zones[zone_id].sites.values():
+                    site.assignment_mode = assignment_mode
+            controller = ZoneController(system, zone_id)
+            router.register(controller)
+            controller.initialize_system()
+            controllers[zone_id] = controller
+
+        with open(scenario_path, "r") as f:
+            scenario = yaml.safe_load(f)
+        if isinstance(scenario, dict) and "traffic" in scenario:
+            traffic = dict(scenario["traffic"], seed=seed)
+            load_traffic_model(controllers, traffic)
+        else:
+            from main import load_scenario
+            load_scenario(controllers, scenario_path)
+
+        for _ in range(int(math.ceil(duration / tick_seconds))):
+            for controller in controllers.values():
+                controller.tick(tick_seconds)
+
+    registration_times, queue_waits, setup_latencies, alarm_to_grant, spreads = [], [], [], [], []
+    data_delays, data_utilizations = [], []
+    kpis = dict.fromkeys(KPI_NAMES, 0.0)
+    queued = blocked = 0
+    for controller in controllers.values():
+        registration_times += controller.registration_metrics.registration_time.samples
+        queue_waits += controller.call_metrics.queue_wait.samples
+        setup_latencies += controller.call_metrics.setup_latency.samples
+        alarm_to_grant += controller.call_metrics.alarm_to_grant.samples
+        kpis["registrations"] += controller.registration_metrics.accepted
+        kpis["affiliation_failures"] += controller.registration_metrics.affiliation_failures
+        kpis["call_requests"] += controller.call_metrics.requests
+        queued += controller.call_metrics.queued
+        blocked += controller.call_metrics.blocked
+        data_delays += controller.data_service.metrics.queue_delay.samples
+        data_utilizations += [channel.utilization(controller.current_time)
+                              for channel in controller.data_service.channels()]
+        for site in system.config.wacn.zones[controller.zone_id].sites.values():
+            if site.channel_allocator.peak_calls:
+                spreads.append(site.channel_allocator.utilization_spread(controller.current_time))
+    # Per-event means are NaN without samples, so print_report leaves the replication out instead of averaging in 0.
+    kpis["registration_time_s"] = statistics.fmean(registration_times) if registration_times else math.nan
+    kpis["queue_wait_s"] = statistics.fmean(queue_waits) if queue_waits else math.nan
+    kpis["setup_latency_s"] = statistics.fmean(setup_latencies) if setup_latencies else math.nan
+    kpis["emergency_alarm_to_grant_s"] = statistics.fmean(alarm_to_grant) if alarm_to_grant else math.nan
+    kpis["channel_use_spread"] = statistics.fmean(spreads) if spreads else 0.0
+    kpis["data_queue_delay_s"] = statistics.fmean(data_delays) if data_delays else math.nan
+    kpis["data_channel_utilization"] = statistics.fmean(data_utilizations) if data_utilizations else 0.0
+    # Blocked: timed out in the busy queue. Queued: could not be granted at once, whether or not it got a channel later.
+    kpis["call_blocking_rate"] = blocked / kpis["call_requests"] if kpis["call_requests"] else 0.0
+    kpis["call_queue_rate"] = queued / kpis["call_requests"] if kpis["call_requests"] else 0.0
+    return kpis
+
+
+def confidence_interval(values: List[float]) -> tuple:
+    """Returns (mean, 95% CI half-width) of the replication values."""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, 0.0
+    t = T_CRITICAL_95.get(len(values) - 1, 1.96)
+    return mean, t * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def run_replications(config_path: str, scenario_path: str, replications: int, base_seed: int,
+                     duration: float, tick_seconds: float = DEFAULT_TICK_SECONDS,
+                     workers: int = None, assignment_mode: str = None) -> List[Dict[str, float]]:
+    """Runs every replication on a process pool. Results are in seed order, so output is reproducible."""
+    seeds = [base_seed + i for i in range(replications)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(run_replication, [config_path] * replications, [scenario_path] * replications,
+                             seeds, [duration] * replications, [tick_seconds] * replications,
+                             [assignment_mode] * replications))
+
+
+def print_report(results: List[Dict[str, float]]):
+    """N is the number of replications behind each KPI; sampled KPIs skip replications with no samples."""
+    print(f"\n--- Monte Carlo Results ({len(results)} replications) ---")
+    print(f"| {'KPI':<26} | {'N':>4} | {'Mean':>12} | {'95% CI +/-':>12} | {'Min':>12} | {'Max':>12} |")
+    for name in KPI_NAMES:
+        values = [result[name] for result in results if not math.isnan(result[name])]
+        if not values:
+            print(f"| {name:<26} | {0:>4} | {'n/a':>12} | {'n/a':>12} | {'n/a':>12} | {'n/a':>12} |")
+            continue
+        mean, half_width = confidence_interval(values)
+        print(f"| {name:<26} | {len(values):>4} | {mean:>12.4f} | {half_width:>12.4f} | "
+              f"{min(values):>12.4f} | {max(values):>12.4f} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run independently seeded replications of a scenario.")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--scenario", default="traffic_scenario.yaml")
+    parser.add_argument("-n", "--replications", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the first replication.")
+    parser.add_argument("--duration", type=float, default=600.0, help="Sim seconds per replication.")
+    parser.add_argument("--tick", type=float, default=DEFAULT_TICK_SECONDS, help="Sim seconds per tick.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--assignment-mode", default=None,
+                        help="Channel assignment strategy for every site: lowest_id, rotating or balanced.")
+    args = parser.parse_args()
+
+    replication_results = run_replications(args.config, args.scenario, args.replications, args.seed,
+                                           args.duration, args.tick, args.workers, args.assignment_mode)
+    print_report(replication_results)
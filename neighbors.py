@@ -0,0 +1,80 @@
+# neighbors.py
+from typing import Dict, List, Set, Tuple
+
+from geo_utils import get_distance
+from models import Site, SiteStatus
+from p25.control_status import AdjacentStatusBroadcast
+
+# --- Constants ---
+# Sites whose coverage circles come this close (or overlap) are neighbors, so a
+# unit at the edge of one site's coverage can hand off to the next.
+NEIGHBOR_MARGIN_KM = 1.0
+
+SiteKey = Tuple[int, int]  # (zone_id, site_id)
+
+
+class NeighborIndex:
+    """
+    WACN-wide adjacent-site lists, computed from subsite coverage on first use
+    and cached. A reverse index drops exactly the lists a reconfigured site
+    appears in (or will appear in) when RadioSystem reports a site change.
+    """
+
+    def __init__(self, radio_system, margin_km: float = NEIGHBOR_MARGIN_KM):
+        self.radio_system = radio_system
+        self.margin_km = margin_km
+        self._neighbors: Dict[SiteKey, List[Tuple[int, Site]]] = {}
+        self._listed_by: Dict[SiteKey, Set[SiteKey]] = {}  # Site -> cached sites that list it as a neighbor
+        radio_system.on_site_changed(self.invalidate)
+
+    def neighbors(self, zone_id: int, site_id: int) -> List[Tuple[int, Site]]:
+        """(zone_id, site) of every site adjacent to this one, nearest first."""
+        key = (zone_id, site_id)
+        cached = self._neighbors.get(key)
+        if cached is None:
+            site = self.radio_system.get_site(site_id, zone_id)
+            cached = self._compute(key, site) if site else []
+            self._neighbors[key] = cached
+            for neighbor_zone_id, neighbor in cached:
+                self._listed_by.setdefault((neighbor_zone_id, neighbor.id), set()).add(key)
+        return cached
+
+    def _compute(self, key: SiteKey, site: Site) -> List[Tuple[int, Site]]:
+        reach = max(subsite.operating_radius for subsite in site.subsites) + self.margin_km
+        found = []
+        for zone in self.radio_system.zones_near([subsite.location for subsite in site.subsites], reach):
+            for other in zone.sites.values():
+                if (zone.id, other.id) == key:
+                    continue
+                gap = min(get_distance(a.location, b.location) - a.operating_radius - b.operating_radius
+                          for a in site.subsites for b in other.subsites)
+                if gap < self.margin_km:
+                    found.append((gap, zone.id, other))
+        found.sort(key=lambda entry: (entry[0], entry[1], entry[2].id))
+        return [(zone_id, other) for _, zone_id, other in found]
+
+    def invalidate(self, zone_id: int, site_id: int):
+        """Forgets every list the site is in, its own list, and the lists it will join."""
+        key = (zone_id, site_id)
+        stale = {key} | self._listed_by.pop(key, set())
+        site = self.radio_system.get_site(site_id, zone_id)
+        if site is not None:
+            stale |= {(neighbor_zone_id, neighbor.id) for neighbor_zone_id, neighbor in self._compute(key, site)}
+        for stale_key in stale:
+            for neighbor_zone_id, neighbor in self._neighbors.pop(stale_key, ()):
+                listed_by = self._listed_by.get((neighbor_zone_id, neighbor.id))
+                if listed_by is not None:
+                    listed_by.discard(stale_key)
+                    if not listed_by:
+                        del self._listed_by[(neighbor_zone_id, neighbor.id)]
+
+    def adjacent_status_broadcasts(self, zone_id: int, site: Site) -> List[AdjacentStatusBroadcast]:
+        """One ADJ_STS_BCST per neighbor, to be sent on this site's control channel."""
+        return [AdjacentStatusBroadcast(
+            zone_id=zone_id,
+            site_id=site.id,
+            adjacent_zone_id=neighbor_zone_id,
+            adjacent_site_id=neighbor.id,
+            channel_id=neighbor.control_channel.id if neighbor.control_channel else 0,
+            active=neighbor.status == SiteStatus.ONLINE
+        ) for neighbor_zone_id, neighbor in self.neighbors(zone_id, site.id)]
@@ -1,7 +1,7 @@
 # tmga7/trunkterminal/trunkTerminal-17c921e61672f1a12e0888c6d82068578d9f6e2b/p25/control_status.py
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 from .packets import InboundSignalingPacket, OutboundSignalingPacket, EventPriority
 
 # --- Control & Status ISPs (Unit -> System) ---
@@ -38,8 +38,10 @@ class CancelServiceRequest(InboundSignalingPacket):
 
 @dataclass
 class EmergencyAlarmRequest(InboundSignalingPacket):
-    """P25 EMRG_ALRM_REQ"""
-    pass
+    """P25 EMRG_ALRM_REQ: A unit declares an emergency on a talkgroup."""
+    talkgroup_id: int
+    priority: EventPriority = EventPriority.EMERGENCY
+    sent_at: Optional[float] = None  # Sim time the unit sent it (not on the wire); None counts from handling
 
 
 @dataclass
@@ -160,14 +162,22 @@ class AffiliationStatus(Enum):
 
 @dataclass
 class AcknowledgeResponseFne(OutboundSignalingPacket):
-    """P25 ACK_RSP_FNE"""
-    pass
+    """P25 ACK_RSP_FNE: Acknowledges an ISP; service_type is the opcode of the ISP acknowledged."""
+    unit_id: int
+    service_type: int
+    priority: EventPriority = EventPriority.EMERGENCY
 
 
 @dataclass
 class AdjacentStatusBroadcast(OutboundSignalingPacket):
-    """P25 ADJ_STS_BCST"""
-    pass
+    """P25 ADJ_STS_BCST: Announces one adjacent site on the control channel of site_id."""
+    zone_id: int
+    site_id: int
+    adjacent_zone_id: int  # RFSS id of the adjacent site
+    adjacent_site_id: int
+    channel_id: int  # Control channel of the adjacent site
+    active: bool = True  # False while the adjacent site is down
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
@@ -224,8 +234,12 @@ class MessageUpdate(OutboundSignalingPacket):
 
 @dataclass
 class NetworkStatusBroadcast(OutboundSignalingPacket):
-    """P25 NET_STS_BCST"""
-    pass
+    """P25 NET_STS_BCST: Identifies the WACN and system on the control channel of site_id."""
+    wacn_id: int
+    zone_id: int  # System id
+    site_id: int
+    channel_id: int  # Control channel carrying the broadcast
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
@@ -248,8 +262,12 @@ class QueuedResponse(OutboundSignalingPacket):
 
 @dataclass
 class RfssStatusBroadcast(OutboundSignalingPacket):
-    """P25 RFSS_STS_BCST"""
-    pass
+    """P25 RFSS_STS_BCST: Identifies the RFSS and site on the site's control channel."""
+    zone_id: int
+    site_id: int
+    channel_id: int  # Control channel carrying the broadcast
+    active: bool = True  # Site is connected to its RFSS controller
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
@@ -272,8 +290,12 @@ class StatusUpdate(OutboundSignalingPacket):
 
 @dataclass
 class SystemServiceBroadcast(OutboundSignalingPacket):
-    """P25 SYS_SRV_BCST"""
-    pass
+    """P25 SYS_SRV_BCST: The services the system supports and the site currently offers."""
+    zone_id: int
+    site_id: int
+    services_available: int  # Bit set of services offered on this site right now
+    services_supported: int  # Bit set of services the system implements
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
@@ -322,8 +344,11 @@ class RoamingAddressUpdate(OutboundSignalingPacket):
 
 @dataclass
 class TimeAndDateAnnouncement(OutboundSignalingPacket):
-    """P25 TIME_DATE_ANN"""
-    pass
+    """P25 TIME_DATE_ANN: System time, as POSIX seconds, for units to set their clocks."""
+    zone_id: int
+    site_id: int
+    timestamp: int
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
@@ -5,8 +5,9 @@ from .packets import InboundSignalingPacket, OutboundSignalingPacket, EventPrior
 
 @dataclass
 class SndcpDataChannelRequest(InboundSignalingPacket):
-    """P25 SN-DATA_CHN_REQ"""
-    pass
+    """P25 SN-DATA_CHN_REQ: A unit with queued data asks for a data channel."""
+    nsapi: int = 1  # Network service access point of the unit's SNDCP context
+    priority: EventPriority = EventPriority.NORMAL
 
 
 @dataclass
@@ -25,8 +26,12 @@ class SndcpReconnectRequest(InboundSignalingPacket):
 
 @dataclass
 class SndcpDataChannelGrant(OutboundSignalingPacket):
-    """P25 SN-DATA_CHN_GNT"""
-    pass
+    """P25 SN-DATA_CHN_GNT: Moves a unit onto a shared data channel of its site."""
+    unit_id: int
+    channel_id: int
+    site_id: int
+    zone_id: int
+    priority: EventPriority = EventPriority.NORMAL
 
 
 @dataclass
@@ -0,0 +1,233 @@
+"""
+Binary codec for P25 Trunking Signaling Blocks (TSBK).
+
+A TSBK is 12 bytes:
+    octet 0     LB (1 bit) | P (1 bit) | opcode (6 bits)
+    octet 1     manufacturer ID (MFID)
+    octets 2-9  64 bits of opcode-specific arguments
+    octets 10-11 CRC-CCITT over octets 0-9, ones' complemented
+
+Argument layouts follow TIA-102.AABC where the simulation's packet carries the
+same information. Simulation-only fields that have no place in the 64-bit
+argument field (e.g. a grant's call id) are not encoded and decode as 0.
+ISPs and OSPs share opcode numbers, so every decode call names the direction.
+"""
+import binascii
+import struct
+from dataclasses import MISSING, fields
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from .packets import InboundSignalingPacket, P25Packet
+from .control_status import (
+    AcknowledgeResponseFne,
+    AdjacentStatusBroadcast,
+    EmergencyAlarmRequest,
+    GroupAffiliationRequest,
+    GroupAffiliationResponse,
+    NetworkStatusBroadcast,
+    RfssStatusBroadcast,
+    SystemServiceBroadcast,
+    TimeAndDateAnnouncement,
+    UnitRegistrationRequest,
+    UnitRegistrationResponse,
+)
+from .data_service import SndcpDataChannelGrant, SndcpDataChannelRequest
+from .voice_service import (
+    GroupVoiceChannelGrant,
+    GroupVoiceChannelGrantUpdate,
+    GroupVoiceServiceRequest,
+)
+
+TSBK_SIZE = 12
+TSBK_STRUCT = struct.Struct(">BBQH")  # opcode octet, MFID, arguments, CRC
+HEADER_AND_ARGS_SIZE = 10
+LAST_BLOCK_FLAG = 0x80
+OPCODE_MASK = 0x3F
+STANDARD_MFID = 0x00
+ARGUMENT_BITS = 64
+
+
+class TsbkError(ValueError):
+    """Raised for frames that cannot be decoded."""
+    pass
+
+
+def tsbk_crc(data) -> int:
+    """P25 TSBK CRC: CRC-CCITT (poly 0x1021, init 0) of octets 0-9, ones' complemented."""
+    return binascii.crc_hqx(data, 0) ^ 0xFFFF
+
+
+class TsbkLayout:
+    """Maps one packet class to an opcode and a bit layout of its argument field."""
+
+    def __init__(self, packet_type: Type[P25Packet], opcode: int, layout: Sequence[Tuple[str, int]],
+                 mfid: int = STANDARD_MFID):
+        total_bits = sum(bits for _, bits in layout)
+        if total_bits > ARGUMENT_BITS:
+            raise ValueError(f"{packet_type.__name__} layout uses {total_bits} bits, TSBK arguments hold 64.")
+        self.packet_type = packet_type
+        self.opcode = opcode
+        self.mfid = mfid
+        self.inbound = issubclass(packet_type, InboundSignalingPacket)
+
+        field_types = {f.name: f.type for f in fields(packet_type)}
+        self._fields = []  # (name, shift, mask, enum members or None); enums travel as member index
+        self._enum_codes: Dict[str, Dict[Enum, int]] = {}
+        shift = ARGUMENT_BITS
+        for name, bits in layout:
+            shift -= bits
+            field_type = field_types[name]
+            members = list(field_type) if isinstance(field_type, type) and issubclass(field_type, Enum) else None
+            if members is not None:
+                self._enum_codes[name] = {member: code for code, member in enumerate(members)}
+            self._fields.append((name, shift, (1 << bits) - 1, members))
+
+        # Fields with no default that the wire does not carry decode as 0.
+        encoded = {name for name, _ in layout}
+        self._missing = {f.name: 0 for f in fields(packet_type)
+                         if f.name not in encoded and f.default is MISSING and f.default_factory is MISSING}
+
+    def pack_arguments(self, packet: P25Packet) -> int:
+        arguments = 0
+        for name, shift, mask, members in self._fields:
+            value = getattr(packet, name)
+            if members is not None:
+                value = self._enum_codes[name][value]
+            if not 0 <= value <= mask:
+                raise TsbkError(f"{self.packet_type.__name__}.{name}={value} does not fit in its TSBK field.")
+            arguments |= value << shift
+        return arguments
+
+    def unpack_arguments(self, arguments: int) -> P25Packet:
+        kwargs = dict(self._missing)
+        for name, shift, mask, members in self._fields:
+            value = (arguments >> shift) & mask
+            if members is not None:
+                if value >= len(members):
+                    raise TsbkError(f"{self.packet_type.__name__}.{name} code {value} is out of range.")
+                value = members[value]
+            kwargs[name] = value
+        return self.packet_type(**kwargs)
+
+
+_LAYOUTS_BY_TYPE: Dict[type, TsbkLayout] = {}
+_INBOUND_BY_OPCODE: Dict[Tuple[int, int], TsbkLayout] = {}
+_OUTBOUND_BY_OPCODE: Dict[Tuple[int, int], TsbkLayout] = {}
+
+
+def register_layout(packet_type: Type[P25Packet], opcode: int, layout: Sequence[Tuple[str, int]],
+                    mfid: int = STANDARD_MFID):
+    """Registers the TSBK encoding of a packet class."""
+    tsbk_layout = TsbkLayout(packet_type, opcode, layout, mfid)
+    _LAYOUTS_BY_TYPE[packet_type] = tsbk_layout
+    table = _INBOUND_BY_OPCODE if tsbk_layout.inbound else _OUTBOUND_BY_OPCODE
+    table[(opcode, mfid)] = tsbk_layout
+
+
+# --- ISPs (Unit -> System) ---
+register_layout(GroupVoiceServiceRequest, 0x00,
+                [("priority", 8), ("talkgroup_id", 16), ("unit_id", 24)])
+register_layout(SndcpDataChannelRequest, 0x12,
+                [("priority", 8), ("nsapi", 8), ("unit_id", 24)])
+register_layout(GroupAffiliationRequest, 0x28,
+                [("priority", 8), ("talkgroup_id", 16), ("unit_id", 24)])
+register_layout(EmergencyAlarmRequest, 0x27,
+                [("priority", 8), ("talkgroup_id", 16), ("unit_id", 24)])
+register_layout(UnitRegistrationRequest, 0x2C,
+                [("priority", 8), ("site_id", 16), ("unit_id", 24)])
+
+# --- OSPs (System -> Unit) ---
+register_layout(GroupVoiceChannelGrant, 0x00,
+                [("priority", 8), ("channel_id", 16), ("talkgroup_id", 16), ("unit_id", 24)])
+register_layout(GroupVoiceChannelGrantUpdate, 0x02,
+                [("channel_id", 16), ("talkgroup_id", 16), ("site_id", 16), ("zone_id", 16)])
+register_layout(SndcpDataChannelGrant, 0x14,
+                [("channel_id", 16), ("zone_id", 8), ("site_id", 8), ("unit_id", 24)])
+register_layout(AcknowledgeResponseFne, 0x20,
+                [("service_type", 6), ("unit_id", 24)])
+register_layout(GroupAffiliationResponse, 0x28,
+                [("status", 4), ("priority", 4), ("zone_id", 16), ("talkgroup_id", 16), ("unit_id", 24)])
+register_layout(UnitRegistrationResponse, 0x2C,
+                [("status", 4), ("priority", 4), ("zone_id", 16), ("site_id", 16), ("unit_id", 24)])
+register_layout(TimeAndDateAnnouncement, 0x35,
+                [("timestamp", 32), ("zone_id", 8), ("site_id", 8)])
+register_layout(SystemServiceBroadcast, 0x38,
+                [("services_available", 24), ("services_supported", 24), ("zone_id", 8), ("site_id", 8)])
+register_layout(RfssStatusBroadcast, 0x3A,
+                [("active", 1), ("zone_id", 8), ("site_id", 8), ("channel_id", 16)])
+register_layout(NetworkStatusBroadcast, 0x3B,
+                [("wacn_id", 20), ("zone_id", 12), ("channel_id", 16), ("site_id", 8)])
+register_layout(AdjacentStatusBroadcast, 0x3C,
+                [("active", 1), ("adjacent_zone_id", 8), ("adjacent_site_id", 8), ("channel_id", 16),
+                 ("zone_id", 8), ("site_id", 8)])
+
+
+def is_encodable(packet: P25Packet) -> bool:
+    return type(packet) in _LAYOUTS_BY_TYPE
+
+
+def encode_into(packet: P25Packet, buffer, offset: int = 0):
+    """Writes one 12-byte TSBK for the packet into buffer at offset."""
+    layout = _LAYOUTS_BY_TYPE.get(type(packet))
+    if layout is None:
+        raise TsbkError(f"No TSBK encoding for {type(packet).__name__}.")
+    TSBK_STRUCT.pack_into(buffer, offset, LAST_BLOCK_FLAG | layout.opcode, layout.mfid,
+                          layout.pack_arguments(packet), 0)
+    view = memoryview(buffer)
+    struct.pack_into(">H", buffer, offset + HEADER_AND_ARGS_SIZE,
+                     tsbk_crc(view[offset:offset + HEADER_AND_ARGS_SIZE]))
+
+
+def encode(packet: P25Packet) -> bytes:
+    frame = bytearray(TSBK_SIZE)
+    encode_into(packet, frame)
+    return bytes(frame)
+
+
+def encode_batch(packets: Sequence[P25Packet], buffer: Optional[bytearray] = None, offset: int = 0) -> memoryview:
+    """
+    Encodes packets back to back into one buffer, allocating it if not given.
+    Returns a view of the written frames; no per-packet byte objects are created.
+    """
+    size = TSBK_SIZE * len(packets)
+    if buffer is None:
+        buffer = bytearray(offset + size)
+    elif len(buffer) < offset + size:
+        raise TsbkError(f"Buffer holds {len(buffer) - offset} bytes, {size} needed.")
+    for index, packet in enumerate(packets):
+        encode_into(packet, buffer, offset + index * TSBK_SIZE)
+    return memoryview(buffer)[offset:offset + size]
+
+
+def iter_frames(buffer, verify_crc: bool = True) -> Iterator[Tuple[int, int, int]]:
+    """Yields (opcode, mfid, arguments) for every frame in buffer without building packet objects."""
+    view = memoryview(buffer)
+    if len(view) % TSBK_SIZE:
+        raise TsbkError(f"Buffer length {len(view)} is not a multiple of {TSBK_SIZE}.")
+    for offset in range(0, len(view), TSBK_SIZE):
+        opcode_octet, mfid, arguments, crc = TSBK_STRUCT.unpack_from(view, offset)
+        if verify_crc and crc != tsbk_crc(view[offset:offset + HEADER_AND_ARGS_SIZE]):
+            raise TsbkError(f"CRC mismatch in frame at offset {offset}.")
+        yield opcode_octet & OPCODE_MASK, mfid, arguments
+
+
+def _layout_for(opcode: int, mfid: int, inbound: bool) -> TsbkLayout:
+    table = _INBOUND_BY_OPCODE if inbound else _OUTBOUND_BY_OPCODE
+    layout = table.get((opcode, mfid))
+    if layout is None:
+        direction = "ISP" if inbound else "OSP"
+        raise TsbkError(f"Unknown {direction} opcode 0x{opcode:02X} (MFID 0x{mfid:02X}).")
+    return layout
+
+
+def decode(frame, inbound: bool, verify_crc: bool = True) -> P25Packet:
+    """Decodes a single 12-byte TSBK into its packet object."""
+    opcode, mfid, arguments = next(iter_frames(memoryview(frame)[:TSBK_SIZE], verify_crc))
+    return _layout_for(opcode, mfid, inbound).unpack_arguments(arguments)
+
+
+def decode_batch(buffer, inbound: bool, verify_crc: bool = True) -> List[P25Packet]:
+    """Decodes every frame in a buffer of back-to-back TSBKs."""
+    return [_layout_for(opcode, mfid, inbound).unpack_arguments(arguments)
+            for opcode, mfid, arguments in iter_frames(buffer, verify_crc)]
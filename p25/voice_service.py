@@ -48,14 +48,25 @@ class TelephoneInterconnectAnswerResponse(InboundSignalingPacket):
 
 @dataclass
 class GroupVoiceChannelGrant(OutboundSignalingPacket):
-    """P25 GRP_V_CH_GRANT"""
-    pass
+    """P25 GRP_V_CH_GRANT: Sent on each involved site's control channel to start a group call."""
+    unit_id: int  # Source (talking) unit
+    talkgroup_id: int
+    channel_id: int
+    site_id: int
+    zone_id: int
+    call_id: int
+    priority: EventPriority = EventPriority.HIGH
 
 
 @dataclass
 class GroupVoiceChannelGrantUpdate(OutboundSignalingPacket):
-    """P25 GRP_V_CH_GRANT_UPDT"""
-    pass
+    """P25 GRP_V_CH_GRANT_UPDT: Periodic reminder of an active call for late-joining units."""
+    talkgroup_id: int
+    channel_id: int
+    site_id: int
+    zone_id: int
+    call_id: int
+    priority: EventPriority = EventPriority.LOW
 
 
 @dataclass
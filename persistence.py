@@ -0,0 +1,206 @@
+# persistence.py
+"""
+Optional SQLite store of registrations and affiliations.
+
+The simulation records register/deregister/affiliate/unaffiliate changes of
+units as they happen (consoles are not units and are left out); they are kept
+in memory and written in one transaction per tick, covering every zone, so the
+database costs one commit per tick rather than one per change. The database holds the current registration and affiliation tables
+plus the full change history, indexed by unit, site and talkgroup.
+
+RegistrationQuery reads the database on its own read-only connection, from
+another process or after the run, without touching the live simulation:
+
+    python persistence.py run.db site 1 1
+    python persistence.py run.db talkgroup 1001
+    python persistence.py run.db unit 42
+"""
+import argparse
+import sqlite3
+from itertools import groupby
+from typing import Iterable, List, Optional, Tuple
+
+# --- Constants ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    unit_id INTEGER NOT NULL,
+    zone_id INTEGER NOT NULL,
+    site_id INTEGER NOT NULL,
+    since REAL NOT NULL,
+    PRIMARY KEY (unit_id, zone_id, site_id)
+);
+CREATE INDEX IF NOT EXISTS registrations_by_site ON registrations (zone_id, site_id);
+
+CREATE TABLE IF NOT EXISTS affiliations (
+    unit_id INTEGER PRIMARY KEY,
+    talkgroup_id INTEGER NOT NULL,
+    zone_id INTEGER NOT NULL,
+    site_id INTEGER NOT NULL,
+    since REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS affiliations_by_talkgroup ON affiliations (talkgroup_id);
+CREATE INDEX IF NOT EXISTS affiliations_by_site ON affiliations (zone_id, site_id);
+
+CREATE TABLE IF NOT EXISTS changes (
+    sim_time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    unit_id INTEGER NOT NULL,
+    zone_id INTEGER,
+    site_id INTEGER,
+    talkgroup_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS changes_by_unit ON changes (unit_id, sim_time);
+CREATE INDEX IF NOT EXISTS changes_by_site ON changes (zone_id, site_id, sim_time);
+CREATE INDEX IF NOT EXISTS changes_by_talkgroup ON changes (talkgroup_id, sim_time);
+"""
+
+# Current-state statement per change kind; each pending change carries its parameters.
+_STATEMENTS = {
+    "register": "INSERT OR REPLACE INTO registrations (unit_id, zone_id, site_id, since) VALUES (?, ?, ?, ?)",
+    "deregister": "DELETE FROM registrations WHERE unit_id = ? AND zone_id = ? AND site_id = ?",
+    "affiliate": "INSERT OR REPLACE INTO affiliations (unit_id, talkgroup_id, zone_id, site_id, since) "
+                 "VALUES (?, ?, ?, ?, ?)",
+    "unaffiliate": "DELETE FROM affiliations WHERE unit_id = ?",
+}
+_HISTORY = "INSERT INTO changes (sim_time, kind, unit_id, zone_id, site_id, talkgroup_id) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class RegistrationStore:
+    """
+    Write side, owned by the simulation thread. Opening it starts a fresh run:
+    tables left by a previous run are emptied.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.now = 0.0  # Sim time stamped on changes; the zone controllers keep it current
+        self._tick_time = 0.0  # Latest sim time seen; reaching a later one ends the tick
+        self.transactions = 0
+        self.changes_written = 0
+        self._pending: List[Tuple[str, tuple, tuple]] = []  # (kind, statement params, history row)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+            for table in ("registrations", "affiliations", "changes"):
+                self._connection.execute(f"DELETE FROM {table}")
+
+    # --- Recording (in memory until flush) ---
+    def registered(self, zone_id: int, site_id: int, unit_ids: Iterable[int]):
+        for unit_id in unit_ids:
+            self._pending.append(("register", (unit_id, zone_id, site_id, self.now),
+                                  (self.now, "register", unit_id, zone_id, site_id, None)))
+
+    def deregistered(self, unit_id: int, zone_id: int, site_id: int):
+        self._pending.append(("deregister", (unit_id, zone_id, site_id),
+                              (self.now, "deregister", unit_id, zone_id, site_id, None)))
+
+    def affiliated(self, unit_id: int, talkgroup_id: int, zone_id: int, site_id: int):
+        self._pending.append(("affiliate", (unit_id, talkgroup_id, zone_id, site_id, self.now),
+                              (self.now, "affiliate", unit_id, zone_id, site_id, talkgroup_id)))
+
+    def unaffiliated(self, unit_id: int, talkgroup_id: int, zone_id: int, site_id: int):
+        self._pending.append(("unaffiliate", (unit_id,),
+                              (self.now, "unaffiliate", unit_id, zone_id, site_id, talkgroup_id)))
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def advance(self, now: float):
+        """
+        Called by each zone controller as it starts a tick. The first one past the
+        previous tick flushes what every zone recorded during it.
+        """
+        if now > self._tick_time:
+            self.flush()
+            self._tick_time = now
+        self.now = now
+
+    def flush(self):
+        """Writes every change recorded since the last flush in one transaction, in order."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self._connection:
+            # Runs of the same kind go through executemany; order across kinds is kept.
+            for kind, run in groupby(pending, key=lambda change: change[0]):
+                self._connection.executemany(_STATEMENTS[kind], [params for _, params, _ in run])
+            self._connection.executemany(_HISTORY, [history for _, _, history in pending])
+        self.transactions += 1
+        self.changes_written += len(pending)
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+class RegistrationQuery:
+    """Read-only view of a store's database. Safe to use from another process while the simulation runs."""
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def units_on_site(self, zone_id: int, site_id: int) -> List[int]:
+        rows = self._connection.execute(
+            "SELECT unit_id FROM registrations WHERE zone_id = ? AND site_id = ? ORDER BY unit_id",
+            (zone_id, site_id))
+        return [unit_id for unit_id, in rows]
+
+    def site_of_unit(self, unit_id: int) -> Optional[Tuple[int, int]]:
+        """(zone_id, site_id) the unit is registered on, or None."""
+        return self._connection.execute(
+            "SELECT zone_id, site_id FROM registrations WHERE unit_id = ? LIMIT 1", (unit_id,)).fetchone()
+
+    def affiliations_for_talkgroup(self, talkgroup_id: int) -> List[Tuple[int, int, int]]:
+        """(unit_id, zone_id, site_id) of every unit affiliated to the talkgroup."""
+        return self._connection.execute(
+            "SELECT unit_id, zone_id, site_id FROM affiliations WHERE talkgroup_id = ? ORDER BY unit_id",
+            (talkgroup_id,)).fetchall()
+
+    def affiliation_of(self, unit_id: int) -> Optional[Tuple[int, int, int]]:
+        """(talkgroup_id, zone_id, site_id) of the unit's affiliation, or None."""
+        return self._connection.execute(
+            "SELECT talkgroup_id, zone_id, site_id FROM affiliations WHERE unit_id = ?", (unit_id,)).fetchone()
+
+    def site_counts(self) -> List[Tuple[int, int, int]]:
+        """(zone_id, site_id, registered units) for every site with registrations."""
+        return self._connection.execute(
+            "SELECT zone_id, site_id, COUNT(*) FROM registrations GROUP BY zone_id, site_id "
+            "ORDER BY zone_id, site_id").fetchall()
+
+    def history(self, unit_id: int, limit: int = 50) -> List[tuple]:
+        """(sim_time, kind, zone_id, site_id, talkgroup_id) of the unit's latest changes, oldest first."""
+        rows = self._connection.execute(
+            "SELECT sim_time, kind, zone_id, site_id, talkgroup_id FROM changes WHERE unit_id = ? "
+            "ORDER BY sim_time DESC, rowid DESC LIMIT ?", (unit_id, limit)).fetchall()
+        return rows[::-1]
+
+    def close(self):
+        self._connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a registration store written by a simulation run.")
+    parser.add_argument("database")
+    parser.add_argument("subject", choices=["site", "talkgroup", "unit", "sites"])
+    parser.add_argument("ids", type=int, nargs="*", help="site: <zone> <site>; talkgroup: <tg>; unit: <unit>")
+    args = parser.parse_args()
+
+    query = RegistrationQuery(args.database)
+    if args.subject == "site":
+        print(f"Units on Zone {args.ids[0]} Site {args.ids[1]}: {query.units_on_site(args.ids[0], args.ids[1])}")
+    elif args.subject == "talkgroup":
+        for unit_id, zone_id, site_id in query.affiliations_for_talkgroup(args.ids[0]):
+            print(f"  Unit {unit_id} on Zone {zone_id} Site {site_id}")
+    elif args.subject == "sites":
+        for zone_id, site_id, count in query.site_counts():
+            print(f"  Zone {zone_id} Site {site_id}: {count} units")
+    else:
+        print(f"Unit {args.ids[0]}: site {query.site_of_unit(args.ids[0])}, "
+              f"affiliation {query.affiliation_of(args.ids[0])}")
+        for sim_time, kind, zone_id, site_id, talkgroup_id in query.history(args.ids[0]):
+            talkgroup = f" TG {talkgroup_id}" if talkgroup_id is not None else ""
+            print(f"  T={sim_time:.2f}s {kind} Zone {zone_id} Site {site_id}{talkgroup}")
+    query.close()
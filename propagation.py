@@ -0,0 +1,335 @@
+# propagation.py
+"""
+Optional propagation models for site scans.
+
+The default LinearModel is geo_utils.estimate_rssi: signal falls off linearly
+to each subsite's operating_radius. The path loss models compute a received
+level from an ERP, a log-distance or Okumura-Hata path loss and log-normal
+shadowing, and can add knife-edge diffraction loss from terrain that blocks
+the path between the subsite antenna and the unit.
+
+Terrain comes from an elevation grid file that is memory-mapped, never read
+in: a scan touches only the pages its path profiles fall on, so a state-sized
+grid costs no load time and no resident memory beyond those pages. With numpy
+installed, the path profiles of all of a site's subsites are sampled and
+evaluated as one array operation; without it the same maths runs per sample.
+
+Elevation grid file format (little-endian):
+
+    header   8s magic b"TTDEM\\x00\\x00\\x01", u32 rows, u32 cols,
+             f64 north latitude, f64 west longitude,
+             f64 latitude step, f64 longitude step (degrees per cell)
+    heights  rows * cols int16 metres, row-major, north row first
+
+write_elevation_grid() produces one from any source of heights.
+
+Every model keeps operating_radius as the service boundary: a subsite is never
+heard beyond it, so the zone coverage and neighbor indexes stay valid.
+"""
+import math
+import mmap
+import random
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from geo_utils import MIN_RSSI_DBM, estimate_rssi, rssi_level
+from models import Coordinates, Subsite
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; terrain profiles fall back to pure Python
+    np = None
+
+# --- Constants ---
+GRID_MAGIC = b"TTDEM\x00\x00\x01"
+GRID_HEADER = struct.Struct("<8sIIdddd")
+SPEED_OF_LIGHT = 299792458.0  # m/s
+EFFECTIVE_EARTH_RADIUS_M = 6371000.0 * 4 / 3  # Standard atmosphere (k = 4/3)
+DEFAULT_ERP_DBM = 50.0  # 100 W effective radiated power per subsite
+DEFAULT_FREQUENCY_MHZ = 851.0  # 800 MHz band downlink
+DEFAULT_SHADOWING_DB = 4.0  # Standard deviation of log-normal shadowing; 0 disables it
+DEFAULT_PATH_LOSS_EXPONENT = 3.5  # Suburban/urban
+DEFAULT_MOBILE_HEIGHT_M = 1.5
+DEFAULT_PROFILE_SAMPLES = 32  # Terrain samples between the subsite and the unit
+MIN_PATH_KM = 0.01  # Path loss formulas are clamped below this distance
+HATA_ENVIRONMENTS = ("urban", "large_city", "suburban", "open")
+
+MeasuredSignal = Tuple[float, int]  # (dBm, RSSI level 0-4)
+
+
+class ElevationGrid:
+    """Memory-mapped elevation grid. Points outside it take the height of the nearest edge cell."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, cols, north, west, lat_step, lon_step = GRID_HEADER.unpack_from(self._map, 0)
+        if magic != GRID_MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an elevation grid file.")
+        end = GRID_HEADER.size + rows * cols * 2
+        if len(self._map) < end:
+            self._map.close()
+            raise ValueError(f"{path} is truncated: expected {rows}x{cols} heights.")
+        self.rows, self.cols = rows, cols
+        self.north, self.west = north, west
+        self.lat_step, self.lon_step = lat_step, lon_step
+        if np is not None:
+            self.heights = np.frombuffer(self._map, dtype="<i2", count=rows * cols,
+                                         offset=GRID_HEADER.size).reshape(rows, cols)
+        else:
+            # Native int16 view; grid files are little-endian like every platform this runs on.
+            self.heights = memoryview(self._map)[GRID_HEADER.size:end].cast("h")
+
+    def height(self, latitude: float, longitude: float) -> float:
+        row = min(self.rows - 1, max(0, int((self.north - latitude) / self.lat_step)))
+        col = min(self.cols - 1, max(0, int((longitude - self.west) / self.lon_step)))
+        if np is not None:
+            return float(self.heights[row, col])
+        return float(self.heights[row * self.cols + col])
+
+    def heights_at(self, latitudes, longitudes):
+        """Heights at arrays of points (numpy only). Gathers straight from the mapped pages."""
+        rows = np.clip(((self.north - latitudes) / self.lat_step).astype(np.intp), 0, self.rows - 1)
+        cols = np.clip(((longitudes - self.west) / self.lon_step).astype(np.intp), 0, self.cols - 1)
+        return self.heights[rows, cols].astype(np.float64)
+
+    def close(self):
+        if isinstance(self.heights, memoryview):
+            self.heights.release()
+        self.heights = None
+        self._map.close()
+
+
+def write_elevation_grid(path: str, north: float, west: float, lat_step: float, lon_step: float,
+                         rows: Iterable[Sequence[float]]):
+    """Writes an elevation grid file from rows of heights in metres, north row first."""
+    heights = array("h")
+    cols = None
+    row_count = 0
+    for row in rows:
+        if cols is None:
+            cols = len(row)
+        elif len(row) != cols:
+            raise ValueError("Every row of an elevation grid must have the same number of heights.")
+        heights.extend(int(round(h)) for h in row)
+        row_count += 1
+    if sys.byteorder != "little":
+        heights.byteswap()
+    with open(path, "wb") as f:
+        f.write(GRID_HEADER.pack(GRID_MAGIC, row_count, cols or 0, north, west, lat_step, lon_step))
+        heights.tofile(f)
+
+
+def knife_edge_loss(v: float) -> float:
+    """Single knife-edge diffraction loss in dB for Fresnel-Kirchhoff parameter v (ITU-R P.526)."""
+    if v <= -0.78:
+        return 0.0
+    return 6.9 + 20 * math.log10(math.sqrt((v - 0.1) ** 2 + 1) + v - 0.1)
+
+
+class TerrainObstruction:
+    """
+    Diffraction loss over the worst obstruction of each path profile. The
+    profile runs from the subsite antenna to the unit with the Earth's bulge
+    added, sampled at evenly spaced points.
+    """
+
+    def __init__(self, grid: ElevationGrid, samples: int = DEFAULT_PROFILE_SAMPLES,
+                 mobile_height_m: float = DEFAULT_MOBILE_HEIGHT_M):
+        self.grid = grid
+        self.samples = max(1, samples)
+        self.mobile_height_m = mobile_height_m
+        self._fractions = [(i + 1) / (self.samples + 1) for i in range(self.samples)]
+        if np is not None:
+            self._fraction_array = np.array(self._fractions)
+
+    def losses(self, location: Coordinates, subsites: Sequence[Subsite], distances_km: Sequence[float],
+               wavelength_m: float) -> List[float]:
+        """Obstruction loss in dB of the path from each subsite to location."""
+        if np is not None:
+            return self._losses_vectorized(location, subsites, distances_km, wavelength_m)
+        rx_top = self.grid.height(location.latitude, location.longitude) + self.mobile_height_m
+        losses = []
+        for subsite, distance_km in zip(subsites, distances_km):
+            tx = subsite.location
+            tx_top = self.grid.height(tx.latitude, tx.longitude) + subsite.antenna_height
+            d = max(distance_km, MIN_PATH_KM) * 1000
+            worst = -math.inf
+            for t in self._fractions:
+                d1, d2 = d * t, d * (1 - t)
+                ground = self.grid.height(tx.latitude + (location.latitude - tx.latitude) * t,
+                                          tx.longitude + (location.longitude - tx.longitude) * t)
+                clearance = ground + d1 * d2 / (2 * EFFECTIVE_EARTH_RADIUS_M) - (tx_top + (rx_top - tx_top) * t)
+                worst = max(worst, clearance * math.sqrt(2 * d / (wavelength_m * d1 * d2)))
+            losses.append(knife_edge_loss(worst))
+        return losses
+
+    def _losses_vectorized(self, location: Coordinates, subsites: Sequence[Subsite], distances_km: Sequence[float],
+                           wavelength_m: float) -> List[float]:
+        t = self._fraction_array  # (samples,)
+        tx_lat = np.array([subsite.location.latitude for subsite in subsites])
+        tx_lon = np.array([subsite.location.longitude for subsite in subsites])
+        ends = self.grid.heights_at(np.append(tx_lat, location.latitude), np.append(tx_lon, location.longitude))
+        tx_top = ends[:-1] + np.array([subsite.antenna_height for subsite in subsites])
+        rx_top = ends[-1] + self.mobile_height_m
+
+        # (subsites, samples) profiles, one row per subsite
+        ground = self.grid.heights_at(tx_lat[:, None] + (location.latitude - tx_lat)[:, None] * t,
+                                      tx_lon[:, None] + (location.longitude - tx_lon)[:, None] * t)
+        d = np.maximum(np.asarray(distances_km, dtype=np.float64), MIN_PATH_KM)[:, None] * 1000
+        d1 = d * t
+        d2 = d - d1
+        clearance = ground + d1 * d2 / (2 * EFFECTIVE_EARTH_RADIUS_M) - (tx_top[:, None] + (rx_top - tx_top)[:, None] * t)
+        v = (clearance * np.sqrt(2 * d / (wavelength_m * d1 * d2))).max(axis=1)
+        loss = 6.9 + 20 * np.log10(np.sqrt((v - 0.1) ** 2 + 1) + v - 0.1)
+        return np.where(v > -0.78, loss, 0.0).tolist()
+
+    def close(self):
+        self.grid.close()
+
+
+class LinearModel:
+    """Linear fall-off to operating_radius (geo_utils.estimate_rssi). The default and the fastest."""
+    name = "linear"
+
+    def measure(self, location: Coordinates, subsites: Sequence[Subsite],
+                distances_km: Sequence[float]) -> List[MeasuredSignal]:
+        return [estimate_rssi(distance_km, subsite) for subsite, distance_km in zip(subsites, distances_km)]
+
+    def describe(self) -> str:
+        return "linear fall-off to operating radius"
+
+    def close(self):
+        pass
+
+
+class PathLossModel:
+    """Base for models that report ERP minus path loss, terrain loss and shadowing."""
+    name = ""
+
+    def __init__(self, erp_dbm: float = DEFAULT_ERP_DBM, frequency_mhz: float = DEFAULT_FREQUENCY_MHZ,
+                 shadowing_db: float = DEFAULT_SHADOWING_DB, mobile_height_m: float = DEFAULT_MOBILE_HEIGHT_M,
+                 terrain: Optional[TerrainObstruction] = None):
+        self.erp_dbm = erp_dbm
+        self.frequency_mhz = frequency_mhz
+        self.shadowing_db = shadowing_db
+        self.mobile_height_m = mobile_height_m
+        self.terrain = terrain
+        self.wavelength_m = SPEED_OF_LIGHT / (frequency_mhz * 1e6)
+
+    def path_loss_db(self, distance_km: float, subsite: Subsite) -> float:
+        raise NotImplementedError
+
+    def measure(self, location: Coordinates, subsites: Sequence[Subsite],
+                distances_km: Sequence[float]) -> List[MeasuredSignal]:
+        results: List[MeasuredSignal] = [(MIN_RSSI_DBM, 0)] * len(subsites)
+        in_range = [i for i, (subsite, distance_km) in enumerate(zip(subsites, distances_km))
+                    if distance_km < subsite.operating_radius]
+        if not in_range:
+            return results
+        if self.terrain:
+            terrain_losses = self.terrain.losses(location, [subsites[i] for i in in_range],
+                                                 [distances_km[i] for i in in_range], self.wavelength_m)
+        else:
+            terrain_losses = [0.0] * len(in_range)
+        for i, terrain_loss in zip(in_range, terrain_losses):
+            dbm = self.erp_dbm - self.path_loss_db(max(distances_km[i], MIN_PATH_KM), subsites[i]) - terrain_loss
+            if self.shadowing_db:
+                dbm += random.gauss(0.0, self.shadowing_db)
+            dbm = max(MIN_RSSI_DBM, dbm)
+            results[i] = (dbm, rssi_level(dbm))
+        return results
+
+    def describe(self) -> str:
+        terrain = f", terrain from {self.terrain.grid.path}" if self.terrain else ""
+        return (f"{self.name}, {self.erp_dbm:g} dBm ERP at {self.frequency_mhz:g} MHz, "
+                f"{self.shadowing_db:g} dB shadowing{terrain}")
+
+    def close(self):
+        if self.terrain:
+            self.terrain.close()
+
+
+class LogDistanceModel(PathLossModel):
+    """Free-space loss to a reference distance, then 10 * exponent dB per decade."""
+    name = "log_distance"
+
+    def __init__(self, exponent: float = DEFAULT_PATH_LOSS_EXPONENT, reference_km: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.exponent = exponent
+        self.reference_km = reference_km
+        self._reference_loss = 20 * math.log10(reference_km) + 20 * math.log10(self.frequency_mhz) + 32.44
+
+    def path_loss_db(self, distance_km: float, subsite: Subsite) -> float:
+        return self._reference_loss + 10 * self.exponent * math.log10(distance_km / self.reference_km)
+
+
+class HataModel(PathLossModel):
+    """Okumura-Hata. The base station height is each subsite's antenna_height."""
+    name = "hata"
+
+    def __init__(self, environment: str = "urban", **kwargs):
+        super().__init__(**kwargs)
+        if environment not in HATA_ENVIRONMENTS:
+            raise ValueError(f"Unknown Hata environment '{environment}'. Environments: {', '.join(HATA_ENVIRONMENTS)}.")
+        self.environment = environment
+        log_f = math.log10(self.frequency_mhz)
+        hm = self.mobile_height_m
+        if environment == "large_city":
+            mobile_correction = 3.2 * math.log10(11.75 * hm) ** 2 - 4.97
+        else:
+            mobile_correction = (1.1 * log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+        if environment == "suburban":
+            area_correction = -2 * math.log10(self.frequency_mhz / 28) ** 2 - 5.4
+        elif environment == "open":
+            area_correction = -4.78 * log_f ** 2 + 18.33 * log_f - 40.94
+        else:
+            area_correction = 0.0
+        self._fixed_loss = 69.55 + 26.16 * log_f - mobile_correction + area_correction
+
+    def path_loss_db(self, distance_km: float, subsite: Subsite) -> float:
+        log_hb = math.log10(max(subsite.antenna_height, 1.0))
+        return self._fixed_loss - 13.82 * log_hb + (44.9 - 6.55 * log_hb) * math.log10(distance_km)
+
+    def describe(self) -> str:
+        return f"{super().describe()}, {self.environment}"
+
+
+_PATH_LOSS_MODELS = {model.name: model for model in (LogDistanceModel, HataModel)}
+_COMMON_OPTIONS = {"erp_dbm": "erp_dbm", "frequency_mhz": "frequency_mhz", "shadowing_db": "shadowing_db",
+                   "mobile_height": "mobile_height_m"}
+_MODEL_OPTIONS = {"log_distance": {"exponent": "exponent", "reference_km": "reference_km"},
+                  "hata": {"environment": "environment"}}
+
+
+def make_propagation_model(spec: Optional[dict]):
+    """Builds the model described by a WACN 'propagation' config section. An empty section is the linear model."""
+    spec = dict(spec or {})
+    name = str(spec.pop("model", "linear")).lower()
+    if name == "linear":
+        if spec:
+            print(f"Warning: The linear propagation model ignores {', '.join(spec)}.")
+        return LinearModel()
+    if name not in _PATH_LOSS_MODELS:
+        print(f"Warning: Unknown propagation model '{name}'. Models: linear, {', '.join(_PATH_LOSS_MODELS)}. "
+              f"Using 'linear'.")
+        return LinearModel()
+
+    terrain_path = spec.pop("terrain", None)
+    samples = int(spec.pop("profile_samples", DEFAULT_PROFILE_SAMPLES))
+    options = {**_COMMON_OPTIONS, **_MODEL_OPTIONS[name]}
+    kwargs = {}
+    for key, value in spec.items():
+        if key not in options:
+            print(f"Warning: Unknown option '{key}' for propagation model '{name}'. "
+                  f"Options: terrain, profile_samples, {', '.join(options)}.")
+            continue
+        kwargs[options[key]] = str(value).lower() if key == "environment" else float(value)
+    if terrain_path:
+        kwargs["terrain"] = TerrainObstruction(ElevationGrid(terrain_path), samples,
+                                               kwargs.get("mobile_height_m", DEFAULT_MOBILE_HEIGHT_M))
+    return _PATH_LOSS_MODELS[name](**kwargs)
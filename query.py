@@ -0,0 +1,170 @@
+# query.py
+"""
+Live unit queries for the `info units` CLI command.
+
+UnitIndex keeps secondary indexes of units by state, by current site, by
+affiliated talkgroup and by banned site. It is built from one pass over the
+units the first time it is used; from then on Unit observers move a unit
+between index entries as its watched fields change, so a query costs time in
+proportion to what it returns, never a walk over every unit. Until then the
+simulation pays nothing for it.
+
+The index is not locked: build and query it on the simulation thread only
+(the CLI goes through ZoneController.call_on_tick).
+
+Query syntax (filters combine with AND, in any order):
+
+    units state affiliating
+    units site 3                  (a site of the zone the command names)
+    units site 2/3                (zone 2, site 3)
+    units talkgroup 1001 state in_call
+    units banned 2
+"""
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from models import RFSS, Unit, UnitState
+
+SiteKey = Tuple[int, int]  # (zone_id, site_id)
+
+# --- Constants ---
+MAX_LISTED_UNITS = 50  # Longer results are summarized after this many ids
+QUERY_KEYS = ("state", "site", "talkgroup", "banned")
+QUERY_KEY_ALIASES = {"tg": "talkgroup", "banned_from": "banned"}
+
+
+class QueryError(ValueError):
+    """Raised for unit queries that cannot be parsed."""
+    pass
+
+
+class UnitIndex:
+    """State, site, talkgroup and ban indexes over every unit of a RadioSystem."""
+
+    def __init__(self, radio_system):
+        self.radio_system = radio_system
+        self._units: Dict[int, Unit] = {}
+        self._index: Dict[str, Dict[Hashable, Set[int]]] = {key: {} for key in QUERY_KEYS}
+        self._site_keys: Dict[int, Optional[SiteKey]] = {}  # Unit id -> site key it is indexed under
+        Unit.add_observer(self._on_unit_change)
+        for zone_id in list(radio_system.config.wacn.zones.keys()):
+            # Units of lazy zones are indexed when their zone is built; until then they are all powered off.
+            radio_system.on_zone_materialized(zone_id, self._add_zone)
+
+    def close(self):
+        Unit.remove_observer(self._on_unit_change)
+
+    def _add_zone(self, zone: RFSS):
+        for unit in zone.units.values():
+            self._track(unit)
+
+    def _track(self, unit: Unit):
+        self._units[unit.id] = unit
+        self._add("state", unit.state, unit.id)
+        self._move_site(unit)
+        if unit.affiliated_talkgroup is not None:
+            self._add("talkgroup", unit.affiliated_talkgroup.id, unit.id)
+        for key in unit.banned_sites:
+            self._add("banned", key, unit.id)
+
+    def _add(self, index: str, value: Hashable, unit_id: int):
+        self._index[index].setdefault(value, set()).add(unit_id)
+
+    def _discard(self, index: str, value: Hashable, unit_id: int):
+        members = self._index[index].get(value)
+        if members is not None:
+            members.discard(unit_id)
+            if not members:
+                del self._index[index][value]
+
+    def _move_site(self, unit: Unit):
+        old_key = self._site_keys.get(unit.id)
+        site = unit.current_site
+        new_key = (unit.current_zone_id, site.id) if site is not None and unit.current_zone_id is not None else None
+        if new_key == old_key:
+            return
+        if old_key is not None:
+            self._discard("site", old_key, unit.id)
+        if new_key is not None:
+            self._add("site", new_key, unit.id)
+        self._site_keys[unit.id] = new_key
+
+    def _on_unit_change(self, unit: Unit, name: str, old_value, new_value):
+        if self._units.get(unit.id) is not unit:
+            # A unit added by a config reload, or one belonging to another RadioSystem in this process.
+            if self.radio_system.get_unit(unit.id) is unit:
+                self._track(unit)
+            return
+        if name == "state":
+            self._discard("state", old_value, unit.id)
+            self._add("state", new_value, unit.id)
+        elif name in ("current_site", "current_zone_id"):
+            self._move_site(unit)
+        elif name == "affiliated_talkgroup":
+            if old_value is not None:
+                self._discard("talkgroup", old_value.id, unit.id)
+            if new_value is not None:
+                self._add("talkgroup", new_value.id, unit.id)
+        elif name == "banned_sites":
+            for key in old_value - new_value:
+                self._discard("banned", key, unit.id)
+            for key in new_value - old_value:
+                self._add("banned", key, unit.id)
+
+    def select(self, filters: Dict[str, Hashable]) -> Set[int]:
+        """Unit ids matching every filter. Intersects starting from the smallest index entry."""
+        if not filters:
+            return set(self._units)
+        candidates = sorted((self._index[key].get(value, set()) for key, value in filters.items()), key=len)
+        result = set(candidates[0])
+        for members in candidates[1:]:
+            result.intersection_update(members)
+            if not result:
+                break
+        return result
+
+    def unit(self, unit_id: int) -> Optional[Unit]:
+        return self._units.get(unit_id)
+
+
+def parse_query(tokens: List[str], zone_id: int) -> Dict[str, Hashable]:
+    """Parses `<key> <value> ...` into index filters. Bare site ids belong to zone_id."""
+    if len(tokens) % 2:
+        raise QueryError(f"Expected <filter> <value> pairs, got '{' '.join(tokens)}'.")
+    filters = {}
+    for raw_key, value in zip(tokens[::2], tokens[1::2]):
+        key = QUERY_KEY_ALIASES.get(raw_key, raw_key)
+        if key not in QUERY_KEYS:
+            raise QueryError(f"Unknown filter '{raw_key}'. Filters: {', '.join(QUERY_KEYS)}.")
+        if key in filters:
+            raise QueryError(f"Filter '{key}' given twice.")
+        if key == "state":
+            try:
+                filters[key] = UnitState[value.upper()]
+            except KeyError:
+                raise QueryError(f"Unknown state '{value}'. States: "
+                                 f"{', '.join(state.name.lower() for state in UnitState)}.") from None
+        elif key in ("site", "banned"):
+            zone_part, _, site_part = value.rpartition("/")
+            try:
+                filters[key] = (int(zone_part) if zone_part else zone_id, int(site_part))
+            except ValueError:
+                raise QueryError(f"Filter '{key}': '{value}' is not a number (use [<zone>/]<site>).") from None
+        else:
+            try:
+                filters[key] = int(value)
+            except ValueError:
+                raise QueryError(f"Filter '{key}': '{value}' is not a number.") from None
+    return filters
+
+
+def format_units(index: UnitIndex, unit_ids: Iterable[int], limit: int = MAX_LISTED_UNITS) -> str:
+    unit_ids = sorted(unit_ids)
+    lines = [f"  {len(unit_ids)} units"]
+    for unit_id in unit_ids[:limit]:
+        unit = index.unit(unit_id)
+        site = f"Z{unit.current_zone_id}/S{unit.current_site.id}" if unit.current_site else "-"
+        talkgroup = unit.affiliated_talkgroup.id if unit.affiliated_talkgroup else "-"
+        lines.append(f"  Unit {unit.id} ({unit.alias}): {unit.state.value}, site {site}, TG {talkgroup}")
+    if len(unit_ids) > limit:
+        lines.append(f"  ... and {len(unit_ids) - limit} more")
+    return "\n".join(lines)
@@ -1,12 +1,110 @@
 # tmga7/trunkterminal/trunkTerminal-17c921e61672f1a12e0888c6d82068578d9f6e2b/radio_system.py
 # radio_system.py (Final Parser Correction)
+import copy
 import yaml
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
 from models import *
+from affiliation_index import AffiliationIndex
+from feed import StateFeed
+from interference import FrequencyIndex
+from metrics import RehomeMetrics
+from neighbors import NeighborIndex
+from persistence import RegistrationStore
+from propagation import make_propagation_model
+from query import UnitIndex
+from geo_utils import get_distance
+
+
+class LazyZoneMap(Mapping):
+    """
+    Zone id -> RFSS mapping that keeps each zone's raw config section and builds
+    the zone on first access. Iterating keys does not build anything.
+    """
+
+    def __init__(self, raw_zones: Dict[int, dict], builder):
+        self._raw = raw_zones
+        self._order = list(raw_zones)
+        self._built: Dict[int, RFSS] = {}
+        self._builder = builder
+
+    def __getitem__(self, zone_id: int) -> RFSS:
+        zone = self._built.get(zone_id)
+        if zone is None:
+            raw = self._raw.pop(zone_id)  # KeyError for unknown zones, as with a dict
+            print(f"  -> Materializing Zone {zone_id} on first access...")
+            zone = self._built[zone_id] = self._builder(zone_id, raw)
+        return zone
+
+    def __contains__(self, zone_id) -> bool:
+        return zone_id in self._built or zone_id in self._raw
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def is_materialized(self, zone_id: int) -> bool:
+        return zone_id in self._built
+
+    def materialized(self) -> Dict[int, RFSS]:
+        return self._built
+
+    def replace_raw(self, zone_id: int, zone_data: dict):
+        """Swaps the config section of a zone that has not been built yet."""
+        self._raw[zone_id] = zone_data
+
+
+class EagerZoneMap(dict):
+    """Plain zone dict with the same materialized() view as LazyZoneMap."""
+
+    def materialized(self) -> Dict[int, RFSS]:
+        return self
+
+
+@dataclass
+class SiteChange:
+    zone_id: int
+    site: Site
+    removed: bool = False
+    coverage_changed: bool = False  # Subsites moved, so units on the site should re-select
+
+
+@dataclass
+class ConfigDelta:
+    """What RadioSystem.reload_config changed in place. ZoneControllers act on it."""
+    sites: List[SiteChange] = field(default_factory=list)  # Sites to re-initialize (or drop)
+    removed_units: List[Tuple[int, Unit]] = field(default_factory=list)  # (home zone id, unit)
+    reaffiliate_units: List[Tuple[Unit, int]] = field(default_factory=list)  # (unit, talkgroup id)
+    changes: List[str] = field(default_factory=list)  # Human-readable summary
 
 
 class RadioSystem:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, lazy: Optional[bool] = None):
+        """
+        lazy: build zones on first access instead of at startup. None uses the
+        config's 'lazy_zones' setting (default off).
+        """
+        self._unit_directory: Dict[int, int] = {}  # Unit id -> home zone id
+        self._zone_coverage: Dict[int, List[Tuple[Coordinates, float]]] = {}
+        self._zone_listeners: Dict[int, list] = {}
+        self._loaded_sections: Dict[int, dict] = {}  # Raw config of each zone as last loaded, for reload diffs
+        self._site_cache_listeners = []
+        self.lazy = lazy
+        self.config_path = config_path
         self.config: SystemConfig = self._load_config_from_yaml(config_path)
+        self.affiliations = AffiliationIndex()
+        self.feed = StateFeed(self)  # State-change subscriptions for dashboards
+        self.rehoming = RehomeMetrics()  # Shared: units of a failed site may re-home into another zone
+        self.neighbors = NeighborIndex(self)
+        self.store = None  # Optional RegistrationStore; flushed once per tick, when sim time moves on
+        self._unit_index = None
+        self.propagation = make_propagation_model(self.config.wacn.propagation if self.config else None)
+        self.frequencies = FrequencyIndex(self)  # Frequency reuse and co-channel key state, for SINR in scans
+        if self.config and self.config.wacn.store_path:
+            self.store = RegistrationStore(self.config.wacn.store_path)
+            self.affiliations.store = self.store
         if self.config:
             print(
                 f"RadioSystem initialized for WACN {self.config.wacn.id}. Loaded {len(self.config.wacn.zones)} zones.")
@@ -19,97 +117,17 @@ class RadioSystem:
                 raw_config = yaml.safe_load(f)
 
             wacn_data = raw_config['wacn']
-            zones = {}
+            lazy = self.lazy if self.lazy is not None else bool(wacn_data.pop('lazy_zones', False))
+            self.lazy = lazy
+            zones = EagerZoneMap()
+            raw_zones = {}
             for zone_id, zone_data in wacn_data.get("zones", {}).items():
-                site_data_list = zone_data.pop("sites", {})
-                sites = {}
-                for site_id, site_data in site_data_list.items():
-                    channel_data = site_data.pop("channels", {})
-                    channels = {int(c_id): Channel(id=int(c_id), **c_data) for c_id, c_data in channel_data.items()}
-                    subsite_data = site_data.pop("subsites", [])
-                    subsites = [Subsite(location=Coordinates(**s.pop("location", {})), **s) for s in subsite_data]
-                    sites[int(site_id)] = Site(id=int(site_id), channels=channels, subsites=subsites, **site_data)
-
-                talkgroup_data = zone_data.pop("talkgroups", {})
-                talkgroups = {}
-                for tg_id, tg_data in talkgroup_data.items():
-                    # This will call the __post_init__ in the Talkgroup to convert priority
-                    talkgroups[int(tg_id)] = Talkgroup(id=int(tg_id), **tg_data)
-
-                unit_data = zone_data.pop("units", {})
-                units = {int(u_id): Unit(id=int(u_id), **u_data) for u_id, u_data in unit_data.items()}
-
-                console_data_list = zone_data.pop("consoles", {})
-                consoles = {}
-                for console_id, console_data in console_data_list.items():
-                    tg_ids = console_data.pop("affiliated_talkgroup_ids", [])
-                    affiliated_tgs = [talkgroups.get(tg_id) for tg_id in tg_ids if talkgroups.get(tg_id)]
-                    consoles[int(console_id)] = Console(id=int(console_id), affiliated_talkgroups=affiliated_tgs,
-                                                        **console_data)
-
-                group_data_list = zone_data.pop("groups", {})
-                groups = {}
-                for group_id, group_data in group_data_list.items():
-                    # --- REVISED and more explicit group creation ---
-
-                    # 1. Pop all known values from the raw dictionary
-                    alias = group_data.pop("alias", f"Group {group_id}")
-                    priority_str = group_data.pop("priority", "DEFAULT").upper()
-                    priority = EventPriority[priority_str]
-                    member_data = group_data.pop("members", {})
-
-                    parsed_area = None
-                    area_data = group_data.pop("area", None)  # <-- Correct key
-                    if area_data:
-                        parsed_area = OperationalArea(
-                            top_left=Coordinates(**area_data.get("top_left", {})),
-                            bottom_right=Coordinates(**area_data.get("bottom_right", {}))
-                        )
-
-
-                    all_members = []
-                    for u_id in member_data.get("units", []):
-                        if u_id in units: all_members.append(units[u_id])
-                    for tg_id in member_data.get("talkgroups", []):
-                        if tg_id in talkgroups: all_members.append(talkgroups[tg_id])
-                    for c_id in member_data.get("consoles", []):
-                        if c_id in consoles: all_members.append(consoles[c_id])
-
-                    # 3. Create the Group object with explicit arguments
-
-                    group = Group(
-                        id=int(group_id),
-                        alias=group_data.get("alias", f"Group {group_id}"),
-                        priority=priority,
-                        members=all_members,
-                        area=parsed_area
-                    )
-                    groups[int(group_id)] = group
-
-                    print(f"  -> PARSER: Created Group object: {group}")
-
-                    # 4. Link the final group object back to its members
-                    for member in all_members:
-                        if isinstance(member, Unit):
-                            member.groups.append(group)
-
-
-                area_data = zone_data.pop("area", {})
-                area = OperationalArea(
-                    top_left=Coordinates(**area_data.get("top_left", {})),
-                    bottom_right=Coordinates(**area_data.get("bottom_right", {}))
-                )
-
-                zones[int(zone_id)] = RFSS(
-                    id=int(zone_id),
-                    sites=sites,
-                    talkgroups=talkgroups,
-                    units=units,
-                    consoles=consoles,
-                    groups=groups,  # Add the parsed groups to the zone
-                    area=area,
-                    **zone_data
-                )
+                zone_id = int(zone_id)
+                self._index_zone(zone_id, zone_data)
+                if lazy:
+                    raw_zones[zone_id] = zone_data
+                else:
+                    zones[zone_id] = self._build_zone(zone_id, copy.deepcopy(zone_data))
 
             wacn_area_data = wacn_data.pop("area", {})
             wacn_area = OperationalArea(
@@ -118,7 +136,22 @@ class RadioSystem:
             )
 
             wacn_id = wacn_data.pop('id', 0)
-            wacn = WACN(id=wacn_id, zones=zones, area=wacn_area)
+            inter_zone_latency = float(wacn_data.pop('inter_zone_latency', 0.05))
+            if lazy:
+                zones = LazyZoneMap(raw_zones, self._build_and_notify)
+            zone_queue_capacity = wacn_data.pop('zone_queue_capacity', None)
+            overload_policy = str(wacn_data.pop('overload_policy', 'defer')).lower()
+            if overload_policy not in ("defer", "drop"):
+                print(f"Warning: Unknown overload policy '{overload_policy}'. Using 'defer'.")
+                overload_policy = "defer"
+            wacn = WACN(id=wacn_id, zones=zones, area=wacn_area, inter_zone_latency=inter_zone_latency,
+                        zone_queue_capacity=int(zone_queue_capacity) if zone_queue_capacity else None,
+                        overload_policy=overload_policy,
+                        tick_budget_ms=wacn_data.pop('tick_budget_ms', None),
+                        data_bit_rate=int(wacn_data.pop('data_bit_rate', 9600)),
+                        broadcast_periods=dict(wacn_data.pop('broadcast_periods', None) or {}),
+                        store_path=wacn_data.pop('store_path', None),
+                        propagation=dict(wacn_data.pop('propagation', None) or {}))
             return SystemConfig(wacn=wacn)
         except (FileNotFoundError, KeyError) as e:
             print(f"Error: Config file missing key or not found. Details: {e}")
@@ -127,12 +160,333 @@ class RadioSystem:
             print(f"An unexpected error occurred while loading the configuration: {e}")
             return None
 
+    def _build_zone(self, zone_id: int, zone_data: dict) -> RFSS:
+        """Builds a zone's full RFSS object graph from its raw config section, which it consumes: pass a copy."""
+        site_data_list = zone_data.pop("sites", {})
+        sites = {}
+        for site_id, site_data in site_data_list.items():
+            channel_data = site_data.pop("channels", {})
+            channels = {int(c_id): Channel(id=int(c_id), **c_data) for c_id, c_data in channel_data.items()}
+            subsite_data = site_data.pop("subsites", [])
+            subsites = [Subsite(location=Coordinates(**s.pop("location", {})), **s) for s in subsite_data]
+            sites[int(site_id)] = Site(id=int(site_id), channels=channels, subsites=subsites, **site_data)
+
+        talkgroup_data = zone_data.pop("talkgroups", {})
+        talkgroups = {}
+        for tg_id, tg_data in talkgroup_data.items():
+            # This will call the __post_init__ in the Talkgroup to convert priority
+            talkgroups[int(tg_id)] = Talkgroup(id=int(tg_id), **tg_data)
+
+        unit_data = zone_data.pop("units", {})
+        units = {int(u_id): Unit(id=int(u_id), **u_data) for u_id, u_data in unit_data.items()}
+
+        console_data_list = zone_data.pop("consoles", {})
+        consoles = {}
+        for console_id, console_data in console_data_list.items():
+            tg_ids = console_data.pop("affiliated_talkgroup_ids", [])
+            affiliated_tgs = [talkgroups.get(tg_id) for tg_id in tg_ids if talkgroups.get(tg_id)]
+            consoles[int(console_id)] = Console(id=int(console_id), affiliated_talkgroups=affiliated_tgs,
+                                                **console_data)
+
+        groups = self._build_groups(zone_data.pop("groups", {}), units, talkgroups, consoles)
+
+        area_data = zone_data.pop("area", {})
+        area = OperationalArea(
+            top_left=Coordinates(**area_data.get("top_left", {})),
+            bottom_right=Coordinates(**area_data.get("bottom_right", {}))
+        )
+
+        return RFSS(
+            id=int(zone_id),
+            sites=sites,
+            talkgroups=talkgroups,
+            units=units,
+            consoles=consoles,
+            groups=groups,  # Add the parsed groups to the zone
+            area=area,
+            **zone_data
+        )
+
+    def _build_groups(self, group_data_list: dict, units: Dict[int, Unit], talkgroups: Dict[int, Talkgroup],
+                      consoles: Dict[int, Console]) -> Dict[int, Group]:
+        """Builds a zone's groups and links them back to their member units."""
+        groups = {}
+        for group_id, group_data in group_data_list.items():
+            # --- REVISED and more explicit group creation ---
+
+            # 1. Pop all known values from the raw dictionary
+            alias = group_data.pop("alias", f"Group {group_id}")
+            priority_str = group_data.pop("priority", "DEFAULT").upper()
+            priority = EventPriority[priority_str]
+            member_data = group_data.pop("members", {})
+
+            parsed_area = None
+            area_data = group_data.pop("area", None)  # <-- Correct key
+            if area_data:
+                parsed_area = OperationalArea(
+                    top_left=Coordinates(**area_data.get("top_left", {})),
+                    bottom_right=Coordinates(**area_data.get("bottom_right", {}))
+                )
+
+
+            all_members = []
+            for u_id in member_data.get("units", []):
+                if u_id in units: all_members.append(units[u_id])
+            for tg_id in member_data.get("talkgroups", []):
+                if tg_id in talkgroups: all_members.append(talkgroups[tg_id])
+            for c_id in member_data.get("consoles", []):
+                if c_id in consoles: all_members.append(consoles[c_id])
+
+            # 3. Create the Group object with explicit arguments
+
+            group = Group(
+                id=int(group_id),
+                alias=group_data.get("alias", f"Group {group_id}"),
+                priority=priority,
+                members=all_members,
+                area=parsed_area
+            )
+            groups[int(group_id)] = group
+
+            print(f"  -> PARSER: Created Group object: {group}")
+
+            # 4. Link the final group object back to its members
+            for member in all_members:
+                if isinstance(member, Unit):
+                    member.groups.append(group)
+        return groups
+
+    def _build_and_notify(self, zone_id: int, zone_data: dict) -> RFSS:
+        zone = self._build_zone(zone_id, copy.deepcopy(zone_data))
+        # Listeners may look the zone up again, so it must be stored before they run.
+        self.config.wacn.zones.materialized()[zone_id] = zone
+        self._on_zone_built(zone_id, zone)
+        return zone
+
+    def _index_zone(self, zone_id: int, zone_data: dict):
+        """
+        Records the cheap facts needed before a zone is built: which units live in it
+        and where its subsites' coverage circles are.
+        """
+        self._loaded_sections[zone_id] = zone_data  # Shared with LazyZoneMap, never mutated: builds take a copy
+        for unit_id in zone_data.get("units", {}) or {}:
+            self._unit_directory[int(unit_id)] = zone_id
+        coverage = []
+        for site_data in (zone_data.get("sites", {}) or {}).values():
+            for subsite in site_data.get("subsites", []):
+                location = subsite.get("location", {})
+                coverage.append((Coordinates(**location), float(subsite.get("operating_radius", 0.0))))
+        self._zone_coverage[zone_id] = coverage
+
+    def _on_zone_built(self, zone_id: int, zone: RFSS):
+        for listener in self._zone_listeners.pop(zone_id, []):
+            listener(zone)
+
+    def on_zone_materialized(self, zone_id: int, listener):
+        """
+        Calls listener(zone) once the zone is built. In eager mode, or if the
+        zone already exists, it is called immediately.
+        """
+        zones = self.config.wacn.zones
+        if not isinstance(zones, LazyZoneMap) or zones.is_materialized(zone_id):
+            listener(zones[zone_id])
+        else:
+            self._zone_listeners.setdefault(zone_id, []).append(listener)
+
+    @property
+    def unit_index(self) -> UnitIndex:
+        """Secondary unit indexes for live queries, built on first use. Use from the simulation thread only."""
+        if self._unit_index is None:
+            self._unit_index = UnitIndex(self)
+        return self._unit_index
+
+    def on_site_changed(self, listener):
+        """Registers listener(zone_id, site_id) to drop anything cached about a site that was reconfigured."""
+        self._site_cache_listeners.append(listener)
+
+    def invalidate_site_caches(self, zone_id: int, site_id: int):
+        for listener in self._site_cache_listeners:
+            listener(zone_id, site_id)
+
+    def reload_config(self, file_path: str) -> Optional[ConfigDelta]:
+        """
+        Diffs a new config file against the loaded one and applies the changed
+        entities in place, keeping registrations, affiliations and calls. Returns
+        what changed so the zone controllers can re-initialize sites and move units.
+        """
+        try:
+            with open(file_path, "r") as f:
+                wacn_data = yaml.safe_load(f)['wacn']
+        except (OSError, KeyError, TypeError, yaml.YAMLError) as e:
+            print(f"Error: Could not reload configuration from {file_path}. Details: {e}")
+            return None
+
+        delta = ConfigDelta()
+        wacn = self.config.wacn
+        inter_zone_latency = float(wacn_data.get('inter_zone_latency', 0.05))
+        if inter_zone_latency != wacn.inter_zone_latency:
+            wacn.inter_zone_latency = inter_zone_latency
+            delta.changes.append(f"WACN: inter-zone latency set to {inter_zone_latency}s.")
+
+        new_zones = {int(zone_id): zone_data for zone_id, zone_data in wacn_data.get("zones", {}).items()}
+        for zone_id in wacn.zones:
+            if zone_id not in new_zones:
+                delta.changes.append(f"Zone {zone_id}: removed from config, but zones cannot be removed live. Ignored.")
+        for zone_id, zone_data in new_zones.items():
+            if zone_id not in self._loaded_sections:
+                delta.changes.append(f"Zone {zone_id}: new zone needs a restart to get a controller. Ignored.")
+            elif zone_data != self._loaded_sections[zone_id]:
+                self._reload_zone(zone_id, zone_data, delta)
+        return delta
+
+    def _reload_zone(self, zone_id: int, zone_data: dict, delta: ConfigDelta):
+        # A throwaway build of the new section validates it and supplies parsed values to copy
+        # onto the live objects. Nothing is touched if it does not parse.
+        try:
+            new_zone = self._build_zone(zone_id, copy.deepcopy(zone_data))
+        except (TypeError, KeyError, ValueError) as e:
+            delta.changes.append(f"Zone {zone_id}: new config is invalid, left unchanged. Details: {e}")
+            return
+
+        old_data = self._loaded_sections[zone_id]
+        for unit_id in old_data.get("units", {}) or {}:
+            self._unit_directory.pop(int(unit_id), None)
+        self._index_zone(zone_id, zone_data)
+
+        zones = self.config.wacn.zones
+        if isinstance(zones, LazyZoneMap) and not zones.is_materialized(zone_id):
+            zones.replace_raw(zone_id, zone_data)
+            delta.changes.append(f"Zone {zone_id}: not built yet; the new config will be used when it is.")
+            return
+
+        zone = zones[zone_id]
+        if (zone.alias, zone.area) != (new_zone.alias, new_zone.area):
+            zone.alias, zone.area = new_zone.alias, new_zone.area
+            delta.changes.append(f"Zone {zone_id}: alias/area updated.")
+
+        old_sites, new_sites = old_data.get("sites", {}) or {}, zone_data.get("sites", {}) or {}
+        for key in set(old_sites) | set(new_sites):
+            if old_sites.get(key) == new_sites.get(key):
+                continue
+            site_id = int(key)
+            live, new = zone.sites.get(site_id), new_zone.sites.get(site_id)
+            if new is None:
+                del zone.sites[site_id]
+                live.status = SiteStatus.OFFLINE
+                delta.sites.append(SiteChange(zone_id, live, removed=True))
+                delta.changes.append(f"Zone {zone_id}: Site {site_id} removed.")
+            elif live is None:
+                zone.sites[site_id] = new
+                delta.sites.append(SiteChange(zone_id, new))
+                delta.changes.append(f"Zone {zone_id}: Site {site_id} added.")
+            else:
+                coverage_changed = live.subsites != new.subsites
+                live.alias, live.assignment_mode, live.enabled = new.alias, new.assignment_mode, new.enabled
+                live.subsites = new.subsites
+                for channel_id in list(live.channels):
+                    if channel_id not in new.channels:
+                        del live.channels[channel_id]
+                for channel_id, channel in new.channels.items():
+                    if channel_id in live.channels:
+                        _copy_fields(channel, live.channels[channel_id])
+                    else:
+                        live.channels[channel_id] = channel
+                delta.sites.append(SiteChange(zone_id, live, coverage_changed=coverage_changed))
+                delta.changes.append(f"Zone {zone_id}: Site {site_id} updated.")
+            self.invalidate_site_caches(zone_id, site_id)
+
+        old_talkgroups = old_data.get("talkgroups", {}) or {}
+        new_talkgroups = zone_data.get("talkgroups", {}) or {}
+        for key in set(old_talkgroups) | set(new_talkgroups):
+            if old_talkgroups.get(key) == new_talkgroups.get(key):
+                continue
+            tg_id = int(key)
+            live, new = zone.talkgroups.get(tg_id), new_zone.talkgroups.get(tg_id)
+            if new is None:
+                del zone.talkgroups[tg_id]
+            elif live is None:
+                zone.talkgroups[tg_id] = live = new
+            else:
+                _copy_fields(new, live)
+            delta.changes.append(f"Zone {zone_id}: TG {tg_id} {'removed' if new is None else 'updated'}.")
+            # Units of this zone whose affiliation the new rules no longer allow must re-affiliate.
+            for (_, aff_site_id), unit_ids in self.affiliations.units_by_site(zone_id, tg_id).items():
+                if new is not None and (not new.valid_sites or aff_site_id in new.valid_sites):
+                    continue
+                for unit_id in sorted(unit_ids):
+                    delta.reaffiliate_units.append((self.get_unit(unit_id), tg_id))
+
+        old_units, new_units = old_data.get("units", {}) or {}, zone_data.get("units", {}) or {}
+        for key in set(old_units) | set(new_units):
+            if old_units.get(key) == new_units.get(key):
+                continue
+            unit_id = int(key)
+            live, new = zone.units.get(unit_id), new_zone.units.get(unit_id)
+            if new is None:
+                del zone.units[unit_id]
+                delta.removed_units.append((zone_id, live))
+            elif live is None:
+                zone.units[unit_id] = new
+            else:
+                live.alias, live.tdma_capable = new.alias, new.tdma_capable
+            delta.changes.append(f"Zone {zone_id}: Unit {unit_id} {'removed' if new is None else 'updated'}.")
+
+        if old_data.get("consoles") != zone_data.get("consoles"):
+            for console_id, new in new_zone.consoles.items():
+                live = zone.consoles.get(console_id)
+                if live is None:
+                    zone.consoles[console_id] = new
+                else:
+                    live.alias = new.alias
+                    live.affiliated_talkgroups = [zone.talkgroups[tg.id] for tg in new.affiliated_talkgroups
+                                                  if tg.id in zone.talkgroups]
+            for console_id in [c_id for c_id in zone.consoles if c_id not in new_zone.consoles]:
+                console = zone.consoles.pop(console_id)
+                for site in zone.sites.values():
+                    site.deregister(console)
+            delta.changes.append(f"Zone {zone_id}: consoles updated.")
+
+        if any(old_data.get(section) != zone_data.get(section)
+               for section in ("groups", "units", "talkgroups", "consoles")):
+            # Rebuild groups against the live members so unit.groups stays consistent.
+            for member in list(zone.units.values()) + list(zone.consoles.values()):
+                member.groups.clear()
+            zone.groups = self._build_groups(copy.deepcopy(zone_data.get("groups", {}) or {}),
+                                             zone.units, zone.talkgroups, zone.consoles)
+
+    def zones_in_range(self, location: Coordinates) -> List[RFSS]:
+        """
+        Zones a unit at this location could hear. In lazy mode only zones with a
+        subsite covering the location are returned (and so built); eager mode
+        returns every zone.
+        """
+        return self.zones_near([location], 0.0)
+
+    def zones_near(self, locations: List[Coordinates], reach_km: float) -> List[RFSS]:
+        """
+        Zones with a subsite whose coverage comes within reach_km of any of the
+        locations. Like zones_in_range, only lazy mode filters (and builds) zones.
+        """
+        zones = self.config.wacn.zones
+        if not isinstance(zones, LazyZoneMap):
+            return list(zones.values())
+        return [zones[zone_id] for zone_id, coverage in self._zone_coverage.items()
+                if any(get_distance(location, center) < radius + reach_km
+                       for center, radius in coverage for location in locations)]
+
     def get_unit(self, unit_id: int, zone_id: int = None) -> Unit:
         if zone_id:
             zone = self.config.wacn.zones.get(zone_id)
             return zone.units.get(unit_id) if zone else None
 
-        for zone in self.config.wacn.zones.values():
+        home_zone_id = self._unit_directory.get(unit_id)
+        if home_zone_id is not None:
+            unit = self.config.wacn.zones[home_zone_id].units.get(unit_id)
+            if unit:
+                return unit
+
+        # Units added after loading are not in the directory.
+        for zone in self.config.wacn.zones.materialized().values():
             unit = zone.units.get(unit_id)
             if unit:
                 return unit
@@ -149,4 +503,11 @@ class RadioSystem:
 
     def get_zone(self, zone_id: int) -> RFSS:
         """Gets a zone (RFSS) by its ID."""
-        return self.config.wacn.zones.get(zone_id)
\ No newline at end of file
+        return self.config.wacn.zones.get(zone_id)
+
+
+def _copy_fields(source, target):
+    """Copies every dataclass field except the id from a freshly parsed object onto a live one."""
+    for f in fields(source):
+        if f.name != 'id':
+            setattr(target, f.name, getattr(source, f.name))
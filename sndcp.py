@@ -0,0 +1,237 @@
+# sndcp.py
+"""
+SNDCP packet data service.
+
+A unit with data to send asks for a data channel (SN-DATA_CHN_REQ) and is given
+a session on one of its site's data channels (SN-DATA_CHN_GNT). Data channels
+are shared: each one carries the bursts of every session granted on it, one at
+a time at the channel's bit rate, taking sessions in round-robin order so one
+chatty unit cannot starve the rest. A session ends when its ready timer runs
+out with nothing left to send, or when the unit leaves its site.
+
+Channels flagged `data: true` in the config carry data alongside their voice
+calls; `data_only: true` makes a channel a dedicated data channel that voice
+never uses. Voice and data on a shared channel are not scheduled against each
+other.
+"""
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from metrics import DataMetrics
+from models import Site, SiteStatus, Unit
+from events import DataBurstComplete, DataSessionReadyTimeout
+from p25.data_service import SndcpDataChannelGrant, SndcpDataChannelRequest
+
+# --- Constants ---
+DEFAULT_DATA_BIT_RATE = 9600  # bits/s of a Phase 1 data channel
+SNDCP_HEADER_BYTES = 28  # IP and UDP headers carried with every payload burst
+READY_TIMER_SECONDS = 10.0  # Idle time before a session gives its channel up
+
+
+# Forward declaration for type hinting to avoid circular import
+class ZoneController:
+    pass
+
+
+class DataSession:
+    """One unit's SNDCP context on a data channel."""
+
+    def __init__(self, unit_id: int, channel: 'DataChannel', opened_at: float):
+        self.unit_id = unit_id
+        self.channel = channel
+        self.opened_at = opened_at
+        self.closed_at: Optional[float] = None
+        self.queue = deque()  # (payload_bytes, queued_at) waiting for the channel
+        self.bursts = 0
+        self.payload_bytes = 0
+        self.first_queued_at: Optional[float] = None
+        self.last_delivered_at: Optional[float] = None
+        self.last_activity = opened_at
+
+    @property
+    def throughput(self) -> float:
+        """Payload bits/s from the first burst being queued to the last one delivered."""
+        if self.last_delivered_at is None or self.last_delivered_at <= self.first_queued_at:
+            return 0.0
+        return self.payload_bytes * 8 / (self.last_delivered_at - self.first_queued_at)
+
+
+class DataChannel:
+    """A shared data channel: sends one burst at a time, round robin over its sessions."""
+
+    def __init__(self, site_id: int, channel_id: int, bit_rate: int):
+        self.site_id = site_id
+        self.channel_id = channel_id
+        self.bit_rate = bit_rate
+        self.sessions = 0
+        self.ready = deque()  # Sessions with queued bursts, each at most once, in turn order
+        self.current: Optional[Tuple[DataSession, int, float]] = None  # (session, payload_bytes, started_at)
+        self.busy_seconds = 0.0
+        self.bursts = 0
+
+    def transmit_time(self, payload_bytes: int) -> float:
+        return (payload_bytes + SNDCP_HEADER_BYTES) * 8 / self.bit_rate
+
+    def utilization(self, now: float) -> float:
+        busy = self.busy_seconds + (now - self.current[2] if self.current else 0.0)
+        return busy / now if now > 0 else 0.0
+
+
+class DataService:
+    """Data channel grants, sessions and burst scheduling for one zone."""
+
+    def __init__(self, controller: 'ZoneController', bit_rate: int = DEFAULT_DATA_BIT_RATE,
+                 ready_timer: float = READY_TIMER_SECONDS):
+        self.controller = controller
+        self.bit_rate = bit_rate
+        self.ready_timer = ready_timer
+        self.metrics = DataMetrics()
+        self.sessions: Dict[int, DataSession] = {}
+        self._pending: Dict[int, List[Tuple[int, float]]] = {}  # Unit id -> bursts waiting for a grant
+        self._channels: Dict[int, Dict[int, DataChannel]] = {}  # Site id -> channel id -> data channel
+        controller.radio_system.on_site_changed(self._on_site_changed)
+
+    def data_channels(self, site: Site) -> Dict[int, DataChannel]:
+        channels = self._channels.get(site.id)
+        if channels is None:
+            channels = self._channels[site.id] = {
+                channel.id: DataChannel(site.id, channel.id, channel.bit_rate or self.bit_rate)
+                for channel in sorted(site.channels.values(), key=lambda c: c.id)
+                if (channel.data or channel.data_only) and channel.enabled and not channel.control
+            }
+        return channels
+
+    def channels(self) -> List[DataChannel]:
+        """Every data channel in use so far, by site."""
+        return [channel for _, channels in sorted(self._channels.items()) for channel in channels.values()]
+
+    def _on_site_changed(self, zone_id: int, site_id: int):
+        if zone_id != self.controller.zone_id or site_id not in self._channels:
+            return
+        site = self.controller.radio_system.get_site(site_id, zone_id)
+        old = self._channels.pop(site_id)
+        new = self.data_channels(site) if site else {}
+        for channel_id, channel in old.items():
+            if channel_id in new and new[channel_id].bit_rate == channel.bit_rate:
+                new[channel_id] = channel  # Unchanged channel keeps its sessions and queue
+            else:
+                for unit_id in [s.unit_id for s in self.sessions.values() if s.channel is channel]:
+                    self.close(unit_id)
+
+    # --- Unit side ---
+    def send(self, unit: Unit, payload_bytes: int) -> Optional[SndcpDataChannelRequest]:
+        """Queues a burst. Returns the SN-DATA_CHN_REQ to send if the unit has no session yet."""
+        now = self.controller.current_time
+        session = self.sessions.get(unit.id)
+        if session:
+            self._enqueue(session, payload_bytes, now)
+            return None
+        pending = self._pending.get(unit.id)
+        if pending is not None:
+            pending.append((payload_bytes, now))
+            return None
+        self._pending[unit.id] = [(payload_bytes, now)]
+        self.metrics.requests += 1
+        return SndcpDataChannelRequest(unit_id=unit.id)
+
+    # --- System side ---
+    def grant(self, unit: Unit) -> Optional[SndcpDataChannelGrant]:
+        """Picks the data channel with the fewest sessions on the unit's site, or denies."""
+        site = unit.current_site
+        channels = self.data_channels(site).values() if site and site.status == SiteStatus.ONLINE else ()
+        channel = min(channels, key=lambda c: (c.sessions, c.channel_id), default=None)
+        if channel is None:
+            self.metrics.denied += 1
+            self.metrics.dropped_bursts += len(self._pending.pop(unit.id, ()))
+            return None
+        return SndcpDataChannelGrant(unit_id=unit.id, channel_id=channel.channel_id, site_id=site.id,
+                                     zone_id=self.controller.zone_id)
+
+    def open_session(self, grant: SndcpDataChannelGrant) -> Optional[DataSession]:
+        pending = self._pending.pop(grant.unit_id, None)
+        site = self.controller.radio_system.get_site(grant.site_id, grant.zone_id)
+        channel = self.data_channels(site).get(grant.channel_id) if site else None
+        if pending is None or channel is None:
+            return None  # The unit left its site while the grant was on its way
+        session = DataSession(grant.unit_id, channel, self.controller.current_time)
+        self.sessions[grant.unit_id] = session
+        channel.sessions += 1
+        self.metrics.grants += 1
+        for payload_bytes, queued_at in pending:
+            self._enqueue(session, payload_bytes, queued_at)
+        return session
+
+    def close(self, unit_id: int):
+        """Ends a unit's session (or forgets its pending request). Queued bursts are dropped."""
+        dropped = len(self._pending.pop(unit_id, ()))
+        session = self.sessions.pop(unit_id, None)
+        if session:
+            session.closed_at = self.controller.current_time
+            dropped += len(session.queue)
+            session.queue.clear()
+            channel = session.channel
+            channel.sessions -= 1
+            if session in channel.ready:
+                channel.ready.remove(session)
+            self.metrics.sessions_closed += 1
+            if session.bursts:
+                self.metrics.session_throughput.append(session.throughput)
+        self.metrics.dropped_bursts += dropped
+
+    def _enqueue(self, session: DataSession, payload_bytes: int, queued_at: float):
+        if session.first_queued_at is None:
+            session.first_queued_at = queued_at
+        session.last_activity = self.controller.current_time
+        if not session.queue:
+            session.channel.ready.append(session)
+        session.queue.append((payload_bytes, queued_at))
+        self._start_next(session.channel)
+
+    def _start_next(self, channel: DataChannel):
+        if channel.current is not None or not channel.ready:
+            return
+        now = self.controller.current_time
+        session = channel.ready.popleft()
+        payload_bytes, queued_at = session.queue.popleft()
+        if session.queue:
+            channel.ready.append(session)  # Back of the line until its next turn
+        self.metrics.queue_delay.add(now - queued_at)
+        channel.current = (session, payload_bytes, now)
+        self.controller.schedule_event(channel.transmit_time(payload_bytes),
+                                       DataBurstComplete(site_id=channel.site_id, channel_id=channel.channel_id))
+
+    def burst_complete(self, event: DataBurstComplete):
+        channel = self._channels.get(event.site_id, {}).get(event.channel_id)
+        if channel is None or channel.current is None:
+            return
+        now = self.controller.current_time
+        session, payload_bytes, started_at = channel.current
+        channel.current = None
+        channel.busy_seconds += now - started_at
+        channel.bursts += 1
+        if session.closed_at is None:
+            session.bursts += 1
+            session.payload_bytes += payload_bytes
+            session.last_delivered_at = session.last_activity = now
+            self.metrics.bursts += 1
+            self.metrics.payload_bytes += payload_bytes
+            if not session.queue:
+                self.controller.schedule_event(self.ready_timer, DataSessionReadyTimeout(unit_id=session.unit_id))
+        self._start_next(channel)
+
+    def ready_timeout(self, event: DataSessionReadyTimeout):
+        session = self.sessions.get(event.unit_id)
+        if not session or session.queue or (session.channel.current and session.channel.current[0] is session):
+            return
+        if self.controller.current_time - session.last_activity >= self.ready_timer - 1e-9:
+            self.close(event.unit_id)
+
+    def report(self) -> str:
+        now = self.controller.current_time
+        lines = [self.metrics.report(), f"  Open sessions: {len(self.sessions)}"]
+        for channel in self.channels():
+            queued = sum(len(session.queue) for session in channel.ready)
+            lines.append(f"  Site {channel.site_id} Ch{channel.channel_id}: {channel.bit_rate} bps, "
+                         f"{channel.sessions} sessions, {queued} bursts queued, {channel.bursts} sent, "
+                         f"utilization {channel.utilization(now):.1%}")
+        return "\n".join(lines)
@@ -0,0 +1,220 @@
+# traffic.py
+"""
+Parametric traffic models for driving load without hand-written scenario events.
+
+A traffic scenario describes power-on ramps, Poisson call arrivals per
+talkgroup and Poisson data bursts per unit instead of listing every event.
+Each zone gets a TrafficGenerator made of lazy streams; the ZoneController
+pulls only the events that fall inside a short lookahead window on every
+tick, so memory stays constant however long the run is.
+"""
+import heapq
+import itertools
+import math
+import random
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from events import Event, UnitEmergencyAlarmCommand, UnitInitiateCallCommand, UnitPowerOnCommand, UnitSendDataCommand
+from models import Talkgroup, UnitState
+
+# --- Constants ---
+DEFAULT_LOOKAHEAD_SECONDS = 1.0
+DEFAULT_HOLDING_TIME = {"distribution": "exponential", "mean": 5.0}
+MIN_HOLDING_TIME_SECONDS = 0.5
+DEFAULT_PAYLOAD_BYTES = {"distribution": "constant", "value": 64}  # About one AVL location report
+DATA_UNIT_STATES = (UnitState.IDLE_REGISTERED, UnitState.IDLE_AFFILIATED, UnitState.IN_CALL)
+
+# A stream yields (sim_time, make_event). make_event runs at feed time and may
+# return None when the event no longer makes sense (e.g. nobody is affiliated).
+Stream = Iterator[Tuple[float, Callable[[], Optional[Event]]]]
+
+
+# Forward declaration for type hinting to avoid circular import
+class ZoneController:
+    pass
+
+
+def _make_sampler(spec: dict, rng: random.Random, what: str) -> Callable[[], float]:
+    """Builds a sampler for one of the supported distributions."""
+    distribution = spec.get("distribution", "exponential").lower()
+    if distribution == "exponential":
+        mean = float(spec["mean"])
+        return lambda: rng.expovariate(1.0 / mean)
+    if distribution == "constant":
+        value = float(spec["value"])
+        return lambda: value
+    if distribution == "uniform":
+        low, high = float(spec["min"]), float(spec["max"])
+        return lambda: rng.uniform(low, high)
+    if distribution == "lognormal":
+        # Parameterized by the mean and sigma of the value itself, not of its log.
+        mean, sigma = float(spec["mean"]), float(spec["sigma"])
+        mu = math.log(mean) - sigma ** 2 / 2
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown {what} distribution '{distribution}'.")
+
+
+def make_holding_time_sampler(spec: dict, rng: random.Random) -> Callable[[], float]:
+    """Builds a sampler for call holding times (PTT duration in seconds)."""
+    sample = _make_sampler(spec, rng, "holding time")
+    return lambda: max(MIN_HOLDING_TIME_SECONDS, sample())
+
+
+def make_payload_sampler(spec: dict, rng: random.Random) -> Callable[[], int]:
+    """Builds a sampler for data burst payload sizes in bytes."""
+    sample = _make_sampler(spec, rng, "payload size")
+    return lambda: max(1, int(round(sample())))
+
+
+class TrafficGenerator:
+    """Lazily generates the traffic of one zone and feeds it to its controller."""
+
+    def __init__(self, radio_system, zone_id: int, zone_config: dict, seed: int,
+                 duration: float, lookahead: float = DEFAULT_LOOKAHEAD_SECONDS, start_time: float = 0.0):
+        self.radio_system = radio_system
+        self.zone_id = zone_id
+        self.duration = duration
+        self.lookahead = lookahead
+        self.start_time = start_time
+        self.rng = random.Random(seed)
+        self.emitted = 0
+        self.skipped = 0  # Arrivals with no suitable unit to make them
+        self._order = itertools.count()  # Tie-breaker so streams are never compared
+        self._streams: List[Tuple[float, int, Callable, Stream]] = []
+
+        zone = radio_system.get_zone(zone_id)
+        power_on = zone_config.get("power_on")
+        if power_on:
+            unit_ids = power_on.get("units", "all")
+            if unit_ids == "all":
+                unit_ids = sorted(zone.units)
+            self._add_stream(self._power_on_ramp(unit_ids, float(power_on.get("start", 0.0)),
+                                                 float(power_on.get("ramp", 0.0))))
+
+        group_activity = self._group_activity(zone, zone_config.get("groups", {}))
+        for tg_id, tg_config in zone_config.get("talkgroups", {}).items():
+            tg_id = int(tg_id)
+            rate_per_second = float(tg_config.get("calls_per_hour", 0.0)) / 3600.0
+            rate_per_second *= float(tg_config.get("activity", 1.0)) * group_activity.get(tg_id, 1.0)
+            emergency_rate = float(tg_config.get("emergencies_per_hour", 0.0)) / 3600.0
+            if rate_per_second <= 0 and emergency_rate <= 0:
+                continue
+            holding_time = make_holding_time_sampler(tg_config.get("holding_time", DEFAULT_HOLDING_TIME), self.rng)
+            if rate_per_second > 0:
+                self._add_stream(self._call_arrivals(tg_id, rate_per_second, holding_time,
+                                                     float(tg_config.get("start", 0.0))))
+            if emergency_rate > 0:
+                self._add_stream(self._call_arrivals(tg_id, emergency_rate, holding_time,
+                                                     float(tg_config.get("start", 0.0)), emergency=True))
+
+        data = zone_config.get("data")
+        if data:
+            # Every registered unit sends at the same rate, so the zone's bursts are one Poisson stream.
+            self._data_unit_ids = sorted(zone.units)
+            rate_per_second = float(data.get("bursts_per_unit_per_hour", 0.0)) * len(self._data_unit_ids) / 3600.0
+            if rate_per_second > 0:
+                payload = make_payload_sampler(data.get("payload_bytes", DEFAULT_PAYLOAD_BYTES), self.rng)
+                self._add_stream(self._data_arrivals(rate_per_second, payload, float(data.get("start", 0.0))))
+
+    @staticmethod
+    def _group_activity(zone, groups_config: dict) -> Dict[int, float]:
+        """Activity multipliers per talkgroup id, from the groups the talkgroup belongs to."""
+        activity = {}
+        for group_id, group_config in groups_config.items():
+            group = zone.groups.get(int(group_id))
+            if not group:
+                print(f"Warning: Traffic model references unknown Group {group_id} in Zone {zone.id}.")
+                continue
+            multiplier = float(group_config.get("activity", 1.0))
+            for member in group.members:
+                if isinstance(member, Talkgroup):
+                    activity[member.id] = activity.get(member.id, 1.0) * multiplier
+        return activity
+
+    def _add_stream(self, stream: Stream):
+        first = next(stream, None)
+        if first is not None:
+            heapq.heappush(self._streams, (first[0], next(self._order), first[1], stream))
+
+    def _power_on_ramp(self, unit_ids: List[int], start: float, ramp: float) -> Stream:
+        """Spreads power-ons evenly over the ramp, with jitter inside each slot."""
+        slot = ramp / len(unit_ids) if unit_ids else 0.0
+        for index, unit_id in enumerate(unit_ids):
+            at = self.start_time + start + (index + self.rng.random()) * slot
+            yield at, (lambda uid=unit_id: UnitPowerOnCommand(unit_id=uid))
+
+    def _call_arrivals(self, talkgroup_id: int, rate_per_second: float,
+                       holding_time: Callable[[], float], start: float, emergency: bool = False) -> Stream:
+        """Poisson call (or emergency alarm) arrivals on one talkgroup."""
+        at = self.start_time + start
+        end = self.start_time + self.duration
+        while True:
+            at += self.rng.expovariate(rate_per_second)
+            if at > end:
+                return
+            yield at, (lambda: self._make_call(talkgroup_id, holding_time(), emergency))
+
+    def _make_call(self, talkgroup_id: int, duration: float, emergency: bool = False) -> Optional[Event]:
+        """Picks a random idle unit of this zone affiliated to the talkgroup to make the call."""
+        zone = self.radio_system.get_zone(self.zone_id)
+        candidates = sorted(unit_id for unit_id in self.radio_system.affiliations.units(self.zone_id, talkgroup_id)
+                            if unit_id in zone.units and zone.units[unit_id].state == UnitState.IDLE_AFFILIATED)
+        if not candidates:
+            return None
+        command_type = UnitEmergencyAlarmCommand if emergency else UnitInitiateCallCommand
+        return command_type(unit_id=self.rng.choice(candidates), talkgroup_id=talkgroup_id, duration=duration)
+
+    def _data_arrivals(self, rate_per_second: float, payload: Callable[[], int], start: float) -> Stream:
+        """Poisson data bursts from the zone's registered units."""
+        at = self.start_time + start
+        end = self.start_time + self.duration
+        while True:
+            at += self.rng.expovariate(rate_per_second)
+            if at > end:
+                return
+            yield at, (lambda: self._make_data_burst(payload()))
+
+    def _make_data_burst(self, payload_bytes: int) -> Optional[Event]:
+        """Picks a random registered unit of this zone to send the burst."""
+        zone = self.radio_system.get_zone(self.zone_id)
+        unit_id = self.rng.choice(self._data_unit_ids)
+        if zone.units[unit_id].state not in DATA_UNIT_STATES:
+            return None
+        return UnitSendDataCommand(unit_id=unit_id, payload_bytes=payload_bytes)
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._streams
+
+    def feed(self, controller: 'ZoneController'):
+        """Schedules every generated event that falls inside the lookahead window."""
+        horizon = controller.current_time + self.lookahead
+        while self._streams and self._streams[0][0] <= horizon:
+            at, order, make_event, stream = heapq.heappop(self._streams)
+            event = make_event()
+            if event is None:
+                self.skipped += 1
+            else:
+                controller.schedule_event(max(0.0, at - controller.current_time), event)
+                self.emitted += 1
+            upcoming = next(stream, None)
+            if upcoming is not None:
+                heapq.heappush(self._streams, (upcoming[0], order, upcoming[1], stream))
+
+
+def load_traffic_model(controllers: dict, traffic_config: dict):
+    """Attaches a TrafficGenerator to each zone controller named in a traffic scenario."""
+    seed = int(traffic_config.get("seed", 0))
+    duration = float(traffic_config.get("duration", 3600.0))
+    lookahead = float(traffic_config.get("lookahead", DEFAULT_LOOKAHEAD_SECONDS))
+    for zone_id, zone_config in traffic_config.get("zones", {}).items():
+        controller = controllers.get(int(zone_id))
+        if not controller:
+            print(f"Warning: Zone {zone_id} not found for traffic model. Skipping.")
+            continue
+        # Each zone gets its own reproducible random stream derived from the scenario seed.
+        generator = TrafficGenerator(controller.radio_system, controller.zone_id, zone_config or {},
+                                     seed=seed * 1000 + controller.zone_id, duration=duration,
+                                     lookahead=lookahead, start_time=controller.current_time)
+        controller.add_event_source(generator)
+        print(f"  -> Traffic model attached to Zone {controller.zone_id} for {duration:.0f}s.")
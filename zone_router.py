@@ -0,0 +1,61 @@
+# zone_router.py
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from events import Event
+
+# --- Constants ---
+DEFAULT_INTER_ZONE_LATENCY_SECONDS = 0.05
+
+
+# Forward declaration for type hinting to avoid circular import
+class ZoneController:
+    pass
+
+
+class WacnRouter:
+    """
+    Connects the ZoneControllers of a WACN. Events addressed to another zone are
+    held in a per-zone outbox and delivered as one batch per tick, arriving after
+    the configured inter-zone latency.
+    """
+
+    def __init__(self, inter_zone_latency: float = DEFAULT_INTER_ZONE_LATENCY_SECONDS):
+        self.inter_zone_latency = inter_zone_latency
+        self.controllers: Dict[int, 'ZoneController'] = {}
+        self._outboxes: Dict[int, List[Tuple[float, Event]]] = defaultdict(list)
+        self.routed_count = 0
+        self.batch_count = 0
+
+    def register(self, controller: 'ZoneController'):
+        """Adds a zone's controller to the routing table."""
+        self.controllers[controller.zone_id] = controller
+        controller.router = self
+
+    def controller_for(self, zone_id: int) -> Optional['ZoneController']:
+        return self.controllers.get(zone_id)
+
+    def send(self, source: 'ZoneController', zone_id: int, delay_seconds: float, event: Event) -> bool:
+        """
+        Sends an event to the controller of zone_id. Local events are scheduled
+        directly; cross-zone events wait in the outbox until the next flush.
+        """
+        if zone_id == source.zone_id:
+            source.schedule_event(delay_seconds, event)
+            return True
+        if zone_id not in self.controllers:
+            print(f"Warning: No controller for Zone {zone_id}. Dropping {type(event).__name__} from Zone {source.zone_id}.")
+            return False
+        execution_time = source.current_time + delay_seconds + self.inter_zone_latency
+        self._outboxes[zone_id].append((execution_time, event))
+        return True
+
+    def flush(self):
+        """Delivers every pending cross-zone event, one batch per destination zone."""
+        if not self._outboxes:
+            return
+        outboxes, self._outboxes = self._outboxes, defaultdict(list)
+        for zone_id, batch in outboxes.items():
+            self.controllers[zone_id].schedule_batch(batch)
+            self.routed_count += len(batch)
+            self.batch_count += 1